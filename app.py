@@ -2,9 +2,17 @@ from flask import Flask, send_from_directory, request, jsonify
 from dotenv import load_dotenv
 
 from reasoning import GameState
-from card import Card
+from sessions import SessionRegistry
+from jobs import JobExecutor, QueueFull
 
-game_state = GameState()
+games = SessionRegistry(GameState, namespace="game")
+# Debates run in the background so /api/sync can stream them as they happen
+debates = JobExecutor(namespace="game-jobs")
+
+COLOURS = {"facilitator": "#DC143C",
+           "critic": "#00ff00",
+           "reasoner": "#0000ff",
+           "stateTracker": "#ffff00"}
 
 load_dotenv()
 
@@ -14,6 +22,19 @@ app = Flask(
     static_folder="frontend/dist",
 )
 
+def _game_from_request():
+    """Return (GameState, None) for the request's debate_id, or (None, error_response)."""
+    debate_id = request.args.get("debate_id")
+    if not debate_id:
+        debate_id = (request.get_json(silent=True) or {}).get("debate_id")
+    if not debate_id:
+        return None, (jsonify({"error": "missing 'debate_id'"}), 400)
+
+    game_state = games.get(debate_id)
+    if game_state is None:
+        return None, (jsonify({"error": "unknown 'debate_id'"}), 404)
+    return game_state, None
+
 @app.route("/")
 def index():
     return send_from_directory(app.static_folder, "index.html")
@@ -28,6 +49,7 @@ def get_deck():
     if not isinstance(agents, list):
         return jsonify({"error": "'agents' must be a list"}), 400
 
+    cards = []
     for agent in agents:
         if not isinstance(agent, dict):
             return jsonify({"error": "each agent must be an object"}), 400
@@ -40,37 +62,77 @@ def get_deck():
         if not all([model, expertise, personality, role]):
             return jsonify({"error": "agent missing required fields"}), 400
 
-        game_state.cards.append(Card(model, expertise, personality, role))
+        cards.append({"model": model, "expertise": expertise, "personality": personality, "role": role})
 
-    return "", 200
+    game_state = games.get(data["debate_id"]) if data.get("debate_id") else None
+    if game_state is None:
+        game_state = games.create()
+    game_state.cards = game_state.cards + cards
+
+    return jsonify({"debate_id": game_state.debate_id}), 200
 
 @app.route("/api/puzzle", methods=["POST"])
 def get_puzzle():
-    if game_state.debating:
+    game_state, error = _game_from_request()
+    if error:
+        return error
+
+    data = request.get_json(silent=True) or {}
+    if "puzzle" not in data:
+        return "", 400
+    # Claimed now so a second /api/puzzle can't queue the same debate twice
+    if not games.claim(game_state.debate_id):
         return "", 301
 
+    game_state.puzzle = data["puzzle"]
     try:
-        game_state.puzzle = request.get_json()["puzzle"]
-        game_state.start_debate()
-    except KeyError:
-        return "", 400
+        job_id = debates.submit(game_state.debate_id, game_state.start_debate)
+    except QueueFull as e:
+        game_state.debating = False
+        return jsonify({"error": "too many debates in progress"}), 429, {"Retry-After": str(e.retry_after)}
+    return jsonify({"debate_id": game_state.debate_id, "job_id": job_id}), 202
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = debates.status(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job id"}), 404
+    return jsonify(job), 200
 
-    return "", 200
 # this endpoint will get polled by frontend to pull new messages in the debate
+# ?after=<seq>[&max=<n>] returns every newer message at once plus the next cursor
 @app.route("/api/sync", methods=["GET"])
 def sync():
+    game_state, error = _game_from_request()
+    if error:
+        return error
+
+    if "after" in request.args:
+        try:
+            after = int(request.args["after"])
+            limit = int(request.args.get("max", 500))
+        except ValueError:
+            return jsonify({"error": "'after' and 'max' must be integers"}), 400
+
+        messages = [
+            {"seq": entry["seq"], "text": entry["message"], "colour": COLOURS[entry["role"]]}
+            for entry in game_state.debate_history.since(after, limit=limit)
+        ]
+        return jsonify({
+            "messages": messages,
+            "cursor": messages[-1]["seq"] if messages else max(after, 0),
+            "debating": game_state.debating,
+        })
+
     # if msg is empty frontend will ignore it
     msg = ""
     colour = ""
 
-    try:
-        card, msg = game_state.debate_history.pop(0)
-        colour = {"facilitator": "#DC143C",
-                  "critic": "#00ff00",
-                  "reasoner": "#0000ff",
-                  "stateTracker": "#ffff00"}[card.role]
-    except IndexError:
-        pass
+    entries = game_state.debate_history.since(game_state.sync_cursor, limit=1)
+    if entries:
+        game_state.sync_cursor = entries[0]["seq"]
+        msg = entries[0]["message"]
+        colour = COLOURS[entries[0]["role"]]
 
     return jsonify({
         "text": msg,
@@ -3,16 +3,21 @@ Flask API for SAM-based Debate System
 Bridges the React frontend with Solace Agent Mesh for multi-model debates.
 """
 
-from flask import Flask, send_from_directory, request, jsonify
+from flask import Flask, Response, send_from_directory, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 import json
+import asyncio
 import requests
-from threading import Thread
-from queue import Queue
+from threading import Thread, Lock
 import time
 
+from sessions import SessionRegistry, Stored
+from message_log import MessageLog
+from jobs import JobExecutor, QueueFull
+from src import metrics
+
 load_dotenv()
 
 app = Flask(
@@ -26,22 +31,167 @@ CORS(app, origins=["http://localhost:5173", "http://localhost:5000", "http://127
 # SAM Gateway configuration (REST gateway on port 8080)
 SAM_GATEWAY_URL = os.environ.get("SAM_GATEWAY_URL", "http://127.0.0.1:8080")
 
-# State for tracking debates
+# "sequential" (default) or "parallel" - see run_debate_streaming
+DEBATE_TURN_MODE = os.environ.get("DEBATE_TURN_MODE", "sequential")
+
+# Stream provider replies token by token to the frontend ("0" to send whole messages only)
+DEBATE_STREAM_TOKENS = os.environ.get("DEBATE_STREAM_TOKENS", "1") != "0"
+
+# Token-budgeted context window for direct debates (unset = send the full transcript).
+# Per-debate override: "context_policy" in the /api/puzzle body
+DEBATE_CONTEXT_POLICY = (
+    {
+        "keep_last": int(os.environ["DEBATE_CONTEXT_KEEP_LAST"]),
+        "budget": int(os.environ.get("DEBATE_CONTEXT_BUDGET", "8000")),
+    }
+    if os.environ.get("DEBATE_CONTEXT_KEEP_LAST")
+    else None
+)
+
+# "transcript" (default) or "turns" - one message per prior turn so provider
+# prompt caches can reuse the prefix. Per-debate override: "message_layout" in the /api/puzzle body
+DEBATE_MESSAGE_LAYOUT = os.environ.get("DEBATE_MESSAGE_LAYOUT", "transcript")
+
+# How the facilitator's verdict is read: "phrase" (default), "json" (structured
+# verdict line) or "classifier" (cheap model decides when no phrase is found).
+# Per-debate override: "verdict_mode" in the /api/puzzle body
+DEBATE_VERDICT_MODE = os.environ.get("DEBATE_VERDICT_MODE", "phrase")
+
+# Streamed text of a message in progress is written to the session at most this
+# often (seconds) or every DELTA_FLUSH_CHARS characters; only finished messages
+# go into the log
+DELTA_FLUSH_SECONDS = float(os.environ.get("DELTA_FLUSH_SECONDS", "0.1"))
+DELTA_FLUSH_CHARS = int(os.environ.get("DELTA_FLUSH_CHARS", "200"))
+
+# Upper bound on messages returned by one /api/sync?after= call
+SYNC_MAX_BATCH = int(os.environ.get("SYNC_MAX_BATCH", "500"))
+
+# Idle /api/stream connections get a comment line this often (keeps proxies from timing out)
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+
+# State for tracking one debate session (Stored fields are shared by every worker)
 class DebateState:
+    cards = Stored()
+    puzzle = Stored()
+    context_policy = Stored()
+    message_layout = Stored()
+    verdict_mode = Stored()
+    # Next message /api/sync hands out
+    sync_cursor = Stored(0)
+    debating = Stored(False)
+    # Latest debate job (see jobs.py)
+    job_id = Stored()
+    # message id -> entry with the text so far, for messages still streaming (see PartialMessages)
+    partials = Stored({})
+
     def __init__(self):
+        self.debate_id = None
         self.cards = []
         self.puzzle = None
-        self.debate_history = Queue()
+        self.context_policy = DEBATE_CONTEXT_POLICY
+        self.message_layout = DEBATE_MESSAGE_LAYOUT
+        self.verdict_mode = DEBATE_VERDICT_MODE
+        self.debate_history = MessageLog()
+        self.sync_cursor = 0
         self.debating = False
+        self.job_id = None
+        self.partials = {}
         self.current_session_id = None
 
 
-debate_state = DebateState()
+sessions = SessionRegistry(DebateState, namespace="sam")
+
+# DEBATE_WORKERS debates run at once; up to DEBATE_QUEUE_LIMIT more wait, then /api/puzzle answers 429
+debates = JobExecutor(namespace="sam-jobs")
+
+metrics.REGISTRY.gauge("debate_sessions", "Debate sessions in the state store", fn=lambda: len(sessions))
 
 
-def _run_sam_debate(puzzle: str, cards: list):
-    """Run debate through SAM gateway in background thread."""
-    debate_state.debating = True
+def _session_from_request():
+    """
+    Look up the session named by `debate_id` (query string or JSON body).
+    Returns (session, None) or (None, error_response).
+    """
+    debate_id = request.args.get("debate_id")
+    if not debate_id:
+        data = request.get_json(silent=True) or {}
+        debate_id = data.get("debate_id")
+    if not debate_id:
+        return None, (jsonify({"error": "Missing debate_id"}), 400)
+
+    session = sessions.get(debate_id)
+    if session is None:
+        return None, (jsonify({"error": f"Unknown debate_id: {debate_id}"}), 404)
+    return session, None
+
+class PartialMessages:
+    """
+    Coalesces the streamed chunks of a debate's messages in progress.
+    Chunks are buffered here and written to session.partials every
+    DELTA_FLUSH_SECONDS or DELTA_FLUSH_CHARS (checked as chunks arrive), so a
+    reply costs a few store writes instead of one per token, and the message
+    log only ever holds finished messages.
+    """
+
+    def __init__(self, session: DebateState):
+        self.session = session
+        self.entries = {}
+        self.pending = 0
+        self.flushed_at = time.monotonic()
+
+    def add(self, entry: dict):
+        """entry: {"id", "role", "model", "colour", "message": the new chunk}"""
+        current = self.entries.get(entry["id"])
+        if current is None:
+            current = self.entries[entry["id"]] = dict(entry, message="")
+        current["message"] += entry["message"]
+        self.pending += len(entry["message"])
+        if self.pending >= DELTA_FLUSH_CHARS or time.monotonic() - self.flushed_at >= DELTA_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self._write()
+            self.session.debate_history.notify()
+
+    def finish(self, message_id):
+        """The full message is about to be logged: stop streaming it."""
+        if self.entries.pop(message_id, None) is not None:
+            self._write()
+
+    def clear(self):
+        """Drop replies that were cut off (they are never logged)."""
+        if self.entries:
+            self.entries.clear()
+            self._write()
+
+    def _write(self):
+        # Copies: the stored value is replaced, never changed in place
+        self.session.partials = {message_id: dict(entry) for message_id, entry in self.entries.items()}
+        self.pending = 0
+        self.flushed_at = time.monotonic()
+
+
+# One event loop (on its own daemon thread) drives every direct debate
+_debate_loop = None
+_debate_loop_lock = Lock()
+
+
+def _get_debate_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared debate event loop, starting it on first use."""
+    global _debate_loop
+    with _debate_loop_lock:
+        if _debate_loop is None:
+            loop = asyncio.new_event_loop()
+            Thread(target=loop.run_forever, name="debate-loop", daemon=True).start()
+            _debate_loop = loop
+    return _debate_loop
+
+
+def _run_sam_debate(session: DebateState, puzzle: str, cards: list):
+    """Run debate through SAM gateway on a debate worker thread (see jobs.py)."""
+    session.debating = True
+    handed_off = False
     
     print("🚀 Starting debate...")
     print(f"   Trying SAM Gateway at: {SAM_GATEWAY_URL}")
@@ -57,6 +207,8 @@ Puzzle: {puzzle}
 Cards (participants):
 {cards_json}
 
+Debate ID: {session.debate_id}
+
 Run the debate and show me the full discussion."""
 
         # Call SAM Gateway API using /api/v1/invoke with form data
@@ -84,14 +236,14 @@ Run the debate and show me the full discussion."""
             for part in parts:
                 if part.get("type") == "text" or part.get("kind") == "text":
                     text = part.get("text", "")
-                    debate_state.debate_history.put({
+                    session.debate_history.append({
                         "role": "system",
                         "message": text,
                         "colour": "#FFFFFF"
                     })
         else:
             print(f"   SAM Error: {response.text[:200]}")
-            debate_state.debate_history.put({
+            session.debate_history.append({
                 "role": "error",
                 "message": f"SAM Gateway error: {response.status_code} - {response.text}",
                 "colour": "#FF0000"
@@ -100,21 +252,32 @@ Run the debate and show me the full discussion."""
     except requests.exceptions.ConnectionError:
         # SAM not running - fall back to direct debate
         print("   ⚠️  SAM not running, falling back to direct debate")
-        _run_direct_debate(puzzle, cards)
+        # The debate loop owns the debate (and the debating flag) from here; the
+        # worker thread waits for it so the pool still bounds running debates
+        handed_off = True
+        _run_direct_debate(session, puzzle, cards).result()
     except Exception as e:
         print(f"   ❌ Error: {str(e)}")
-        debate_state.debate_history.put({
+        session.debate_history.append({
             "role": "error", 
             "message": f"Error: {str(e)}",
             "colour": "#FF0000"
         })
     finally:
-        debate_state.debating = False
+        if not handed_off:
+            session.debating = False
+            session.debate_history.notify()
+
+
+def _run_direct_debate(session: DebateState, puzzle: str, cards: list):
+    """Schedule a direct debate on the shared event loop and return its future."""
+    session.debating = True
+    return asyncio.run_coroutine_threadsafe(_arun_direct_debate(session, puzzle, cards), _get_debate_loop())
 
 
-def _run_direct_debate(puzzle: str, cards: list):
+async def _arun_direct_debate(session: DebateState, puzzle: str, cards: list):
     """Run debate directly using debate_tools with real-time message streaming."""
-    from src.debate_tools import run_debate_streaming
+    from src.debate_tools import arun_debate
     
     print("🎯 Running DIRECT debate (SAM not available)")
     print(f"   Cards: {len(cards)}")
@@ -127,40 +290,76 @@ def _run_direct_debate(puzzle: str, cards: list):
         "stateTracker": "#ffff00"
     }
     
-    def on_message(role: str, message: str, model: str):
-        """Callback for each debate message - pushes to queue immediately."""
-        colour = colour_map.get(role, "#FFFFFF")
-        print(f"   📨 [{role}] {message[:80]}...")
-        debate_state.debate_history.put({
-            "role": role,
-            "message": message,
-            "colour": colour,
-            "model": model
-        })
-    
+    partials = PartialMessages(session)
     try:
-        result = run_debate_streaming(
+        result = None
+        async for event in arun_debate(
             puzzle=puzzle, 
             cards=cards, 
             max_rounds=4,
-            on_message=on_message
-        )
+            turn_mode=DEBATE_TURN_MODE,
+            stream=DEBATE_STREAM_TOKENS,
+            context_policy=session.context_policy,
+            message_layout=session.message_layout,
+            verdict_mode=session.verdict_mode
+        ):
+            if event["type"] == "result":
+                result = event
+            elif event["type"] == "delta":
+                # Partial message - the matching "message" event carries the full text
+                partials.add({
+                    "id": event["id"],
+                    "role": event["role"],
+                    "message": event["delta"],
+                    "colour": colour_map.get(event["role"], "#FFFFFF"),
+                    "model": event["model"]
+                })
+            else:
+                role = event["role"]
+                print(f"   📨 [{role}] {event['message'][:80]}...")
+                partials.finish(event["id"])
+                session.debate_history.append({
+                    "id": event["id"],
+                    "role": role,
+                    "message": event["message"],
+                    "colour": colour_map.get(role, "#FFFFFF"),
+                    "model": event["model"]
+                })
         
         if result["status"] != "completed":
-            debate_state.debate_history.put({
+            session.debate_history.append({
                 "role": "error",
                 "message": result.get("message", "Unknown error"),
                 "colour": "#FF0000"
             })
+        elif "context" in result:
+            print(f"   🧮 Context window: {result['context']}")
     except Exception as e:
         print(f"❌ Direct debate error: {str(e)}")
         import traceback
         traceback.print_exc()
-        debate_state.debate_history.put({
+        session.debate_history.append({
             "role": "error",
             "message": f"Direct debate error: {str(e)}",
             "colour": "#FF0000"
         })
+    finally:
+        partials.clear()
+        session.debating = False
+        session.debate_history.notify()
+
+
+def _sync_payload(entry: dict, debating: bool) -> dict:
+    """Message in the shape the frontend expects from /api/sync and /api/stream."""
+    payload = {
+        "text": entry.get("message", ""),
+        "colour": entry.get("colour", "#FFFFFF"),
+        "role": entry.get("role", ""),
+        "debating": debating
+    }
+    if "id" in entry:
+        payload["id"] = entry["id"]
+    return payload
 
 
 @app.route("/")
@@ -170,78 +369,123 @@ def index():
 
 @app.route("/api/deck", methods=["POST"])
 def get_deck():
-    """Receive the deck of cards (agent configurations) from the frontend."""
+    """
+    Receive the deck of cards (agent configurations) from the frontend.
+    Starts a new debate session (or reconfigures the one named by debate_id)
+    and returns its debate_id.
+    """
     try:
-        agents = request.get_json()["agents"]
-        debate_state.cards = []
+        data = request.get_json()
+        agents = data["agents"]
+        cards = []
         for agent in agents:
-            debate_state.cards.append({
+            card = {
                 "model": agent["model"],
                 "expertise": agent["expertise"],
                 "personality": agent["personality"],
                 "role": agent["role"]
-            })
-        print(f"✅ Deck configured with {len(debate_state.cards)} agents:")
-        for agent in debate_state.cards:
-            print(f"   - {agent['role']}: {agent['model']} ({agent['personality']}, {agent['expertise']})")
-        return "", 200
+            }
+            # Optional alternate model(s) if the card's provider is failing
+            if agent.get("fallback"):
+                card["fallback"] = agent["fallback"]
+            cards.append(card)
     except KeyError as e:
         print(f"❌ Deck configuration error: Missing field {str(e)}")
         return jsonify({"error": f"Missing field: {str(e)}"}), 400
 
+    session = sessions.get(data["debate_id"]) if data.get("debate_id") else None
+    if session is None:
+        session = sessions.create()
+    elif session.debating:
+        return jsonify({"error": "Debate already in progress"}), 409
+
+    session.cards = cards
+    print(f"✅ Deck configured with {len(session.cards)} agents (debate {session.debate_id}):")
+    for agent in session.cards:
+        print(f"   - {agent['role']}: {agent['model']} ({agent['personality']}, {agent['expertise']})")
+    return jsonify({"debate_id": session.debate_id}), 200
 
-@app.route("/api/puzzle", methods=["POST"])
-def get_puzzle():
-    """Start a debate - tries SAM first, falls back to direct."""
-    if debate_state.debating:
+
+def _admit(session: DebateState, puzzle: str, options: dict = None):
+    """
+    Queue a debate for the session: SAM first, falling back to direct.
+    The debating flag is claimed atomically, so of two quick requests only one
+    starts a debate; when the debate queue is full the claim is released and
+    the caller gets 429 with a Retry-After.
+    """
+    if not session.cards:
+        print("ERROR: No cards configured!")
+        return jsonify({"error": "No cards configured. Call /api/deck first."}), 400
+    if not sessions.claim(session.debate_id):
         return jsonify({"error": "Debate already in progress"}), 409
 
+    session.puzzle = puzzle
+    # Options apply to this puzzle only; anything not given goes back to the defaults
+    options = dict(
+        {"context_policy": DEBATE_CONTEXT_POLICY, "message_layout": DEBATE_MESSAGE_LAYOUT, "verdict_mode": DEBATE_VERDICT_MODE},
+        **(options or {}),
+    )
+    for name, value in options.items():
+        setattr(session, name, value)
+    cards = session.cards
+
     try:
-        puzzle = request.get_json()["puzzle"]
-        debate_state.puzzle = puzzle
-        
-        if not debate_state.cards:
-            print("ERROR: No cards configured!")
-            return jsonify({"error": "No cards configured. Call /api/deck first."}), 400
-        
-        print(f"Starting debate with {len(debate_state.cards)} cards")
-        print(f"Puzzle: {puzzle[:100]}...")
-        
-        # Start debate in background thread - SAM with fallback to direct
-        thread = Thread(
-            target=_run_sam_debate,  # Try SAM first, falls back to direct if unavailable
-            args=(puzzle, debate_state.cards)
+        job_id = debates.submit(session.debate_id, _run_sam_debate, session, puzzle, cards)
+    except QueueFull as e:
+        session.debating = False
+        print(f"⏳ Debate queue full, turned away debate {session.debate_id}")
+        return (
+            jsonify({"error": "Too many debates in progress. Try again later.", "retry_after": e.retry_after}),
+            429,
+            {"Retry-After": str(e.retry_after)},
         )
-        thread.start()
-        
-        return "", 200
-    except KeyError:
+
+    session.job_id = job_id
+    position = debates.status(job_id)["position"]
+    print(f"Starting debate {session.debate_id} with {len(cards)} cards (job {job_id}, queue position {position})")
+    print(f"Puzzle: {puzzle[:100]}...")
+    return jsonify({"debate_id": session.debate_id, "job_id": job_id, "queue_position": position}), 200
+
+
+def _options_error(options: dict):
+    """What is wrong with the per-puzzle debate options of a request, or None."""
+    from src.debate_tools import MESSAGE_LAYOUTS, VERDICT_MODES, context_policy_error
+
+    if "message_layout" in options and options["message_layout"] not in MESSAGE_LAYOUTS:
+        return f"Unknown message_layout: {options['message_layout']}"
+    if "verdict_mode" in options and options["verdict_mode"] not in VERDICT_MODES:
+        return f"Unknown verdict_mode: {options['verdict_mode']}"
+    return context_policy_error(options.get("context_policy"))
+
+
+@app.route("/api/puzzle", methods=["POST"])
+def get_puzzle():
+    """Start a debate - tries SAM first, falls back to direct."""
+    session, error = _session_from_request()
+    if error:
+        return error
+
+    data = request.get_json(silent=True) or {}
+    if "puzzle" not in data:
         return jsonify({"error": "Missing puzzle field"}), 400
+    options = {name: data[name] for name in ("context_policy", "message_layout", "verdict_mode") if name in data}
+    error = _options_error(options)
+    if error:
+        return jsonify({"error": error}), 400
+    return _admit(session, data["puzzle"], options)
 
 
 @app.route("/api/puzzle/sam", methods=["POST"])
 def get_puzzle_sam():
     """Start a debate through SAM gateway (requires SAM to be running)."""
-    if debate_state.debating:
-        return jsonify({"error": "Debate already in progress"}), 409
+    session, error = _session_from_request()
+    if error:
+        return error
 
-    try:
-        puzzle = request.get_json()["puzzle"]
-        debate_state.puzzle = puzzle
-        
-        if not debate_state.cards:
-            return jsonify({"error": "No cards configured. Call /api/deck first."}), 400
-        
-        # Start SAM debate in background thread
-        thread = Thread(
-            target=_run_sam_debate,
-            args=(puzzle, debate_state.cards)
-        )
-        thread.start()
-        
-        return "", 200
-    except KeyError:
+    data = request.get_json(silent=True) or {}
+    if "puzzle" not in data:
         return jsonify({"error": "Missing puzzle field"}), 400
+    return _admit(session, data["puzzle"])
 
 
 @app.route("/api/message", methods=["POST"])
@@ -249,18 +493,44 @@ def push_message():
     """
     Receive a message from SAM agents and push it to the frontend queue.
     This enables real-time updates from SAM during debates.
+    Messages without a debate_id go to the running debate if there is exactly one.
+    With "type": "delta", the message is the next piece of the streamed message
+    "id"; the finished message is then pushed with the same id.
     """
     try:
         data = request.get_json()
         role = data.get("role", "system")
         message = data.get("message", "")
         colour = data.get("colour", "#FFFFFF")
-        
-        debate_state.debate_history.put({
-            "role": role,
-            "message": message,
-            "colour": colour
-        })
+
+        if data.get("debate_id"):
+            session = sessions.get(data["debate_id"])
+            if session is None:
+                return jsonify({"error": f"Unknown debate_id: {data['debate_id']}"}), 404
+        else:
+            active = sessions.active()
+            if len(active) != 1:
+                return jsonify({"error": "Missing debate_id"}), 400
+            session = active[0]
+
+        message_id = data.get("id")
+        if data.get("type") == "delta":
+            if not message_id:
+                return jsonify({"error": "Missing id for delta"}), 400
+            # The sender batches pieces, so each one is a single store write
+            partials = session.partials
+            entry = partials.get(message_id) or {"id": message_id, "role": role, "message": "", "colour": colour}
+            session.partials = dict(partials, **{message_id: dict(entry, message=entry["message"] + message)})
+            session.debate_history.notify()
+            return "", 200
+
+        entry = {"role": role, "message": message, "colour": colour}
+        if message_id:
+            entry["id"] = message_id
+            partials = session.partials
+            if message_id in partials:
+                session.partials = {key: value for key, value in partials.items() if key != message_id}
+        session.debate_history.append(entry)
         
         return "", 200
     except Exception as e:
@@ -269,50 +539,165 @@ def push_message():
 
 @app.route("/api/sync", methods=["GET"])
 def sync():
-    """Poll for new messages in the debate."""
-    msg = ""
-    colour = ""
-    role = ""
+    """
+    Poll for new messages in the debate.
+
+    With ?after=<seq>[&max=<n>], returns every message with a sequence number
+    greater than after (up to max) plus the cursor to pass next time. The log
+    is never consumed, so any number of tabs can read the same debate. With
+    &deltas=1, messages still being streamed follow as `delta` entries (no
+    seq) carrying their text so far.
+    Without after, hands out one message per call (legacy behaviour).
+    """
+    session, error = _session_from_request()
+    if error:
+        return error
 
-    try:
-        entry = debate_state.debate_history.get_nowait()
-        msg = entry.get("message", "")
-        colour = entry.get("colour", "#FFFFFF")
-        role = entry.get("role", "")
-    except:
-        pass
+    if "after" in request.args:
+        try:
+            after = int(request.args["after"])
+            limit = min(int(request.args.get("max", SYNC_MAX_BATCH)), SYNC_MAX_BATCH)
+        except ValueError:
+            return jsonify({"error": "'after' and 'max' must be integers"}), 400
+
+        debating = session.debating
+        entries = session.debate_history.since(after, limit=limit)
+        messages = [dict(_sync_payload(entry, debating), seq=entry["seq"], type="message") for entry in entries]
+        # Messages in progress are only sent when asked for (?deltas=1)
+        if request.args.get("deltas") == "1":
+            messages += [dict(_sync_payload(entry, debating), type="delta") for entry in session.partials.values()]
+        return jsonify({
+            "messages": messages,
+            "cursor": entries[-1]["seq"] if entries else max(after, 0),
+            "debating": debating
+        })
 
-    return jsonify({
-        "text": msg,
-        "colour": colour,
-        "role": role,
-        "debating": debate_state.debating
-    })
+    entries = session.debate_history.since(session.sync_cursor, limit=1)
+    if not entries:
+        return jsonify({
+            "text": "",
+            "colour": "",
+            "role": "",
+            "debating": session.debating
+        })
+
+    session.sync_cursor = entries[0]["seq"]
+    return jsonify(_sync_payload(entries[0], session.debating))
+
+
+@app.route("/api/stream", methods=["GET"])
+def stream():
+    """
+    Server-Sent Events stream of debate messages (replaces /api/sync polling).
+    Each message is sent as it is logged, with its sequence number as the event
+    id, so reconnecting clients resume after Last-Event-ID. Streamed text of a
+    message in progress is sent as `delta` events ({id, text, offset, colour,
+    role}: text continues the message from character `offset`); the default
+    event then carries the full message with the same id. A `status` event is
+    sent whenever the debating flag changes.
+    """
+    session, error = _session_from_request()
+    if error:
+        return error
+
+    try:
+        after = int(request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or 0)
+    except ValueError:
+        after = 0
+
+    def events():
+        nonlocal after
+        debating = None
+        # message id -> characters already sent as deltas (None once the full message is sent)
+        streamed = {}
+        yield "retry: 3000\n\n"
+
+        # Ends once the session is reset or evicted; peek, so an open stream
+        # (and its heartbeats) doesn't keep an abandoned session alive
+        while sessions.peek(session.debate_id) is session:
+            entries = session.debate_history.wait(after, timeout=SSE_HEARTBEAT_SECONDS)
+            now_debating = session.debating
+            for entry in entries:
+                after = entry["seq"]
+                if "id" in entry:
+                    streamed[entry["id"]] = None
+                yield f"id: {after}\ndata: {json.dumps(_sync_payload(entry, now_debating))}\n\n"
+
+            deltas = 0
+            for message_id, entry in session.partials.items():
+                sent = streamed.get(message_id, 0)
+                if sent is None or len(entry["message"]) <= sent:
+                    continue
+                payload = dict(_sync_payload(dict(entry, message=entry["message"][sent:]), now_debating), offset=sent)
+                streamed[message_id] = len(entry["message"])
+                deltas += 1
+                yield f"event: delta\ndata: {json.dumps(payload)}\n\n"
+
+            if now_debating != debating:
+                debating = now_debating
+                yield f"event: status\ndata: {json.dumps({'debating': debating})}\n\n"
+            elif not entries and not deltas:
+                yield ": heartbeat\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.route("/api/status", methods=["GET"])
 def status():
-    """Get current debate status."""
+    """Get debate status (server-wide summary when no debate_id is given)."""
+    if not request.args.get("debate_id"):
+        from src.response_cache import get_response_cache
+        from src.resilience import breaker_stats
+        from src.rate_limit import limiter_stats
+        cache = get_response_cache()
+        return jsonify({
+            "sessions": len(sessions),
+            "active_debates": len(sessions.active()),
+            "response_cache": cache.stats() if cache else None,
+            "providers": breaker_stats(),
+            "rate_limits": limiter_stats(),
+            "debate_queue": debates.stats(),
+            "sam_gateway_url": SAM_GATEWAY_URL
+        })
+
+    session, error = _session_from_request()
+    if error:
+        return error
+    job = debates.status(session.job_id)
     return jsonify({
-        "debating": debate_state.debating,
-        "cards_configured": len(debate_state.cards),
-        "puzzle": debate_state.puzzle,
+        "debate_id": session.debate_id,
+        "debating": session.debating,
+        "job": job,
+        # 1 = next to start; 0 once running (or when nothing is queued)
+        "queue_position": job["position"] if job and job["status"] == "queued" else 0,
+        "cards_configured": len(session.cards),
+        "puzzle": session.puzzle,
         "sam_gateway_url": SAM_GATEWAY_URL
     })
 
 
+@app.route("/api/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Provider call and debate metrics in Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/api/reset", methods=["POST"])
 def reset():
-    """Reset the debate state."""
-    debate_state.cards = []
-    debate_state.puzzle = None
-    # Clear the queue
-    while not debate_state.debate_history.empty():
-        try:
-            debate_state.debate_history.get_nowait()
-        except:
-            break
-    debate_state.debating = False
+    """Discard a debate session."""
+    session, error = _session_from_request()
+    if error:
+        return error
+    # A debate still waiting for a worker never starts
+    if session.job_id:
+        debates.cancel(session.job_id)
+    sessions.remove(session.debate_id)
+    # Wake any /api/stream readers so they notice the session is gone
+    session.debate_history.notify()
     return "", 200
 
 
@@ -329,12 +714,14 @@ if __name__ == "__main__":
     print(f"SAM Gateway: {SAM_GATEWAY_URL}")
     print("")
     print("Endpoints:")
-    print("  POST /api/deck   - Configure debate participants")
+    print("  POST /api/deck   - Configure debate participants (returns debate_id)")
     print("  POST /api/puzzle - Start debate (direct, no SAM needed)")
     print("  POST /api/puzzle/sam - Start debate through SAM")
-    print("  GET  /api/sync   - Poll for debate messages")
-    print("  GET  /api/status - Get debate status")
-    print("  POST /api/reset  - Reset debate state")
+    print("  GET  /api/sync   - Poll for debate messages (?debate_id=&after=&max=)")
+    print("  GET  /api/stream - Server-Sent Events debate stream (?debate_id=)")
+    print("  GET  /api/status - Get debate status (?debate_id=)")
+    print("  GET  /api/metrics - Prometheus metrics")
+    print("  POST /api/reset  - Discard a debate session")
     print("=" * 60)
     
     app.run(debug=True, port=5000, host="0.0.0.0")
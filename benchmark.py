@@ -0,0 +1,521 @@
+'''
+End-to-end debate benchmarks.
+Drives full debates against the local stand-in provider (mock_llm_server.py)
+and reports per-turn latency, end-to-end debate latency, Python overhead per
+turn, memory high-water mark and throughput with N concurrent debates.
+
+    python benchmark.py                                  # every engine and scenario
+    python benchmark.py --engines streaming,async --concurrency 1,8,32
+    python benchmark.py --output new.json --baseline baseline.json
+
+Engines:
+    streaming  src.debate_tools.run_debate_streaming (one thread per debate)
+    async      src.debate_tools.arun_debate (all debates on one event loop)
+    reasoning  reasoning.GameState.start_debate with card.Card / llms clients
+    flask      app_sam endpoints (/api/deck, /api/puzzle, /api/status) via the test client
+    startup    cold import time and memory of each app and each provider SDK,
+               every sample in a fresh interpreter (run once, not per scenario)
+
+Each engine/scenario/concurrency measurement runs in a fresh interpreter with
+its own mock server, so rss_high_water_mb is that measurement's own high-water
+mark (ru_maxrss never drops within a process). --in-process runs them all in
+this interpreter instead; the mark is then reported as process-wide
+(process_rss_high_water_mb, not compared) unless only one measurement runs.
+
+reasoning and flask always run at most 4 rounds (hard-coded there).
+Exits with status 1 when --baseline is given and a metric regressed by more
+than --threshold.
+'''
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import threading
+import tracemalloc
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_llm_server import MockConfig, make_server, parse_distribution
+
+PUZZLE = "Three boxes are labelled apples, oranges and mixed, and every label is wrong. You may take one fruit from one box. How do you relabel them?"
+
+# Deck size, round count and transcript length (reply words) per scenario
+SCENARIOS = {
+    "small": {"cards": 3, "rounds": 2, "reply_tokens": 40},
+    "medium": {"cards": 5, "rounds": 4, "reply_tokens": 80},
+    "long-transcript": {"cards": 5, "rounds": 8, "reply_tokens": 200},
+}
+
+ENGINES = ("streaming", "async", "reasoning", "flask", "startup")
+
+# Startup targets: module imported cold, or "sdk:<provider>" for src.clients.import_sdk
+STARTUP_TARGETS = ("llms", "card", "app", "app_sam", "sdk:openai", "sdk:groq", "sdk:gemini")
+
+# Mock-friendly models (Gemini does not speak the OpenAI protocol)
+TOOL_MODELS = ["llama", "qwen", "chatgpt", "kimi", "openai"]
+CARD_MODELS = ["Llama", "Qwen", "ChatGPT", "Kimi"]
+ROLES = ["critic", "reasoner", "stateTracker"]
+
+# metric -> True if lower is better (used for baseline comparison)
+COMPARED_METRICS = {
+    "import_ms.p50": True,
+    "e2e_ms.p50": True,
+    "e2e_ms.p95": True,
+    "turn_ms.p50": True,
+    "turn_ms.p95": True,
+    "overhead_ms_per_turn": True,
+    "rss_high_water_mb": True,
+    "debates_per_s": False,
+    "turns_per_s": False,
+}
+
+
+def deck(size, models):
+    """A facilitator plus size - 1 participants, cycling through models and roles."""
+    cards = [{"model": models[0], "role": "facilitator", "personality": "decisive", "expertise": "leadership"}]
+    for i in range(size - 1):
+        cards.append({
+            "model": models[(i + 1) % len(models)],
+            "role": ROLES[i % len(ROLES)],
+            "personality": "analytical",
+            "expertise": "logic",
+        })
+    return cards
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "mean": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    return {
+        "p50": round(pick(0.50), 2),
+        "p95": round(pick(0.95), 2),
+        "mean": round(sum(ordered) / len(ordered), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+class ProviderClock:
+    """Total wall time spent inside provider calls (summed across threads)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = 0.0
+        self.calls = 0
+
+    def add(self, seconds):
+        with self.lock:
+            self.seconds += seconds
+            self.calls += 1
+
+    def reset(self):
+        with self.lock:
+            self.seconds = 0.0
+            self.calls = 0
+
+
+clock = ProviderClock()
+
+
+def instrument_providers():
+    """Wrap every provider entry point so time spent waiting on the provider is measured."""
+    import llms
+    import src.debate_tools as tools
+
+    def timed(fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                clock.add(time.perf_counter() - start)
+        return wrapper
+
+    def atimed(fn):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                clock.add(time.perf_counter() - start)
+        return wrapper
+
+    for name in list(tools._BACKENDS):
+        tools._BACKENDS[name] = timed(tools._BACKENDS[name])
+        tools._ASYNC_BACKENDS[name] = atimed(tools._ASYNC_BACKENDS[name])
+    llms._recorded = timed(llms._recorded)
+
+
+# ---- engines: each runs one debate and returns message timestamps ------------
+
+def run_streaming(scenario):
+    from src.debate_tools import run_debate_streaming
+
+    stamps = []
+    run_debate_streaming(
+        PUZZLE,
+        deck(scenario["cards"], TOOL_MODELS),
+        max_rounds=scenario["rounds"],
+        on_message=lambda role, message, model: stamps.append(time.perf_counter()),
+    )
+    return stamps
+
+
+async def arun_async(scenario):
+    from src.debate_tools import arun_debate
+
+    stamps = []
+    async for event in arun_debate(PUZZLE, deck(scenario["cards"], TOOL_MODELS), max_rounds=scenario["rounds"]):
+        if event["type"] == "message":
+            stamps.append(time.perf_counter())
+    return stamps
+
+
+def run_reasoning(scenario):
+    from reasoning import GameState
+
+    game = GameState()
+    game.cards = deck(scenario["cards"], CARD_MODELS)
+    game.puzzle = PUZZLE
+
+    stamps = []
+    share = game._share_context
+
+    def stamped(msg, card):
+        share(msg, card)
+        stamps.append(time.perf_counter())
+
+    game._share_context = stamped
+    game.start_debate()
+    return stamps
+
+
+def run_flask(scenario):
+    import app_sam
+
+    client = app_sam.app.test_client()
+    agents = deck(scenario["cards"], TOOL_MODELS)
+    debate_id = client.post("/api/deck", json={"agents": agents}).get_json()["debate_id"]
+    session = app_sam.sessions.get(debate_id)
+
+    stamps = []
+    log_append = session.debate_history.append
+
+    def stamped(entry):
+        if entry.get("type") != "delta" and entry.get("role") != "system":
+            stamps.append(time.perf_counter())
+        return log_append(entry)
+
+    session.debate_history.append = stamped
+    client.post("/api/puzzle", json={"debate_id": debate_id, "puzzle": PUZZLE})
+
+    # Wait for the debate to start, then to finish
+    started = False
+    while True:
+        debating = client.get(f"/api/status?debate_id={debate_id}").get_json()["debating"]
+        started = started or debating
+        if started and not debating:
+            break
+        time.sleep(0.02)
+
+    client.post("/api/reset", json={"debate_id": debate_id})
+    return stamps
+
+
+THREAD_RUNNERS = {"streaming": run_streaming, "reasoning": run_reasoning, "flask": run_flask}
+
+
+def run_wave(engine, scenario, concurrency):
+    """Run `concurrency` debates at once; returns [(start, stamps), ...]."""
+    if engine == "async":
+        async def one():
+            start = time.perf_counter()
+            return start, await arun_async(scenario)
+
+        async def wave():
+            return await asyncio.gather(*(one() for _ in range(concurrency)))
+
+        return asyncio.run(wave())
+
+    runner = THREAD_RUNNERS[engine]
+
+    def one():
+        start = time.perf_counter()
+        return start, runner(scenario)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(one) for _ in range(concurrency)]
+        return [f.result() for f in futures]
+
+
+def measure(engine, scenario, concurrency, repeat, rss_metric="rss_high_water_mb"):
+    clock.reset()
+    debates = []
+    wall_start = time.perf_counter()
+    for _ in range(repeat):
+        debates += run_wave(engine, scenario, concurrency)
+    wall = time.perf_counter() - wall_start
+
+    e2e, turns = [], []
+    for start, stamps in debates:
+        if stamps:
+            e2e.append((stamps[-1] - start) * 1000)
+        previous = start
+        for stamp in stamps:
+            turns.append((stamp - previous) * 1000)
+            previous = stamp
+
+    n_turns = len(turns)
+    result = {
+        "debates": len(debates),
+        "turns": n_turns,
+        "e2e_ms": percentiles(e2e),
+        "turn_ms": percentiles(turns),
+        "provider_calls": clock.calls,
+        "provider_ms_per_turn": round(clock.seconds * 1000 / n_turns, 2) if n_turns else 0.0,
+        "debates_per_s": round(len(debates) / wall, 3),
+        "turns_per_s": round(n_turns / wall, 3),
+        rss_metric: round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    # Time per turn not spent waiting on the provider (sleeps, prompt building, bookkeeping).
+    # Only meaningful without concurrency, where turns don't overlap.
+    if concurrency == 1 and n_turns:
+        result["overhead_ms_per_turn"] = round(sum(turns) / n_turns - clock.seconds * 1000 / n_turns, 2)
+    return result
+
+
+def traced_peak_mb(engine, scenario):
+    """Peak Python allocation (tracemalloc) for a single debate."""
+    tracemalloc.start()
+    try:
+        run_wave(engine, scenario, 1)
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+
+def measure_isolated(engine, name, concurrency, args):
+    """Run one measurement via `benchmark.py --in-process` in a fresh interpreter."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "result.json")
+        command = [
+            sys.executable, os.path.abspath(__file__), "--in-process",
+            "--engines", engine, "--scenarios", name, "--concurrency", str(concurrency),
+            "--repeat", str(args.repeat), "--ttft", args.ttft,
+            "--tokens-per-second", str(args.tokens_per_second), "--output", output,
+        ]
+        for flag in ("rate_limits", "trace_memory", "verbose"):
+            if getattr(args, flag):
+                command.append("--" + flag.replace("_", "-"))
+        done = subprocess.run(command, cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if done.returncode != 0:
+            lines = done.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"exit status {done.returncode}")
+        with open(output, "r", encoding="utf-8") as f:
+            return json.load(f)["results"][f"{engine}/{name}/c{concurrency}"]
+
+
+# ---- startup: import cost in a fresh interpreter ------------------------------
+
+_STARTUP_PROBE = """
+import sys, json, time, resource
+target = sys.argv[1]
+if target.startswith("sdk:"):
+    from src.clients import import_sdk
+    load = lambda: import_sdk(target[4:])
+else:
+    import importlib
+    load = lambda: importlib.import_module(target)
+modules = len(sys.modules)
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+load()
+print(json.dumps({
+    "ms": (time.perf_counter() - start) * 1000,
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss,
+    "modules": len(sys.modules) - modules,
+}))
+"""
+
+
+def measure_startup(target, repeat):
+    """Import target in `repeat` fresh interpreters (after one warm-up for .pyc files)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(repeat + 1):
+        out = subprocess.run(
+            [sys.executable, "-c", _STARTUP_PROBE, target],
+            cwd=here, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    samples = samples[1:]
+    return {
+        "import_ms": percentiles([s["ms"] for s in samples]),
+        "rss_growth_mb": round(max(s["rss_kb"] for s in samples) / 1024, 1),
+        "modules_loaded": samples[-1]["modules"],
+    }
+
+
+# ---- baseline comparison -----------------------------------------------------
+
+def _metric(result, path):
+    value = result
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table; return the list of regressions."""
+    regressions = []
+    print(f"\n{'benchmark':<40} {'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric, lower_is_better in COMPARED_METRICS.items():
+            old, new = _metric(baseline[key], metric), _metric(result, metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > threshold if lower_is_better else change < -threshold
+            flag = "  REGRESSION" if worse else ""
+            print(f"{key:<40} {metric:<22} {old:>10} {new:>10} {change:>+7.1%}{flag}")
+            if worse:
+                regressions.append((key, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end debate benchmarks against a local mock provider")
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8", help="comma-separated numbers of concurrent debates")
+    parser.add_argument("--repeat", type=int, default=2, help="waves of debates per measurement")
+    parser.add_argument("--ttft", default="fixed:0.05", help="mock time to first token (see mock_llm_server.py)")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="keep the provider rate limiter on (off by default: the mock has no limits)")
+    parser.add_argument("--trace-memory", action="store_true", help="also report tracemalloc peak per debate")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="show the apps' own logging")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run every measurement in this interpreter (memory high-water mark is then process-wide)")
+    args = parser.parse_args()
+
+    engines = [e for e in args.engines.split(",") if e]
+    for engine in engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine: {engine}")
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    for name in scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario: {name}")
+    levels = [int(n) for n in args.concurrency.split(",") if n]
+
+    debate_engines = [e for e in engines if e != "startup"]
+    server = None
+    if args.in_process and debate_engines:
+        config = MockConfig(ttft=parse_distribution(args.ttft), tokens_per_second=args.tokens_per_second, seed=0)
+        server = make_server(port=0, config=config)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+        # Everything talks to the mock - must be set before the apps are imported
+        for name in ("OPENAI_BASE_URL", "GROQ_BASE_URL", "DEEPSEEK_BASE_URL", "OPENROUTER_BASE_URL"):
+            os.environ[name] = base_url
+        for name in ("OPENAI_API_KEY", "GROQ_API_KEY", "DEEPSEEK_API_KEY", "OPENROUTER_API_KEY"):
+            os.environ.setdefault(name, "benchmark")
+        os.environ["SAM_GATEWAY_URL"] = "http://127.0.0.1:9"  # refused at once: app_sam falls back to direct
+        os.environ["LLM_CACHE"] = "0"
+        if not args.rate_limits:
+            os.environ["LLM_RATE_LIMITS"] = "0"
+        os.environ.pop("LLM_CASSETTE", None)
+
+        instrument_providers()
+
+    # One measurement per process: its high-water mark is the measurement's own
+    single = len(debate_engines) * len(scenarios) * len(levels) == 1
+    rss_metric = "rss_high_water_mb" if single else "process_rss_high_water_mb"
+
+    results = {}
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    for engine in engines:
+        if engine == "startup":
+            for target in STARTUP_TARGETS:
+                key = f"startup/{target}"
+                print(f"running {key} ...", file=sys.stderr)
+                try:
+                    results[key] = measure_startup(target, max(args.repeat, 5))
+                except (subprocess.CalledProcessError, ValueError) as e:
+                    results[key] = {"error": f"{type(e).__name__}: {e}"}
+                    print(f"  failed: {results[key]['error']}", file=sys.stderr)
+            continue
+
+        for name in scenarios:
+            scenario = SCENARIOS[name]
+            if server:
+                config.reply_tokens = scenario["reply_tokens"]
+                config.answer_after = scenario["rounds"]
+
+            for concurrency in levels:
+                key = f"{engine}/{name}/c{concurrency}"
+                print(f"running {key} ...", file=sys.stderr)
+                try:
+                    if not args.in_process:
+                        results[key] = measure_isolated(engine, name, concurrency, args)
+                        continue
+                    with quiet:
+                        results[key] = measure(engine, scenario, concurrency, args.repeat, rss_metric)
+                        if args.trace_memory and concurrency == 1:
+                            results[key]["alloc_peak_mb"] = traced_peak_mb(engine, scenario)
+                except Exception as e:
+                    results[key] = {"error": f"{type(e).__name__}: {e}"}
+                    print(f"  failed: {results[key]['error']}", file=sys.stderr)
+
+    if server:
+        server.shutdown()
+
+    output = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ttft": args.ttft,
+            "tokens_per_second": args.tokens_per_second,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nResults written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -182,6 +182,8 @@ const CardSelect = () => {
 
       if (!response.ok) throw new Error("Failed to submit deck");
 
+      const { debate_id } = await response.json();
+      sessionStorage.setItem("debateId", debate_id);
       navigate("/game");
     } catch (err) {
       console.error("Error submitting deck:", err);
@@ -45,24 +45,47 @@ const Game = () => {
   const historyEndRef = useRef(null);
 
   useEffect(() => {
-    const interval = setInterval(async () => {
-      try {
-        const response = await fetch("http://localhost:5000/api/sync");
-        const data = await response.json();
-        if (data.text) {
-          setHistory((prev) => {
-            if (prev[prev.length - 1]?.text !== data.text) {
-              return [...prev, { text: data.text, colour: data.colour }];
-            }
-            return prev;
-          });
+    const debateId = sessionStorage.getItem("debateId");
+    if (!debateId) return;
+
+    // The server pushes each message as it happens; EventSource reconnects
+    // with Last-Event-ID so nothing is missed or repeated
+    const source = new EventSource(
+      `http://localhost:5000/api/stream?debate_id=${debateId}`
+    );
+    // Streamed text of a message in progress, grouped by message id;
+    // data.text continues the message from character data.offset
+    source.addEventListener("delta", (event) => {
+      const data = JSON.parse(event.data);
+      setHistory((prev) => {
+        const idx = prev.findIndex((item) => item.id === data.id);
+        if (idx === -1) {
+          return [...prev, { id: data.id, text: data.text, colour: data.colour }];
         }
-      } catch (error) {
-        console.error("Sync error:", error);
-      }
-    }, 3000);
+        const next = [...prev];
+        next[idx] = { ...next[idx], text: next[idx].text.slice(0, data.offset) + data.text };
+        return next;
+      });
+    });
+    // Complete messages (replace the streamed text when there was one)
+    source.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (!data.text) return;
+      setHistory((prev) => {
+        const idx = data.id ? prev.findIndex((item) => item.id === data.id) : -1;
+        if (idx === -1) {
+          return [...prev, { id: data.id, text: data.text, colour: data.colour }];
+        }
+        const next = [...prev];
+        next[idx] = { ...next[idx], text: data.text };
+        return next;
+      });
+    };
+    source.onerror = (error) => {
+      console.error("Stream error:", error);
+    };
 
-    return () => clearInterval(interval);
+    return () => source.close();
   }, []);
 
   useEffect(() => {
@@ -83,7 +106,10 @@ const Game = () => {
       const response = await fetch("http://localhost:5000/api/puzzle", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ puzzle: puzzleText }),
+        body: JSON.stringify({
+          puzzle: puzzleText,
+          debate_id: sessionStorage.getItem("debateId"),
+        }),
       });
 
       console.log("📡 Response status:", response.status);
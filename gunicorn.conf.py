@@ -1,3 +1,13 @@
+import os
+import sys
+
 bind = f"0.0.0.0:{5000}"
-workers = 1
+# More than one worker needs a shared STATE_BACKEND (sqlite:///... or redis://...) - see state_store.py
+workers = int(os.environ.get("GUNICORN_WORKERS", "1"))
+if workers > 1 and os.environ.get("STATE_BACKEND", "memory") == "memory":
+    print("GUNICORN_WORKERS > 1 needs a shared STATE_BACKEND; running 1 worker", file=sys.stderr)
+    workers = 1
+# /api/stream holds a connection open per viewer, so serve requests from a thread pool
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
 preload = True
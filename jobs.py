@@ -0,0 +1,216 @@
+'''
+Background debate jobs.
+Debates run on a fixed pool of worker threads instead of holding the HTTP
+request for minutes. Each submission gets a job id, and job status is kept in
+the state store (see state_store.py) so any worker process can report it.
+At most DEBATE_QUEUE_LIMIT jobs wait for a thread; past that, submit() raises
+QueueFull so the API can answer 429 with a Retry-After.
+'''
+
+import os
+import math
+import time
+import uuid
+from collections import deque
+from threading import Condition, Thread
+
+from state_store import open_store
+from src.metrics import DEBATE_QUEUE_DEPTH, REGISTRY
+
+# Debates run at once per process
+DEBATE_WORKERS = int(os.environ.get("DEBATE_WORKERS", "4"))
+
+# Debates allowed to wait for a free worker (per process) before new ones are turned away
+DEBATE_QUEUE_LIMIT = int(os.environ.get("DEBATE_QUEUE_LIMIT", "16"))
+
+# Expected debate length (seconds) until real ones have been timed; used for Retry-After
+DEBATE_EXPECTED_SECONDS = float(os.environ.get("DEBATE_EXPECTED_SECONDS", "60"))
+
+# Finished jobs are kept this long (seconds) for /api/jobs
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+JOBS_REJECTED = REGISTRY.counter("debate_jobs_rejected_total", "Debates turned away because the queue was full")
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the pending queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Debate queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobExecutor:
+    """
+    Fixed-size pool of threads running jobs in submission order.
+
+    JobExecutor(workers=DEBATE_WORKERS, max_pending=DEBATE_QUEUE_LIMIT, namespace="jobs", name="debate")
+
+    parameters:
+        workers: jobs run at once
+        max_pending: jobs allowed to wait for a worker (None = no limit)
+        namespace: keeps these jobs apart from others in a shared store
+        name: prefix for the worker thread names
+
+    methods:
+        submit(debate_id, fn, *args) -> str: queue fn(*args), returns the job
+            id; raises QueueFull when max_pending jobs are already waiting
+        cancel(job_id) -> bool: drop a job that has not started yet, whichever
+            process queued it
+        status(job_id) -> dict or None: {"job_id", "debate_id", "status",
+            "position", "submitted_at", "started_at", "finished_at", "error"};
+            position is 1 for the next job to start, 0 once running
+        stats() -> dict: workers, running, queued and queue_limit in this process
+
+    Worker threads start with the first job, so a forked gunicorn worker
+    (preload = True) starts its own.
+    """
+
+    def __init__(self, workers=DEBATE_WORKERS, max_pending=DEBATE_QUEUE_LIMIT, namespace="jobs", name="debate"):
+        self.workers = max(workers, 1)
+        self.max_pending = max_pending
+        self.name = name
+        self._store = open_store(namespace=namespace)
+        self._queue = deque()
+        self._cond = Condition()
+        self._pid = None
+        # job id -> time.monotonic() it started, for jobs running now
+        self._started = {}
+        self._avg_seconds = DEBATE_EXPECTED_SECONDS
+        # time.monotonic() of the last sweep for expired jobs
+        self._last_eviction = None
+
+    def _start_workers(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._queue.clear()
+        self._started.clear()
+        for i in range(self.workers):
+            Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True).start()
+
+    def _retry_after(self) -> int:
+        """Seconds until the longest-running job should finish and make room."""
+        started = min(self._started.values(), default=time.monotonic())
+        return max(1, math.ceil(self._avg_seconds - (time.monotonic() - started)))
+
+    def submit(self, debate_id, fn, *args):
+        self._evict_finished()
+
+        job_id = uuid.uuid4().hex
+        with self._cond:
+            self._start_workers()
+            # A free worker takes the job at once, so only jobs beyond those count as waiting
+            waiting = len(self._queue) + len(self._started) - self.workers + 1
+            if self.max_pending is not None and waiting > self.max_pending:
+                JOBS_REJECTED.inc()
+                raise QueueFull(self._retry_after())
+            self._queue.append((job_id, fn, args))
+            # 0 = an idle worker is about to take it
+            position = max(len(self._queue) - (self.workers - len(self._started)), 0)
+            # Recorded before a worker can pick it up
+            self._store.create(job_id, {
+                "debate_id": debate_id, "status": QUEUED, "position": position, "submitted_at": time.time()
+            })
+            DEBATE_QUEUE_DEPTH.set(len(self._queue))
+            self._cond.notify()
+        return job_id
+
+    def cancel(self, job_id) -> bool:
+        # Marked in the store so the worker holding the job skips it, in
+        # whichever process it was queued; fails once a worker has started it
+        if not job_id or not self._store.compare_and_set(job_id, "status", QUEUED, CANCELLED):
+            return False
+        self._store.set(job_id, "finished_at", time.time())
+
+        with self._cond:
+            for item in self._queue:
+                if item[0] == job_id:
+                    self._queue.remove(item)
+                    break
+            else:
+                # Queued by another process; its worker drops it
+                return True
+            waiting = [item[0] for item in self._queue]
+            DEBATE_QUEUE_DEPTH.set(len(self._queue))
+        self._renumber(waiting)
+        return True
+
+    def _renumber(self, waiting):
+        for position, job_id in enumerate(waiting, 1):
+            self._store.set(job_id, "position", position)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                job_id, fn, args = self._queue.popleft()
+                started = self._started[job_id] = time.monotonic()
+                waiting = [item[0] for item in self._queue]
+                DEBATE_QUEUE_DEPTH.set(len(self._queue))
+
+            self._renumber(waiting)
+            if not self._store.compare_and_set(job_id, "status", QUEUED, RUNNING):
+                # Cancelled from another process while it waited
+                with self._cond:
+                    del self._started[job_id]
+                continue
+            self._store.set(job_id, "started_at", time.time())
+            self._store.set(job_id, "position", 0)
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                self._store.set(job_id, "error", f"{type(e).__name__}: {e}")
+                self._store.set(job_id, "status", FAILED)
+            else:
+                self._store.set(job_id, "status", DONE)
+            finally:
+                self._store.set(job_id, "finished_at", time.time())
+                with self._cond:
+                    del self._started[job_id]
+                    self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - started)
+
+    def status(self, job_id):
+        fields = self._store.fields(job_id) if job_id and self._store.exists(job_id) else None
+        if fields is None:
+            return None
+        return {
+            "job_id": job_id,
+            "debate_id": fields.get("debate_id"),
+            "status": fields.get("status"),
+            "position": fields.get("position", 0),
+            "submitted_at": fields.get("submitted_at"),
+            "started_at": fields.get("started_at"),
+            "finished_at": fields.get("finished_at"),
+            "error": fields.get("error"),
+        }
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "running": len(self._started),
+                "queued": len(self._queue),
+                "queue_limit": self.max_pending,
+            }
+
+    def _evict_finished(self):
+        # Sweeping reads every job in the store, so do it at most ten times per retention period
+        now = time.monotonic()
+        with self._cond:
+            if self._last_eviction is not None and now - self._last_eviction < JOB_RETENTION / 10:
+                return
+            self._last_eviction = now
+
+        cutoff = time.time() - JOB_RETENTION
+        for job_id in self._store.ids():
+            finished_at = self._store.get(job_id, "finished_at")
+            if finished_at is not None and finished_at < cutoff:
+                self._store.delete(job_id)
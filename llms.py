@@ -2,10 +2,18 @@ import os
 import re
 from abc import ABC, abstractmethod
 
-from groq import Groq
-from google import genai
-import requests
-from openai import OpenAI
+from src.cassette import CassetteMiss, get_cassette, replaying
+from src.clients import get_gemini_client, get_groq_client, get_openai_client
+from src.metrics import CallTracker, record_usage
+from src import rate_limit
+from src.rate_limit import Reservation
+from src.resilience import CircuitOpen, EmptyResponse, call_with_retries
+from src.verdict import StopGeneration
+
+# Overridable to point at a local stand-in (see mock_llm_server.py).
+# OpenAI and Groq clients read OPENAI_BASE_URL / GROQ_BASE_URL themselves.
+DEEPSEEK_BASE_URL = os.environ.get("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 
 class Llm(ABC):
@@ -17,17 +25,49 @@ class Llm(ABC):
     parameters:
         instructions: context given to model in the beginning
 
+    attributes:
+        role: debate role the model plays (set by card.Card), used to label call metrics
+
     methods:
-        init() -> None: call before use
+        init() -> None: fetch the provider's shared client (done on first get_response)
+        follow(view) -> None: take context from a shared transcript instead of add_context calls
         clear_context() -> None: wipe chat history
         get_response() -> str: send a message and receive a response, added to chat history (context)
+            pass on_delta=callback(text) to stream the response chunk by chunk
     """
 
     def __init__(self, instructions):
+        # SDK clients are shared per provider and key (src.clients), and only
+        # looked up when the model first speaks, so building a deck is cheap
         self.client = None
+        self._initialised = False
 
         # initial context given to models
         self.instructions = instructions
+        self.role = ""
+
+        # cursor into a shared transcript, see follow()
+        self._view = None
+
+    def follow(self, view):
+        """
+        Read the conversation from a src.transcript.TranscriptView. Entries
+        added since this model last spoke are passed to add_context when it
+        next speaks, so a debate keeps one transcript rather than a copy per model.
+        """
+        self._view = view
+
+    def _ready(self):
+        if not self._initialised:
+            self.init()
+            self._initialised = True
+        if self._view is not None:
+            for entry in self._view.new_entries():
+                self._add_entry(entry)
+
+    def _add_entry(self, entry):
+        """Add a transcript entry to the context (chat-completion models share entry.user_message())."""
+        self.add_context(entry.text)
 
     @abstractmethod
     def clear_context(self):
@@ -41,7 +81,76 @@ class Llm(ABC):
     def init(self): ...
 
     @abstractmethod
-    def get_response(self, prompt): ...
+    def get_response(self, prompt, on_delta=None): ...
+
+
+def _api_key(name):
+    """API key from the environment (a placeholder is fine when replaying a cassette)."""
+    if replaying():
+        return os.environ.get(name, "replay")
+    return os.environ[name]
+
+
+def _recorded(provider, model, messages, fn, on_delta, role=""):
+    """
+    Run fn(on_delta) through the record/replay cassette, if one is active.
+    Each attempt waits on the provider's shared rate limiter first (not when
+    replaying); transient failures are retried behind the provider's circuit
+    breaker (see src.resilience) and the last error is raised.
+    Latency, time to first token, usage and errors are recorded in src.metrics.
+    """
+    cassette = get_cassette()
+
+    with CallTracker(provider, model, role, on_delta) as call:
+        def attempt():
+            used = call.prompt_tokens + call.completion_tokens
+            slot = Reservation(None, 0) if replaying() else rate_limit.acquire(provider, messages)
+            with slot:
+                if cassette is None:
+                    text = fn(call.on_delta)
+                else:
+                    text = cassette.call("llms", model, messages, fn, call.on_delta)
+                if not text:
+                    raise EmptyResponse(provider)
+            slot.settle(call.prompt_tokens + call.completion_tokens - used)
+            return text
+
+        return call_with_retries(provider, attempt, lambda: call.first_token_at is not None)
+
+
+def _record_usage(response):
+    usage = getattr(response, "usage", None)
+    if usage:
+        record_usage(usage.prompt_tokens, usage.completion_tokens)
+
+
+def _chat_completion(client, on_delta, provider="openai", role="", **params):
+    """
+    Run an OpenAI-style chat completion and return the response text.
+    If on_delta is given, the response is streamed and on_delta(text) is called per chunk.
+    """
+    def create(on_delta):
+        if on_delta is None:
+            response = client.chat.completions.create(**params)
+            _record_usage(response)
+            return response.choices[0].message.content
+
+        parts = []
+        stream = client.chat.completions.create(stream=True, **params)
+        try:
+            for chunk in stream:
+                # some providers put usage on the last chunk
+                _record_usage(chunk)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_delta(delta)
+        except StopGeneration:
+            # the caller has what it needs (e.g. the facilitator's verdict)
+            stream.close()
+        return "".join(parts)
+
+    return _recorded(provider, params["model"], params["messages"], create, on_delta, role)
 
 
 class Gpt41(Llm):
@@ -49,107 +158,97 @@ class Gpt41(Llm):
         super().__init__(instructions)
 
         self._instructions = instructions
-        self._messages = []
-
-        self.init()
+        # the provider message list, extended as context arrives instead of rebuilt per call
+        self._messages = [{"role": "developer", "content": instructions}] if instructions else []
 
     def add_context(self, msg):
-        self._messages.append(msg)
+        self._messages.append({"role": "user", "content": msg})
+
+    def _add_entry(self, entry):
+        self._messages.append(entry.user_message())
 
     def clear_context(self):
-        self._messages.clear()
+        del self._messages[1 if self._instructions else 0:]
 
     def _construct_context(self):
-        context = (
-            [{"role": "developer", "content": self._instructions}]
-            if self._instructions
-            else []
-        )
-        context += [{"role": "user", "content": m} for m in self._messages]
-        return context
+        return self._messages
 
     def init(self):
-        self.client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+        self.client = get_openai_client(_api_key("OPENAI_API_KEY"))
 
-    def get_response(self, prompt):
-        self._messages.append(prompt)
+    def get_response(self, prompt, on_delta=None):
+        self._ready()
+        self.add_context(prompt)
 
-        response = self.client.chat.completions.create(
+        return _chat_completion(
+            self.client,
+            on_delta,
+            role=self.role,
             model="gpt-4.1",
             messages=self._construct_context(),
         )
-        return response.choices[0].message.content
 
 
 class GroqModel(Llm, ABC):
     def __init__(self, model, instructions):
         super().__init__(instructions)
 
-        self._messages = []
         self._instructions = instructions
+        # the provider message list, extended as context arrives instead of rebuilt per call
+        self._messages = [{"role": "system", "content": instructions}] if instructions else []
         self.groq_model = model
 
-        self.init()
-
     def init(self):
-        self.client = Groq(api_key=os.environ["GROQ_API_KEY"])
+        self.client = get_groq_client(_api_key("GROQ_API_KEY"))
 
     def add_context(self, msg):
-        self._messages.append(msg)
+        self._messages.append({"role": "user", "content": msg})
+
+    def _add_entry(self, entry):
+        self._messages.append(entry.user_message())
 
     def clear_context(self):
-        self._messages.clear()
+        del self._messages[1 if self._instructions else 0:]
 
     def _construct_context(self):
-        context = (
-            [{"role": "system", "content": self._instructions}]
-            if self._instructions
-            else []
-        )
-        context += [{"role": "user", "content": m} for m in self._messages]
-        return context
+        return self._messages
 
-    def get_response(self, prompt):
-        self._messages.append(prompt)
+    def get_response(self, prompt, on_delta=None):
+        self._ready()
+        self.add_context(prompt)
 
-        chat_completion = self.client.chat.completions.create(
+        content = _chat_completion(
+            self.client,
+            on_delta,
+            role=self.role,
+            provider="groq",
             messages=self._construct_context(),
             model=self.groq_model,
         )
 
         # remove the thinking shit
-        return re.sub(
-            r"<think>[\s\S]*?</think>", "", chat_completion.choices[0].message.content
-        )
+        return re.sub(r"<think>[\s\S]*?</think>", "", content)
 
 
 class KimiK2(GroqModel):
     def __init__(self, instructions=""):
         super().__init__("moonshotai/kimi-k2-instruct-0905", instructions)
 
-        self.init()
-
 
 class GptOss(GroqModel):
     def __init__(self, instructions=""):
         super().__init__("openai/gpt-oss-120b", instructions)
 
-        self.init()
-
 
 class Qwen3(GroqModel):
     def __init__(self, instructions=""):
         super().__init__("qwen/qwen3-32b", instructions)
 
-        self.init()
-
 
 class Llama33(GroqModel):
     def __init__(self, instructions=""):
         super().__init__("llama-3.3-70b-versatile", instructions)
 
-        self.init()
-
 
 class Gemini3Flash(Llm):
     def __init__(self, instructions=""):
@@ -158,29 +257,55 @@ class Gemini3Flash(Llm):
         self.chat = None
 
         self._added_context = []
-
-        self.init()
+        # what was said in this chat, so cassettes can key on it
+        self._history = []
 
     def clear_context(self):
-        self.chat = self.client.chats.create(model="gemini-3-flash-preview")
+        # a new chat is started on the next get_response
+        self.chat = None
+        self._history = []
 
     def add_context(self, msg):
         self._added_context.append(msg)
 
     def init(self):
-        self.client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
-
-        # creates a new chat object, prevents duplication of code even
-        # if it's semantically weird
-        self.clear_context()
-
-    def get_response(self, prompt):
-        response = self.chat.send_message(
-            "\n".join(self._added_context) + "\n" + prompt
-        )
+        self.client = get_gemini_client(_api_key("GEMINI_API_KEY"))
+
+    def get_response(self, prompt, on_delta=None):
+        self._ready()
+        if self.chat is None:
+            self.chat = self.client.chats.create(model="gemini-3-flash-preview")
+        message = "\n".join(self._added_context) + "\n" + prompt
+
+        def send(on_delta):
+            if on_delta is None:
+                response = self.chat.send_message(message)
+                usage = response.usage_metadata
+                if usage:
+                    record_usage(usage.prompt_token_count, usage.candidates_token_count)
+                return response.text
+
+            parts = []
+            stopped = False
+            for chunk in self.chat.send_message_stream(message):
+                if chunk.text:
+                    parts.append(chunk.text)
+                    if stopped:
+                        continue
+                    try:
+                        on_delta(chunk.text)
+                    except StopGeneration:
+                        # the chat only records the turn once the stream is
+                        # read to the end, so keep reading but stop forwarding
+                        stopped = True
+            return "".join(parts)
+
+        turn = {"role": "user", "content": message}
+        text = _recorded("gemini", "gemini-3-flash-preview", self._history + [turn], send, on_delta, self.role)
+        self._history += [turn, {"role": "model", "content": text}]
         self._added_context.clear()
 
-        return response.text
+        return text
 
 
 # DeepSeek subclass
@@ -189,63 +314,59 @@ class DeepSeek(Llm):
         super().__init__(instructions)
 
         self._instructions = instructions
-        self._messages = []
-        self.client = None
-
-        self.init()
+        # user and assistant turns after the system message, extended in place
+        self._messages = [{"role": "system", "content": instructions}] if instructions else []
 
     def clear_context(self):
-        self._messages.clear()
+        del self._messages[1 if self._instructions else 0:]
 
     def init(self):
         # Option 1: Using OpenAI SDK (recommended if it works)
         try:
-            self.client = OpenAI(
-                api_key=os.environ["DEEPSEEK_API_KEY"],
-                base_url="https://api.deepseek.com",
-            )
+            self.client = get_openai_client(_api_key("DEEPSEEK_API_KEY"), base_url=DEEPSEEK_BASE_URL)
         except:
             # If OpenAI SDK doesn't work with base_url, we'll use requests
             self.client = None
 
     def _construct_context(self):
-        """Build the messages array in proper format"""
-        messages = []
-        if self._instructions:
-            messages.append({"role": "system", "content": self._instructions})
+        """The messages array in proper format (system, then user and assistant turns)"""
+        return self._messages
 
-        # Add conversation history
-        # Note: We need to track both user and assistant messages
-        for msg in self._messages:
-            messages.append(msg)
-
-        return messages
-
-    def get_response(self, prompt):
+    def get_response(self, prompt, on_delta=None):
+        self._ready()
         # Add user message to history
         self._messages.append({"role": "user", "content": prompt})
 
         # Try using OpenAI SDK first
         if self.client is not None:
             try:
-                response = self.client.chat.completions.create(
+                ai_response = _chat_completion(
+                    self.client,
+                    on_delta,
+                    role=self.role,
+                    provider="deepseek",
                     model="deepseek-chat",
                     messages=self._construct_context(),
-                    stream=False,
                 )
-                ai_response = response.choices[0].message.content
                 self._messages.append({"role": "assistant", "content": ai_response})
                 return ai_response
+            except (CassetteMiss, CircuitOpen):
+                raise
             except Exception as e:
+                # Only this call falls back - the SDK client is kept for the next one
                 print(f"OpenAI SDK failed, falling back to requests: {e}")
-                self.client = None
 
-        # Fallback to requests
-        return self._get_response_requests(prompt)
+        # Fallback to requests, through the same cassette, rate limiter, breaker and metrics
+        messages = self._construct_context()
+        ai_response = _recorded("deepseek", "deepseek-chat", messages, self._post_chat, on_delta, self.role)
+        self._messages.append({"role": "assistant", "content": ai_response})
+        return ai_response
+
+    def _post_chat(self, on_delta):
+        """Direct requests implementation (not streamed - the whole reply arrives as one chunk)"""
+        import requests
 
-    def _get_response_requests(self, prompt):
-        """Direct requests implementation"""
-        URL = "https://api.deepseek.com/chat/completions"
+        URL = f"{DEEPSEEK_BASE_URL}/chat/completions"
         API_KEY = os.environ["DEEPSEEK_API_KEY"]
 
         headers = {
@@ -259,22 +380,29 @@ class DeepSeek(Llm):
             "stream": False,
         }
 
-        try:
-            response = requests.post(URL, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            result = response.json()
+        response = requests.post(URL, headers=headers, json=data, timeout=30)
+        response.raise_for_status()
+        result = response.json()
 
+        try:
             ai_response = result["choices"][0]["message"]["content"]
-            self._messages.append({"role": "assistant", "content": ai_response})
+        except (KeyError, IndexError, TypeError) as e:
+            raise ValueError(f"Unexpected API response format: {e}") from e
+        usage = result.get("usage") or {}
+        record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
 
-            return ai_response
+        if on_delta is not None:
+            try:
+                on_delta(ai_response)
+            except StopGeneration:
+                pass
+        return ai_response
 
-        except requests.exceptions.RequestException as e:
-            return f"Error: {e}"
-        except KeyError as e:
-            return f"Unexpected API response format: {e}"
     def add_context(self, msg):
-        return super().add_context(msg)
+        self._messages.append({"role": "user", "content": msg})
+
+    def _add_entry(self, entry):
+        self._messages.append(entry.user_message())
 
 
 # Implementing OpenRouter subclass
@@ -296,6 +424,12 @@ OPENROUTER_MODELS = {
     ],
 }
 
+# Sent with every OpenRouter request (the client itself is shared with other OpenAI-compatible APIs)
+OPENROUTER_HEADERS = {
+    "HTTP-Referer": "http://localhost",
+    "X-Title": "AI Deck Builder",
+}
+
 import random
 
 
@@ -313,45 +447,40 @@ class OpenRouter(Llm):
             self.model = random.choice(OPENROUTER_MODELS[provider])
 
         self._instructions = instructions
-        self._messages = []
-
-        self.init()
+        # user and assistant turns after the system message, extended in place
+        self._messages = [{"role": "system", "content": instructions}] if instructions else []
 
     def init(self):
-        self.client = OpenAI(
-            api_key=os.environ["OPENROUTER_API_KEY"],
-            base_url="https://openrouter.ai/api/v1",
-            default_headers={
-                "HTTP-Referer": "http://localhost",
-                "X-Title": "AI Deck Builder",
-            },
-        )
+        self.client = get_openai_client(_api_key("OPENROUTER_API_KEY"), base_url=OPENROUTER_BASE_URL)
 
     def clear_context(self):
-        self._messages.clear()
+        del self._messages[1 if self._instructions else 0:]
 
     def _construct_context(self):
-        messages = []
-        if self._instructions:
-            messages.append({"role": "system", "content": self._instructions})
-        messages.extend(self._messages)
-        return messages
+        return self._messages
 
-    def get_response(self, prompt):
+    def get_response(self, prompt, on_delta=None):
+        self._ready()
         self._messages.append({"role": "user", "content": prompt})
 
-        response = self.client.chat.completions.create(
+        ai_response = _chat_completion(
+            self.client,
+            on_delta,
+            role=self.role,
+            provider="openrouter",
             model=self.model,
             messages=self._construct_context(),
+            extra_headers=OPENROUTER_HEADERS,
         )
-
-        ai_response = response.choices[0].message.content
         self._messages.append({"role": "assistant", "content": ai_response})
 
         return ai_response
 
     def add_context(self, msg):
-        return super().add_context(msg)
+        self._messages.append({"role": "user", "content": msg})
+
+    def _add_entry(self, entry):
+        self._messages.append(entry.user_message())
 
 
 # for testing
@@ -0,0 +1,112 @@
+'''
+Append-only debate message log.
+Every entry gets a sequence number (1, 2, 3, ...) so readers can resume from
+the last entry they saw, and readers can block until something new arrives.
+'''
+
+import time
+from threading import Condition
+
+
+class MessageLog:
+    """
+    Sequence-numbered, append-only list of debate messages.
+
+    methods:
+        append(entry) -> int: add a message dict, returns its sequence number
+        since(after, limit) -> list: entries with seq > after (oldest first)
+        wait(after, timeout) -> list: like since(), but blocks up to timeout
+            seconds for a new entry (or a notify()) if there is none yet
+        notify() -> None: wake waiting readers without adding an entry
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._cond = Condition()
+        self._version = 0
+
+    def append(self, entry):
+        with self._cond:
+            seq = len(self._entries) + 1
+            self._entries.append(dict(entry, seq=seq))
+            self._version += 1
+            self._cond.notify_all()
+        return seq
+
+    @property
+    def last_seq(self):
+        return len(self._entries)
+
+    def since(self, after=0, limit=None):
+        # seq n lives at index n - 1
+        start = max(after, 0)
+        end = None if limit is None else start + limit
+        with self._cond:
+            return self._entries[start:end]
+
+    def wait(self, after=0, timeout=None, limit=None):
+        with self._cond:
+            version = self._version
+            if len(self._entries) <= after:
+                self._cond.wait_for(lambda: self._version != version, timeout)
+        return self.since(after, limit)
+
+    def notify(self):
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class StoredMessageLog:
+    """
+    MessageLog kept in a shared state store (see state_store.py), so every
+    worker process reads and appends to the same debate log.
+
+    StoredMessageLog(store, key, poll_interval)
+
+    Same methods as MessageLog. Readers waiting in wait() are woken at once by
+    appends from this process, and see other workers' appends within
+    poll_interval seconds.
+    """
+
+    def __init__(self, store, key, poll_interval=0.2):
+        self._store = store
+        self._key = key
+        self._poll_interval = poll_interval
+        self._cond = Condition()
+
+    def append(self, entry):
+        seq = self._store.log_append(self._key, entry)
+        with self._cond:
+            self._cond.notify_all()
+        return seq
+
+    @property
+    def last_seq(self):
+        return self._store.log_length(self._key)
+
+    def since(self, after=0, limit=None):
+        return self._store.log_range(self._key, max(after, 0), limit)
+
+    def wait(self, after=0, timeout=None, limit=None):
+        version = self._store.log_version(self._key)
+        if self._store.log_length(self._key) <= after:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._store.log_version(self._key) == version:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                with self._cond:
+                    self._cond.wait(self._poll_interval if remaining is None else min(self._poll_interval, remaining))
+        return self.since(after, limit)
+
+    def notify(self):
+        self._store.log_notify(self._key)
+        with self._cond:
+            self._cond.notify_all()
+
+    def __len__(self):
+        return self._store.log_length(self._key)
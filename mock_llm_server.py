@@ -0,0 +1,300 @@
+'''
+Local stand-in for an OpenAI-compatible chat-completions API.
+Point the provider base URLs at it to load-test the Flask apps and the debate
+engines without network access or spending tokens:
+
+    python mock_llm_server.py --port 8100 --ttft lognormal:0.5,0.4 --tokens-per-second 60
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 GROQ_BASE_URL=http://127.0.0.1:8100/v1 \
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8100/v1 OPENROUTER_BASE_URL=http://127.0.0.1:8100/v1 \
+    python app_sam.py
+
+Gemini does not speak this protocol - use OpenAI/Groq cards when load testing.
+Only the standard library is used.
+'''
+
+import re
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = (
+    "the clue points to a simpler reading so let us check each constraint in order "
+    "before we commit to an answer and make sure nothing contradicts the state so far"
+).split()
+
+MORE_DISCUSSION = "We need more discussion"
+ANSWER = "That is the answer."
+# Every engine asks for a turn with this (the json verdict mode appends to it)
+TURN_PROMPT = "It is now your turn to speak."
+
+_ROLE_RE = re.compile(r"your role is (\w+)", re.IGNORECASE)
+
+
+def parse_distribution(spec):
+    """
+    Build a sampler (seconds) from "fixed:S", "uniform:LO,HI", "normal:MEAN,STD"
+    or "lognormal:MEDIAN,SIGMA". Samples are never negative.
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",")] if args else []
+
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(rng.gauss(values[0], values[1]), 0.0)
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockConfig:
+    """
+    Behaviour of the stand-in server.
+
+    parameters:
+        ttft: sampler for time to first token, from parse_distribution
+        tokens_per_second: streaming rate (also used to delay non-streamed replies)
+        reply_tokens: length of a participant reply, in words
+        error_rate / rate_limit_rate: fraction of requests answered with a 500 / 429
+        retry_after: Retry-After seconds sent with a 429
+        answer_after: the facilitator says "That is the answer." on its Nth
+            turn and "We need more discussion" before that
+    """
+
+    def __init__(self, ttft=None, tokens_per_second=50.0, reply_tokens=80,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1.0, answer_after=2, seed=None):
+        self.ttft = ttft or parse_distribution("fixed:0.3")
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.answer_after = answer_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "rate_limited": 0, "completion_tokens": 0}
+
+    def roll(self):
+        """(ttft, failure) for one request: failure is None, 429 or 500."""
+        with self.lock:
+            ttft = self.ttft(self.rng)
+            r = self.rng.random()
+        if r < self.rate_limit_rate:
+            return ttft, 429
+        if r < self.rate_limit_rate + self.error_rate:
+            return ttft, 500
+        return ttft, None
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+
+def _text(content):
+    """Message content as text (content may be a list of parts)."""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def scripted_reply(messages, config):
+    """The reply a debate participant would give, based on the role in its system prompt."""
+    system = " ".join(_text(m.get("content")) for m in messages if m.get("role") in ("system", "developer"))
+    match = _ROLE_RE.search(system)
+    role = match.group(1).lower() if match else "assistant"
+
+    words = [FILLER[i % len(FILLER)] for i in range(max(config.reply_tokens - 6, 1))]
+    body = f"I am the {role}. " + " ".join(words) + "."
+    if role != "facilitator":
+        return body
+
+    # Count the facilitator's earlier turns to know which turn this is: by its
+    # earlier verdicts, or by the turn prompts it was given when the client
+    # keeps those but not its own replies (llms)
+    history = " ".join(_text(m.get("content")) for m in messages if m.get("role") not in ("system", "developer"))
+    turn = max(history.count(MORE_DISCUSSION), history.count(TURN_PROMPT) - 1) + 1
+    done = turn >= config.answer_after
+    reply = f"{body} {ANSWER if done else MORE_DISCUSSION}"
+    if '"verdict"' in _text(messages[-1].get("content")) if messages else False:
+        # Structured verdict requested (debate_tools verdict_mode="json")
+        reply += '\n{"verdict": "%s"}' % ("answer" if done else "continue")
+    return reply
+
+
+def _tokens(text):
+    """Split text into word-sized stream chunks (spaces kept)."""
+    return re.findall(r"\S+\s*", text)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = MockConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            return self._json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        if self.path.startswith("/stats"):
+            with self.config.lock:
+                return self._json(200, dict(self.config.stats))
+        if self.path.startswith("/health"):
+            return self._json(200, {"status": "ok"})
+        self._json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "Not found"}})
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+
+        config = self.config
+        config.count("requests")
+        ttft, failure = config.roll()
+
+        if failure == 429:
+            config.count("rate_limited")
+            return self._json(
+                429,
+                {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                {"Retry-After": f"{config.retry_after:g}"},
+            )
+        if failure == 500:
+            config.count("errors")
+            time.sleep(ttft)
+            return self._json(500, {"error": {"message": "Internal server error (mock)", "type": "server_error"}})
+
+        messages = request.get("messages", [])
+        model = request.get("model", "mock")
+        reply = scripted_reply(messages, config)
+        tokens = _tokens(reply)
+        prompt_tokens = sum(len(_text(m.get("content"))) for m in messages) // 4 + 1
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        config.count("completion_tokens", len(tokens))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        per_token = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        time.sleep(ttft)
+        if not request.get("stream"):
+            time.sleep(per_token * max(len(tokens) - 1, 0))
+            return self._json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        config.count("streamed")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta, finish_reason=None, extra=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            payload.update(extra or {})
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(per_token)
+                chunk({"content": token})
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            chunk({}, "stop", {"usage": usage} if include_usage else None)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            pass
+
+
+def make_server(host="127.0.0.1", port=8100, config=None):
+    """Build (but don't start) a stand-in server; port 0 picks a free port."""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft", default="fixed:0.3",
+                        help="time to first token: fixed:S, uniform:LO,HI, normal:MEAN,STD or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--reply-tokens", type=int, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--answer-after", type=int, default=2,
+                        help="facilitator turn on which it says 'That is the answer.'")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        ttft=parse_distribution(args.ttft),
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        answer_after=args.answer_after,
+        seed=args.seed,
+    )
+    server = make_server(args.host, args.port, config)
+    print(f"Mock LLM server on http://{args.host}:{server.server_port}/v1 (stats at /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,110 @@
 import random
-import time
+
+from card import Card
+from message_log import MessageLog
+from sessions import Stored
+from src.metrics import DebateTracker
+from src.transcript import Transcript
+from src.verdict import ANSWER, VerdictDetector, record_verdict
 
 
 class GameState:
+    # {"model", "expertise", "personality", "role"} specs; Card objects are built per debate
+    cards = Stored()
+    puzzle = Stored()
+    # last message handed out by the one-at-a-time /api/sync
+    sync_cursor = Stored(0)
+    debating = Stored(False)
+
     def __init__(self):
         self.cards = []
         self.puzzle = None
 
-        # [(Card, message)]
-        self.debate_history = []
+        # {"role", "model", "message", "seq"} entries, read by cursor
+        self.debate_history = MessageLog()
+        self.sync_cursor = 0
 
         self.debating = False
+        # Card objects (with their LLM clients) for the debate in progress
+        self.players = []
+        # what has been said in the debate in progress; each card's client
+        # reads it through its own cursor (see llms.Llm.follow)
+        self.transcript = Transcript()
+        self._views = {}
 
     def start_debate(self):
         self.debating = True
-
-        for card in self.cards:
+        try:
+            self._run_debate()
+        finally:
+            self.debating = False
+
+    def _run_debate(self):
+        self.players = [Card(spec["model"], spec["expertise"], spec["personality"], spec["role"]) for spec in self.cards]
+        for card in self.players:
            print(f"{card.role}, {card.model}, {card.personality}, {card.expertise}")
 
         index = -1
-        for i, card in enumerate(self.cards):
+        for i, card in enumerate(self.players):
             if card.role == "facilitator":
                 index = i
                 break
-        facilitator = self.cards.pop(index)
-
-        for card in self.cards:
-            card.client.add_context("The puzzle is: " + self.puzzle)
-
-        # set a limit of 10 round robins
-        for i in range(4):
-            random.shuffle(self.cards)
-            for card in self.cards:
-                print("requesting " + card.model)
-
+        facilitator = self.players.pop(index)
+
+        self.transcript = Transcript()
+        self._views = {}
+        for card in self.players + [facilitator]:
+            self._views[card] = self.transcript.view()
+            card.client.follow(self._views[card])
+
+        puzzle = self.puzzle
+        for card in self.players:
+            card.client.add_context("The puzzle is: " + puzzle)
+
+        tracker = DebateTracker("reasoning")
+        outcome = "error"
+
+        try:
+            # set a limit of 10 round robins
+            for i in range(4):
+                tracker.round()
+                random.shuffle(self.players)
+                for card in self.players:
+                    print("requesting " + card.model)
+
+                    try:
+                        response = card.client.get_response("It is now your turn to speak.")
+                    except Exception as e:
+                       print("something went wrong" + str(e))
+                    else:
+                        self._share_context(response, card)
+
+                    print(card.model + " responded")
+
+                # stop the facilitator's reply as soon as its verdict is clear
+                detector = VerdictDetector()
                 try:
-                    response = card.client.get_response("It is now your turn to speak.")
+                    response = facilitator.client.get_response("It is now your turn to speak.", on_delta=detector.watch())
                 except Exception as e:
-                   print("something went wrong" + str(e))
+                    print("something went wrong " + str(e))
                 else:
-                    self._share_context(response, card)
-                    facilitator.client.add_context(response)
-
-                time.sleep(0.5)
-
-                print(card.model + " responded")
-
-            try:
-                response = facilitator.client.get_response("It is now your turn to speak.")
-            except Exception as e:
-                print("something went wrong " + str(e))
+                    verdict, response = detector.finish(response)
+                    record_verdict(detector, verdict)
+                    self._share_context(response, facilitator)
+
+                    if verdict == ANSWER:
+                        print("done, breaking")
+                        outcome = "answer"
+                        break
             else:
-                self._share_context(response, facilitator)
-
-                if "that is the answer" in response.lower():
-                    print("done, breaking")
-                    break
-
-            time.sleep(0.5)
-
-        self.debating = False
+                outcome = "max_rounds"
+        finally:
+            tracker.finish(outcome, 4)
 
     def _share_context(self, msg: str, card):
-        for other_card in self.cards:
-            if card is not other_card:
-                other_card.client.add_context(msg)
+        self.transcript.append(card.role, card.model, msg)
+        # a card is not told what it said itself: it has read everything up
+        # to its own turn, so step its cursor past its reply
+        self._views[card].new_entries()
 
-        self.debate_history.append((card, msg))
\ No newline at end of file
+        self.debate_history.append({"role": card.role, "model": card.model, "message": msg})
\ No newline at end of file
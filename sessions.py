@@ -0,0 +1,172 @@
+'''
+Session registry shared by app.py and app_sam.py.
+Each debate lives in its own session object, looked up by debate id, so one
+user's debate no longer blocks everyone else's. Session fields declared with
+Stored() and the message log live in a state store (see state_store.py), so
+with a shared store any worker process can serve any debate.
+'''
+
+import os
+import time
+import uuid
+from threading import Lock
+
+from state_store import open_store
+
+# Sessions untouched for this long (and not debating) are dropped
+SESSION_IDLE_TIMEOUT = float(os.environ.get("SESSION_IDLE_TIMEOUT", "1800"))
+
+
+class Stored:
+    """
+    A session attribute kept in the registry's state store, so every worker
+    sees the same value. Values must be JSON-serialisable and are replaced,
+    not changed in place (`session.cards = cards`, not `.append`). Until the
+    session is registered the value lives on the object itself.
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, session, owner=None):
+        if session is None:
+            return self
+        store = session.__dict__.get("_store")
+        if store is None:
+            return session.__dict__.get(self.name, self.default)
+        return store.get(session.debate_id, self.name, self.default)
+
+    def __set__(self, session, value):
+        store = session.__dict__.get("_store")
+        if store is None:
+            session.__dict__[self.name] = value
+        else:
+            store.set(session.debate_id, self.name, value)
+
+
+def stored_fields(cls):
+    """Names of the Stored attributes of a session class."""
+    return [name for klass in cls.__mro__ for name, attr in vars(klass).items() if isinstance(attr, Stored)]
+
+
+class SessionRegistry:
+    """
+    Thread-safe map of debate id -> session object.
+
+    SessionRegistry(factory, idle_timeout=SESSION_IDLE_TIMEOUT, namespace="sessions", store=None)
+
+    parameters:
+        factory: called with no arguments to build a new session object
+        idle_timeout: seconds of inactivity before a session may be evicted
+        namespace: keeps this registry's sessions apart in a shared store
+        store: state store (default: open_store(STATE_BACKEND, namespace))
+
+    Session objects get `debate_id` and `debate_history` attributes; the
+    store also records when each was last active. A session whose `debating`
+    field is true is never evicted. Sessions created by another worker are
+    rebuilt from the store on first use, and each process hands out one
+    object per debate.
+    """
+
+    def __init__(self, factory, idle_timeout=SESSION_IDLE_TIMEOUT, namespace="sessions", store=None):
+        self._factory = factory
+        self._idle_timeout = idle_timeout
+        self._store = store if store is not None else open_store(namespace=namespace)
+        self._sessions = {}
+        self._lock = Lock()
+        # time.monotonic() of the last evict_idle sweep
+        self._last_eviction = None
+
+    def _bind(self, session, debate_id):
+        session.debate_id = debate_id
+        session._store = self._store
+        session.debate_history = self._store.message_log(debate_id)
+        self._sessions[debate_id] = session
+        return session
+
+    def _session(self, debate_id):
+        """This process's object for a debate known to the store."""
+        with self._lock:
+            session = self._sessions.get(debate_id)
+            if session is None:
+                # Created by another worker: the store's values win over the defaults
+                session = self._factory()
+                for name in stored_fields(type(session)):
+                    session.__dict__.pop(name, None)
+                self._bind(session, debate_id)
+        return session
+
+    def create(self):
+        # A sweep reads every session in the store, so new sessions trigger
+        # one at most ten times per idle timeout
+        last = self._last_eviction
+        if last is None or time.monotonic() - last >= self._idle_timeout / 10:
+            self.evict_idle()
+
+        session = self._factory()
+        debate_id = uuid.uuid4().hex
+        fields = {name: session.__dict__.pop(name) for name in stored_fields(type(session)) if name in session.__dict__}
+        fields["last_active"] = time.time()
+        self._store.create(debate_id, fields)
+
+        with self._lock:
+            return self._bind(session, debate_id)
+
+    def get(self, debate_id):
+        """Return the session for debate_id (marking it active), or None."""
+        session = self.peek(debate_id)
+        if session is not None:
+            self._store.set(debate_id, "last_active", time.time())
+        return session
+
+    def peek(self, debate_id):
+        """Like get, but without marking the session active (e.g. for a watcher)."""
+        if not debate_id or not self._store.exists(debate_id):
+            with self._lock:
+                self._sessions.pop(debate_id, None)
+            return None
+        return self._session(debate_id)
+
+    def claim(self, debate_id, name="debating"):
+        """
+        Atomically flip the session's `name` field from False to True.
+        Returns False if it was already true (another request got there first).
+        """
+        return self._store.compare_and_set(debate_id, name, False, True)
+
+    def remove(self, debate_id):
+        self._store.delete(debate_id)
+        with self._lock:
+            return self._sessions.pop(debate_id, None)
+
+    def active(self):
+        """Sessions that currently have a debate running."""
+        return [
+            self._session(debate_id)
+            for debate_id in self._store.ids()
+            if self._store.get(debate_id, "debating", False)
+        ]
+
+    def evict_idle(self):
+        """Drop idle sessions and return how many were evicted."""
+        self._last_eviction = time.monotonic()
+        cutoff = time.time() - self._idle_timeout
+        idle = []
+        for debate_id in self._store.ids():
+            fields = self._store.fields(debate_id)
+            if fields.get("last_active", 0) < cutoff and not fields.get("debating", False):
+                self._store.delete(debate_id)
+                idle.append(debate_id)
+
+        with self._lock:
+            # Also forget debates other workers evicted or reset
+            for debate_id in list(self._sessions):
+                if debate_id in idle or not self._store.exists(debate_id):
+                    del self._sessions[debate_id]
+        return len(idle)
+
+    def __len__(self):
+        return len(self._store.ids())
@@ -0,0 +1,287 @@
+"""
+Record/Replay Cassettes
+Captures every provider request/response made by call_llm and the llms.Llm
+classes (with timing) into a JSON-lines cassette file, and serves them back
+later so whole debates can be re-run offline - no keys, no network.
+
+Enable with environment variables:
+    LLM_CASSETTE=debate.jsonl       cassette file
+    LLM_CASSETTE_MODE=record        "record" or "replay"
+    LLM_CASSETTE_LATENCY=recorded   replay timing: "recorded" (sleep like the
+                                    original call, chunk by chunk) or "none"
+or from code with use_cassette(path, mode).
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from src.response_cache import cache_key
+from src.verdict import StopGeneration
+
+
+CASSETTE_MODES = ("record", "replay")
+REPLAY_LATENCIES = ("recorded", "none")
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded response for a request."""
+
+
+class ReplayedError(RuntimeError):
+    """A recorded provider failure, raised again on replay (see resilience.classify)."""
+
+    def __init__(self, message: str, type_name: str = "", status_code: Optional[int] = None):
+        super().__init__(message)
+        self.type_name = type_name
+        self.status_code = status_code
+
+
+class Cassette:
+    """
+    One cassette file.
+
+    Cassette(path, mode="replay", latency="recorded")
+
+    Each line is one provider call (one attempt, when retried): {"key", "source",
+    "model", "messages", "response" | "error", "latency", "chunks": [[seconds
+    since start, text], ...]}. Errors are replayed as ReplayedError.
+    The first line is a header holding the seed that debates use to shuffle
+    turn order, so a replayed debate asks exactly the recorded questions.
+
+    methods:
+        call(source, model, messages, fn, on_delta) -> str: fn(on_delta) makes
+            the real call; recorded in record mode, never invoked in replay mode
+        acall(...): same for an async fn
+        rng() -> random.Random: turn-order RNG for the next debate
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency: str = "recorded"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if latency not in REPLAY_LATENCIES:
+            raise ValueError(f"Unknown cassette latency: {latency}")
+
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._debates = 0
+        # key -> recorded calls, served in order (the last one repeats)
+        self._tapes: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+
+        if mode == "record":
+            self.seed = random.randrange(2 ** 32)
+            self._file = open(path, "w", encoding="utf-8")
+            self._write({"cassette": 1, "seed": self.seed})
+        else:
+            self.seed = 0
+            self._file = None
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "cassette" in record:
+                    self.seed = record["seed"]
+                else:
+                    self._tapes.setdefault(record["key"], []).append(record)
+
+    def _write(self, record: Dict[str, Any]):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def rng(self) -> random.Random:
+        """A seeded RNG per debate: the nth debate gets the same one when replayed."""
+        with self._lock:
+            self._debates += 1
+            return random.Random(f"{self.seed}:{self._debates}")
+
+    # ---- recording ----------------------------------------------------------
+
+    def _start(self, on_delta: Optional[Callable[[str], Any]]):
+        start = time.perf_counter()
+        chunks = []
+
+        def tap(text: str):
+            chunks.append([round(time.perf_counter() - start, 4), text])
+            on_delta(text)
+
+        return start, chunks, (tap if on_delta else None)
+
+    def _record(self, source, model, messages, start, chunks, response=None, error=None):
+        if isinstance(error, BaseException):
+            status = getattr(error, "status_code", None)
+            error = {
+                "type": type(error).__name__,
+                "message": f"{type(error).__name__}: {error}",
+                "status": status if isinstance(status, int) else None,
+            }
+        record = {
+            "key": cache_key(source, model, messages),
+            "source": source,
+            "model": model,
+            "messages": messages,
+            "latency": round(time.perf_counter() - start, 4),
+            "chunks": chunks,
+        }
+        if error is not None:
+            record["error"] = error
+        else:
+            record["response"] = response
+        self._write(record)
+
+    # ---- replay -------------------------------------------------------------
+
+    def _next(self, source: str, model: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        key = cache_key(source, model, messages)
+        with self._lock:
+            tape = self._tapes.get(key)
+            if not tape:
+                raise CassetteMiss(f"No recorded {source} response for model {model} in {self.path}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = min(position + 1, len(tape) - 1)
+        return tape[position]
+
+    @staticmethod
+    def _schedule(record: Dict[str, Any]) -> List[tuple]:
+        """(seconds since start, chunk) pairs to deliver; a whole reply arrives at the end."""
+        chunks = record.get("chunks") or []
+        if not chunks and record.get("response"):
+            chunks = [[record["latency"], record["response"]]]
+        return [(at, text) for at, text in chunks]
+
+    @staticmethod
+    def _deliver(on_delta: Callable, text: str) -> bool:
+        """Replay one chunk; True if the caller stopped the stream (the recorded reply ends there too)."""
+        try:
+            on_delta(text)
+        except StopGeneration:
+            return True
+        return False
+
+    @staticmethod
+    def _result(record: Dict[str, Any]) -> str:
+        error = record.get("error")
+        if isinstance(error, dict):
+            raise ReplayedError(error["message"], error["type"], error["status"])
+        if error is not None:
+            raise ReplayedError(error)
+        return record["response"]
+
+    # ---- public -------------------------------------------------------------
+
+    def call(self, source: str, model: str, messages: List[Dict[str, str]],
+             fn: Callable[[Optional[Callable]], str], on_delta: Optional[Callable] = None) -> str:
+        if self.mode == "record":
+            start, chunks, tap = self._start(on_delta)
+            try:
+                response = fn(tap)
+            except Exception as e:
+                self._record(source, model, messages, start, chunks, error=e)
+                raise
+            self._record(source, model, messages, start, chunks, response=response)
+            return response
+
+        record = self._next(source, model, messages)
+        start = time.perf_counter()
+        for at, text in self._schedule(record):
+            if self.latency == "recorded":
+                time.sleep(max(at - (time.perf_counter() - start), 0))
+            if on_delta and self._deliver(on_delta, text):
+                break
+        if self.latency == "recorded":
+            time.sleep(max(record["latency"] - (time.perf_counter() - start), 0))
+        return self._result(record)
+
+    async def acall(self, source: str, model: str, messages: List[Dict[str, str]],
+                    fn: Callable[[Optional[Callable]], Any], on_delta: Optional[Callable] = None) -> str:
+        """Async version of call (fn returns an awaitable)."""
+        if self.mode == "record":
+            start, chunks, tap = self._start(on_delta)
+            try:
+                response = await fn(tap)
+            except Exception as e:
+                self._record(source, model, messages, start, chunks, error=e)
+                raise
+            self._record(source, model, messages, start, chunks, response=response)
+            return response
+
+        record = self._next(source, model, messages)
+        start = time.perf_counter()
+        for at, text in self._schedule(record):
+            if self.latency == "recorded":
+                await asyncio.sleep(max(at - (time.perf_counter() - start), 0))
+            if on_delta and self._deliver(on_delta, text):
+                break
+        if self.latency == "recorded":
+            await asyncio.sleep(max(record["latency"] - (time.perf_counter() - start), 0))
+        return self._result(record)
+
+    def close(self):
+        if self._file:
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+
+_cassette: Optional[Cassette] = None
+_cassette_loaded = False
+_cassette_lock = threading.Lock()
+
+
+def use_cassette(path: str, mode: str = "replay", latency: str = "recorded") -> Cassette:
+    """Make `path` the process-wide cassette (closing any previous one)."""
+    global _cassette, _cassette_loaded
+    cassette = Cassette(path, mode, latency)
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+        _cassette, _cassette_loaded = cassette, True
+    return cassette
+
+
+def eject_cassette():
+    """Stop recording/replaying; provider calls go to the network again."""
+    global _cassette, _cassette_loaded
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+        _cassette, _cassette_loaded = None, True
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The active cassette (from use_cassette or LLM_CASSETTE), or None."""
+    global _cassette, _cassette_loaded
+    if not _cassette_loaded:
+        with _cassette_lock:
+            if not _cassette_loaded:
+                path = os.environ.get("LLM_CASSETTE")
+                if path:
+                    _cassette = Cassette(
+                        path,
+                        os.environ.get("LLM_CASSETTE_MODE", "replay"),
+                        os.environ.get("LLM_CASSETTE_LATENCY", "recorded"),
+                    )
+                _cassette_loaded = True
+    return _cassette
+
+
+def replaying() -> bool:
+    cassette = get_cassette()
+    return cassette is not None and cassette.mode == "replay"
+
+
+def debate_rng():
+    """Turn-order RNG for a new debate: seeded from the cassette when one is active."""
+    cassette = get_cassette()
+    return cassette.rng() if cassette else random
@@ -0,0 +1,220 @@
+"""
+Shared LLM SDK Clients
+Process-wide registry of provider clients for the debate tools. Clients are
+created once per (provider, base_url, api key) and reused across turns, so
+every call after the first rides a warm keep-alive connection instead of
+paying client construction plus a fresh TCP+TLS handshake.
+
+Provider SDKs are imported on first use (import_sdk), so a process only pays
+the import time and memory of the providers its debates actually call.
+"""
+
+import os
+import atexit
+import asyncio
+import hashlib
+import importlib
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+# Provider -> SDK module, imported by import_sdk() when the provider is first used
+# (DeepSeek and OpenRouter go through the openai SDK)
+PROVIDER_SDKS = {
+    "openai": "openai",
+    "groq": "groq",
+    "gemini": "google.genai",
+}
+
+
+# Connection pool sizing (per client), overridable per deployment
+POOL_MAX_CONNECTIONS = int(os.environ.get("LLM_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.environ.get("LLM_POOL_MAX_KEEPALIVE", "10"))
+POOL_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_POOL_KEEPALIVE_EXPIRY", "60"))
+REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", "120"))
+
+_clients: Dict[Tuple[str, Optional[str], str], Any] = {}
+# Async clients are bound to the event loop they were created on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def import_sdk(provider: str):
+    """The SDK module for provider, importing it on first use."""
+    return importlib.import_module(PROVIDER_SDKS[provider])
+
+
+def _reset_after_fork():
+    """Drop clients inherited from the parent process (e.g. gunicorn --preload)."""
+    global _lock, _pid
+    # Don't close them: their sockets are shared with the parent
+    _clients.clear()
+    _async_clients.clear()
+    _lock = threading.Lock()
+    _pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _key(provider: str, base_url: Optional[str], api_key: str) -> Tuple[str, Optional[str], str]:
+    """Registry key - the API key is hashed so it never sits in the key itself."""
+    digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return (provider, base_url, digest)
+
+
+def _get_or_create(key: Tuple[str, Optional[str], str], factory: Callable[[], Any]) -> Any:
+    """Return the cached client for key, building it with factory on first use."""
+    if os.getpid() != _pid:
+        # Forked without register_at_fork support
+        _reset_after_fork()
+
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def _get_or_create_async(key: Tuple[str, Optional[str], str], factory: Callable[[], Any]) -> Any:
+    """Like _get_or_create, but scoped to the running event loop."""
+    if os.getpid() != _pid:
+        _reset_after_fork()
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            client = factory()
+            loop_clients[key] = client
+    return client
+
+
+def _limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _http_client():
+    """Build an httpx client with a bounded keep-alive connection pool."""
+    import httpx
+
+    return httpx.Client(limits=_limits(), timeout=REQUEST_TIMEOUT)
+
+
+def _async_http_client():
+    """Async counterpart of _http_client."""
+    import httpx
+
+    return httpx.AsyncClient(limits=_limits(), timeout=REQUEST_TIMEOUT)
+
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None):
+    """Shared OpenAI SDK client (also used for OpenAI-compatible APIs like Groq)."""
+    def factory():
+        # max_retries=0: retries are handled by src.resilience
+        return import_sdk("openai").OpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=_http_client())
+
+    return _get_or_create(_key("openai", base_url, api_key), factory)
+
+
+def get_groq_client(api_key: str, base_url: Optional[str] = None):
+    """Shared Groq SDK client (llms.GroqModel; the debate tools reach Groq through get_openai_client)."""
+    def factory():
+        return import_sdk("groq").Groq(api_key=api_key, base_url=base_url, max_retries=0, http_client=_http_client())
+
+    return _get_or_create(_key("groq", base_url, api_key), factory)
+
+
+def get_gemini_client(api_key: str):
+    """Shared Google GenAI client."""
+    def factory():
+        genai = import_sdk("gemini")
+        return genai.Client(
+            api_key=api_key,
+            http_options=genai.types.HttpOptions(httpx_client=_http_client()),
+        )
+
+    return _get_or_create(_key("gemini", None, api_key), factory)
+
+
+def get_async_openai_client(api_key: str, base_url: Optional[str] = None):
+    """Shared AsyncOpenAI client for the running event loop."""
+    def factory():
+        return import_sdk("openai").AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=_async_http_client())
+
+    return _get_or_create_async(_key("openai", base_url, api_key), factory)
+
+
+def get_async_gemini_client(api_key: str):
+    """Shared async Google GenAI client (the `.aio` facade) for the running event loop."""
+    def factory():
+        genai = import_sdk("gemini")
+        return genai.Client(
+            api_key=api_key,
+            http_options=genai.types.HttpOptions(httpx_async_client=_async_http_client()),
+        )
+
+    # Keep the owning Client cached: it closes its transport when collected
+    return _get_or_create_async(_key("gemini", None, api_key), factory).aio
+
+
+def close_clients():
+    """
+    Close every pooled client, sync and async, and empty the registry.
+    Registered with atexit, so a worker closes its keep-alive connections on
+    the way out. Async clients are closed on their own event loop; those on a
+    loop that is already closed (or is the caller's own) are just dropped.
+    """
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        by_loop = [(loop, list(loop_clients.values())) for loop, loop_clients in _async_clients.items()]
+        _async_clients.clear()
+
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    try:
+        current = asyncio.get_running_loop()
+    except RuntimeError:
+        current = None
+    for loop, loop_clients in by_loop:
+        if loop.is_closed() or loop is current:
+            continue
+        try:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(_aclose(loop_clients), loop).result(timeout=5)
+            else:
+                loop.run_until_complete(_aclose(loop_clients))
+        except Exception:
+            pass
+
+
+async def _aclose(clients):
+    for client in clients:
+        try:
+            # A genai.Client keeps its async transport on .aio
+            client = getattr(client, "aio", client)
+            close = getattr(client, "aclose", None) or client.close
+            await close()
+        except Exception:
+            pass
+
+
+atexit.register(close_clients)
@@ -0,0 +1,173 @@
+"""
+Token-Budgeted Context Window
+Keeps the last few turns of a debate verbatim and folds older turns into a
+running summary, so the "Conversation so far" block sent each turn stays
+within a per-model token budget instead of growing with every turn.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.transcript import Transcript, TranscriptEntry
+
+
+# History budgets (tokens) for models with small context windows / rate limits
+MODEL_HISTORY_BUDGETS = {
+    "qwen/qwen3-32b": 3000,
+    "llama-3.3-70b-versatile": 6000,
+    "openai/gpt-oss-120b": 6000,
+    "moonshotai/kimi-k2-instruct": 12000,
+}
+DEFAULT_HISTORY_BUDGET = 8000
+DEFAULT_KEEP_LAST = 6
+
+SUMMARY_HEADER = "[SUMMARY OF EARLIER DISCUSSION]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1 if text else 0
+
+
+def summary_prompt(summary: str, entries: List[TranscriptEntry]) -> str:
+    """Prompt asking a cheap model to fold new turns into the running summary."""
+    new_turns = "".join(e.render() for e in entries)
+    return f'''You maintain a running summary of a team debate about a puzzle.
+Update the summary with the new messages. Keep every fact, hypothesis, objection and decision,
+and say which role (critic, reasoner, state tracker, facilitator) raised it. Be concise.
+Reply with the updated summary only.
+
+Current summary:
+{summary or "(none yet)"}
+
+New messages:
+{new_turns}'''
+
+
+class ContextWindow:
+    """
+    Builds the history text for each turn from a shared Transcript.
+
+    ContextWindow(transcript, keep_last=6, budgets=None, default_budget=8000,
+                  summarize=None, asummarize=None)
+
+    parameters:
+        keep_last: number of most recent turns always sent verbatim (budget
+            permitting); older turns are folded into the summary keep_last at a time
+        budgets: {model: token budget} overrides for MODEL_HISTORY_BUDGETS
+        summarize / asummarize: fn(prompt) -> summary text (sync / async).
+            If summarisation fails (returns None), the oldest turns are dropped instead.
+
+    The summary is shared by all participants and only ever moves forward: a
+    model with a small budget folds turns for everyone.
+    """
+
+    def __init__(
+        self,
+        transcript: Transcript,
+        keep_last: int = DEFAULT_KEEP_LAST,
+        budgets: Optional[Dict[str, int]] = None,
+        default_budget: int = DEFAULT_HISTORY_BUDGET,
+        summarize: Optional[Callable[[str], Optional[str]]] = None,
+        asummarize: Optional[Callable[[str], Any]] = None,
+    ):
+        self.transcript = transcript
+        self.keep_last = max(keep_last, 1)
+        self.budgets = dict(MODEL_HISTORY_BUDGETS, **(budgets or {}))
+        self.default_budget = default_budget
+        self._summarize = summarize
+        self._asummarize = asummarize
+
+        self.summary = ""
+        # Entries with seq <= summarized_upto are covered by the summary
+        self.summarized_upto = 0
+        self.summaries = 0
+        self.tokens_sent = 0
+        self.tokens_saved = 0
+        # Running estimate of what the full transcript costs: _full_tokens[n]
+        # covers the first n entries, extended as the transcript grows
+        self._full_tokens = [0]
+
+    def budget_for(self, model: str) -> int:
+        return self.budgets.get(model, self.default_budget)
+
+    def _fold_target(self, model: str, upto: int) -> int:
+        """How far the summary must reach so the history for this model fits its budget."""
+        budget = self.budget_for(model)
+        summary_tokens = estimate_tokens(self.summary)
+
+        # Fold in batches of keep_last turns, not on every turn, unless over budget
+        pending = self.transcript.entries(self.summarized_upto, upto)
+        if len(pending) < 2 * self.keep_last and summary_tokens + sum(estimate_tokens(e.text) for e in pending) <= budget:
+            return self.summarized_upto
+
+        keep = min(self.keep_last, upto)
+
+        # Shrink the verbatim tail until it fits next to the summary
+        while keep > 1:
+            tail = self.transcript.entries(upto - keep, upto)
+            if summary_tokens + sum(estimate_tokens(e.text) for e in tail) <= budget:
+                break
+            keep -= 1
+        return max(upto - keep, self.summarized_upto)
+
+    def _window(self, upto: int) -> Tuple[str, List[TranscriptEntry]]:
+        entries = self.transcript.entries(min(self.summarized_upto, upto), upto)
+
+        # Bookkeeping: what the full transcript would have cost
+        full = self._full_tokens_upto(upto)
+        sent = estimate_tokens(self.summary) + sum(estimate_tokens(e.text) for e in entries)
+        self.tokens_sent += sent
+        self.tokens_saved += max(full - sent, 0)
+        return self.summary, entries
+
+    def _full_tokens_upto(self, upto: int) -> int:
+        totals = self._full_tokens
+        for entry in self.transcript.entries(len(totals) - 1, upto):
+            totals.append(totals[-1] + estimate_tokens(entry.render()))
+        return totals[upto]
+
+    @staticmethod
+    def render(summary: str, entries: List[TranscriptEntry]) -> str:
+        recent = "".join(e.render() for e in entries)
+        return f"{SUMMARY_HEADER}: {summary}\n{recent}" if summary else recent
+
+    def _apply_summary(self, target: int, summary: Optional[str]):
+        if summary:
+            self.summary = summary.strip()
+            self.summaries += 1
+        # On failure the folded turns are simply dropped
+        self.summarized_upto = target
+
+    def select(self, model: str, upto: Optional[int] = None) -> Tuple[str, List[TranscriptEntry]]:
+        """(summary, verbatim entries) for a turn by `model`, over the first `upto` transcript entries."""
+        upto = len(self.transcript) if upto is None else upto
+        target = self._fold_target(model, upto)
+        if target > self.summarized_upto:
+            prompt = summary_prompt(self.summary, self.transcript.entries(self.summarized_upto, target))
+            self._apply_summary(target, self._summarize(prompt) if self._summarize else None)
+        return self._window(upto)
+
+    async def aselect(self, model: str, upto: Optional[int] = None) -> Tuple[str, List[TranscriptEntry]]:
+        """Async version of select (uses asummarize)."""
+        upto = len(self.transcript) if upto is None else upto
+        target = self._fold_target(model, upto)
+        if target > self.summarized_upto:
+            prompt = summary_prompt(self.summary, self.transcript.entries(self.summarized_upto, target))
+            self._apply_summary(target, await self._asummarize(prompt) if self._asummarize else None)
+        return self._window(upto)
+
+    def history(self, model: str, upto: Optional[int] = None) -> str:
+        """History text for a turn by `model` (summary header + verbatim turns)."""
+        return self.render(*self.select(model, upto))
+
+    async def ahistory(self, model: str, upto: Optional[int] = None) -> str:
+        """Async version of history."""
+        return self.render(*await self.aselect(model, upto))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "summaries": self.summaries,
+            "summarized_turns": self.summarized_upto,
+            "history_tokens_sent": self.tokens_sent,
+            "tokens_saved": self.tokens_saved,
+        }
@@ -6,13 +6,51 @@ to enable multi-model debate orchestration.
 
 import os
 import json
+import time
+import asyncio
 import requests
 from typing import Dict, Any, List, Optional
 
+from src.transcript import Transcript, TranscriptEntry
+from src.rate_limit import Reservation, acquire as acquire_rate_limit
+from src.resilience import (
+    EmptyResponse,
+    ProviderError,
+    acall_with_retries,
+    call_with_retries,
+    failover_chain,
+    note_failover,
+)
+from src.verdict import (
+    ANSWER,
+    CONTINUE,
+    JSON_VERDICT_INSTRUCTION,
+    VERDICT_MODES,
+    StopGeneration,
+    VerdictDetector,
+    record_verdict,
+)
+from src.hedging import ahedged_call, hedge_policy, hedged_call, leg_timeout
+from src.metrics import CallTracker, DebateTracker, record_usage
+from src.cassette import CassetteMiss, debate_rng, get_cassette
+from src.response_cache import cache_key, get_response_cache
+from src.context_window import ContextWindow, DEFAULT_KEEP_LAST, DEFAULT_HISTORY_BUDGET, SUMMARY_HEADER
+from src.clients import (
+    get_openai_client,
+    get_gemini_client,
+    get_async_openai_client,
+    get_async_gemini_client,
+)
+
 
 # Flask API URL for pushing messages to frontend
 FLASK_API_URL = os.environ.get("FLASK_API_URL", "http://127.0.0.1:5000")
 
+# Streamed replies are pushed to the frontend in pieces of at least this many
+# characters, or whatever has arrived every DELTA_FLUSH_SECONDS
+DELTA_FLUSH_SECONDS = float(os.environ.get("DELTA_FLUSH_SECONDS", "0.1"))
+DELTA_FLUSH_CHARS = int(os.environ.get("DELTA_FLUSH_CHARS", "200"))
+
 # Color mapping for debate roles
 ROLE_COLOURS = {
     "facilitator": "#DC143C",  # Red
@@ -24,20 +62,56 @@ ROLE_COLOURS = {
 }
 
 
-def _push_to_frontend(role: str, message: str, model: str = ""):
-    """Push a message to the frontend via Flask API (fire-and-forget)."""
+def _push_to_frontend(role: str, message: str, model: str = "", debate_id: Optional[str] = None,
+                      message_id: Optional[str] = None, delta: bool = False):
+    """
+    Push a message to the frontend via Flask API (fire-and-forget).
+    With delta=True, message is the next piece of the streamed message_id; a
+    later push of the whole message with the same message_id replaces it.
+    """
     try:
         colour = ROLE_COLOURS.get(role, "#FFFFFF")
         display_msg = f"[{model}] {message}" if model else message
+        payload = {"role": role, "message": display_msg, "colour": colour}
+        if debate_id:
+            payload["debate_id"] = debate_id
+        if message_id:
+            payload["id"] = message_id
+        if delta:
+            payload["type"] = "delta"
         requests.post(
             f"{FLASK_API_URL}/api/message",
-            json={"role": role, "message": display_msg, "colour": colour},
+            json=payload,
             timeout=2
         )
     except:
         pass  # Don't let frontend issues break the debate
 
 
+class _FrontendStream:
+    """
+    Pushes one streamed reply to the frontend as delta messages, batched by
+    DELTA_FLUSH_CHARS / DELTA_FLUSH_SECONDS so a reply is a handful of
+    requests rather than one per token. Push the finished (or failed) turn
+    with message_id=stream.id to replace the streamed text.
+    """
+
+    def __init__(self, role: str, model: str, debate_id: Optional[str]):
+        self.role = role
+        self.debate_id = debate_id
+        self.id = _new_message_id()
+        # Same "[model] " prefix as the final message
+        self.pending = f"[{model}] " if model else ""
+        self.pushed_at = time.monotonic()
+
+    def on_delta(self, text: str):
+        self.pending += text
+        if len(self.pending) >= DELTA_FLUSH_CHARS or time.monotonic() - self.pushed_at >= DELTA_FLUSH_SECONDS:
+            _push_to_frontend(self.role, self.pending, debate_id=self.debate_id, message_id=self.id, delta=True)
+            self.pending = ""
+            self.pushed_at = time.monotonic()
+
+
 # Role instructions for debate participants
 ROLE_INSTRUCTIONS = {
     "critic": "Be critical and analytical of your teammates' contributions. Your goal is to achieve the team's objective of solving the puzzle by pushing your team to think of new ideas and challenging current ones.",
@@ -60,62 +134,170 @@ Follow the rules, work together, and support the facilitator until they can deli
 Before you are told to speak, you will be given the conversation that is currently unfolding. Don't hallucinate please.'''
 
 
-def _call_openai(messages: List[Dict[str, str]], model: str = "gpt-4o") -> str:
-    """Call OpenAI API with the given messages."""
-    from openai import OpenAI
+def _gemini_prompt(messages: List[Dict[str, str]]) -> str:
+    """Convert OpenAI-style messages into a single Gemini prompt."""
+    # Extract system message and user messages
+    system_content = ""
+    conversation_parts = []
     
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        return "Error: OPENAI_API_KEY not set in environment"
+    for msg in messages:
+        if msg["role"] == "system":
+            system_content = msg["content"]
+        else:
+            conversation_parts.append(msg["content"])
     
-    client = OpenAI(api_key=api_key)
+    # Combine system prompt with conversation
+    return system_content + "\n\n" + "\n".join(conversation_parts)
+
+
+def _record_openai_usage(response):
+    """Report the usage block of an OpenAI-style response (or final stream chunk)."""
+    usage = getattr(response, "usage", None)
+    if usage:
+        record_usage(usage.prompt_tokens, usage.completion_tokens)
+
+
+def _record_gemini_usage(response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        record_usage(usage.prompt_token_count, usage.candidates_token_count)
+
+
+def _chat_completion(client, messages: List[Dict[str, str]], model: str, on_delta: Optional[callable] = None) -> str:
+    """Run a chat completion on an OpenAI-compatible client, streaming into on_delta if given."""
+    if not on_delta:
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=800,
+            temperature=0.7
+        )
+        _record_openai_usage(response)
+        return response.choices[0].message.content
     
+    parts = []
+    timeout = leg_timeout()
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=800,
+        temperature=0.7,
+        stream=True,
+        stream_options={"include_usage": True},
+        **({"timeout": timeout} if timeout else {})
+    )
     try:
-        response = client.chat.completions.create(
+        for chunk in stream:
+            _record_openai_usage(chunk)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+    except StopGeneration:
+        # The caller has what it needs - drop the connection instead of reading on
+        stream.close()
+    except BaseException:
+        # e.g. a hedged request that lost its race - give the connection back now
+        stream.close()
+        raise
+    return "".join(parts)
+
+
+async def _achat_completion(client, messages: List[Dict[str, str]], model: str, on_delta: Optional[callable] = None) -> str:
+    """Async version of _chat_completion."""
+    if not on_delta:
+        response = await client.chat.completions.create(
             model=model,
             messages=messages,
             max_tokens=800,
             temperature=0.7
         )
+        _record_openai_usage(response)
         return response.choices[0].message.content
-    except Exception as e:
-        return f"OpenAI Error: {str(e)}"
+    
+    parts = []
+    timeout = leg_timeout()
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=800,
+        temperature=0.7,
+        stream=True,
+        stream_options={"include_usage": True},
+        **({"timeout": timeout} if timeout else {})
+    )
+    try:
+        async for chunk in stream:
+            _record_openai_usage(chunk)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_delta(delta)
+    except StopGeneration:
+        await stream.close()
+    except BaseException:
+        # e.g. the task was cancelled because a hedged backup won
+        await stream.close()
+        raise
+    return "".join(parts)
 
 
-def _call_gemini(messages: List[Dict[str, str]], model: str = "gemini-2.5-flash") -> str:
-    """Call Gemini API with the given messages."""
-    from google import genai
+# None = the SDK default
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL")
+
+
+def _call_openai(messages: List[Dict[str, str]], model: str = "gpt-4o", on_delta: Optional[callable] = None) -> str:
+    """Call OpenAI API with the given messages (streaming into on_delta if given)."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise ProviderError("OPENAI_API_KEY not set in environment")
+    
+    client = get_openai_client(api_key, base_url=OPENAI_BASE_URL)
     
+    return _chat_completion(client, messages, model, on_delta)
+
+
+def _call_gemini(messages: List[Dict[str, str]], model: str = "gemini-2.5-flash", on_delta: Optional[callable] = None) -> str:
+    """Call Gemini API with the given messages (streaming into on_delta if given)."""
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
-        return "Error: GEMINI_API_KEY not set in environment"
+        raise ProviderError("GEMINI_API_KEY not set in environment")
     
-    try:
-        client = genai.Client(api_key=api_key)
-        
-        # Convert OpenAI-style messages to Gemini format
-        # Extract system message and user messages
-        system_content = ""
-        conversation_parts = []
-        
-        for msg in messages:
-            if msg["role"] == "system":
-                system_content = msg["content"]
-            else:
-                conversation_parts.append(msg["content"])
-        
-        # Combine system prompt with conversation
-        full_prompt = system_content + "\n\n" + "\n".join(conversation_parts)
-        
+    client = get_gemini_client(api_key)
+    
+    if not on_delta:
         response = client.models.generate_content(
             model=model,
-            contents=full_prompt
+            contents=_gemini_prompt(messages)
         )
+        _record_gemini_usage(response)
         return response.text
-    except Exception as e:
-        return f"Gemini Error: {str(e)}"
+    
+    parts = []
+    usage = None
+    timeout = leg_timeout()
+    config = {"http_options": {"timeout": int(timeout * 1000)}} if timeout else None
+    stream = client.models.generate_content_stream(model=model, contents=_gemini_prompt(messages), config=config)
+    try:
+        for chunk in stream:
+            usage = chunk if getattr(chunk, "usage_metadata", None) else usage
+            if chunk.text:
+                parts.append(chunk.text)
+                on_delta(chunk.text)
+    except StopGeneration:
+        stream.close()
+    except BaseException:
+        stream.close()
+        raise
+    # Every chunk carries running totals - the last one counts
+    if usage is not None:
+        _record_gemini_usage(usage)
+    return "".join(parts)
 
 
+# Overridable to point at a local stand-in (see mock_llm_server.py)
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
 # Groq model mapping for Llama, Qwen, and Kimi
 GROQ_MODELS = {
     "llama": "llama-3.3-70b-versatile",
@@ -125,62 +307,166 @@ GROQ_MODELS = {
 }
 
 
-def _call_groq(messages: List[Dict[str, str]], model: str = "llama-3.3-70b-versatile") -> str:
-    """Call Groq API with the given messages."""
-    from openai import OpenAI
-    
+def _call_groq(messages: List[Dict[str, str]], model: str = "llama-3.3-70b-versatile", on_delta: Optional[callable] = None) -> str:
+    """Call Groq API with the given messages (streaming into on_delta if given)."""
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key:
-        return "Error: GROQ_API_KEY not set in environment"
+        raise ProviderError("GROQ_API_KEY not set in environment")
     
     # Groq uses OpenAI-compatible API
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://api.groq.com/openai/v1"
-    )
+    client = get_openai_client(api_key, base_url=GROQ_BASE_URL)
     
-    try:
-        response = client.chat.completions.create(
+    return _chat_completion(client, messages, model, on_delta)
+
+
+async def _acall_openai(messages: List[Dict[str, str]], model: str = "gpt-4o", on_delta: Optional[callable] = None) -> str:
+    """Async version of _call_openai."""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise ProviderError("OPENAI_API_KEY not set in environment")
+    
+    client = get_async_openai_client(api_key, base_url=OPENAI_BASE_URL)
+    
+    return await _achat_completion(client, messages, model, on_delta)
+
+
+async def _acall_gemini(messages: List[Dict[str, str]], model: str = "gemini-2.5-flash", on_delta: Optional[callable] = None) -> str:
+    """Async version of _call_gemini."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise ProviderError("GEMINI_API_KEY not set in environment")
+    
+    client = get_async_gemini_client(api_key)
+    
+    if not on_delta:
+        response = await client.models.generate_content(
             model=model,
-            messages=messages,
-            max_tokens=800,
-            temperature=0.7
+            contents=_gemini_prompt(messages)
         )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Groq Error: {str(e)}"
+        _record_gemini_usage(response)
+        return response.text
+    
+    parts = []
+    usage = None
+    timeout = leg_timeout()
+    config = {"http_options": {"timeout": int(timeout * 1000)}} if timeout else None
+    stream = await client.models.generate_content_stream(model=model, contents=_gemini_prompt(messages), config=config)
+    try:
+        async for chunk in stream:
+            usage = chunk if getattr(chunk, "usage_metadata", None) else usage
+            if chunk.text:
+                parts.append(chunk.text)
+                on_delta(chunk.text)
+    except StopGeneration:
+        await stream.aclose()
+    except BaseException:
+        await stream.aclose()
+        raise
+    # Every chunk carries running totals - the last one counts
+    if usage is not None:
+        _record_gemini_usage(usage)
+    return "".join(parts)
 
 
-def call_llm(
-    provider: str,
+async def _acall_groq(messages: List[Dict[str, str]], model: str = "llama-3.3-70b-versatile", on_delta: Optional[callable] = None) -> str:
+    """Async version of _call_groq."""
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise ProviderError("GROQ_API_KEY not set in environment")
+    
+    client = get_async_openai_client(api_key, base_url=GROQ_BASE_URL)
+    
+    return await _achat_completion(client, messages, model, on_delta)
+
+
+# Backend call functions, keyed by the backend name from _resolve_provider
+_BACKENDS = {"openai": _call_openai, "gemini": _call_gemini, "groq": _call_groq}
+_ASYNC_BACKENDS = {"openai": _acall_openai, "gemini": _acall_gemini, "groq": _acall_groq}
+
+
+def _rate_limit_slot(backend: str, messages: List[Dict[str, str]], cassette) -> Reservation:
+    """Rate limiter slot for a call (replayed calls never reach the provider, so they don't wait)."""
+    if cassette and cassette.mode == "replay":
+        return Reservation(None, 0)
+    return acquire_rate_limit(backend, messages)
+
+
+def _invoke(backend: str, model: str, messages: List[Dict[str, str]], on_delta: Optional[callable] = None, role: str = "") -> str:
+    """
+    Make a provider call, through the record/replay cassette when one is active.
+    
+    Each attempt waits on the shared rate limiter for the provider's API key.
+    Transient failures are retried with backoff until the reply starts
+    streaming, behind the provider's circuit breaker (see src.resilience);
+    the last error is raised if the call gives up. Latency, time to first
+    token, usage, retries and errors are recorded per provider/model/role.
+    """
+    call = lambda cb: _BACKENDS[backend](messages, model, cb)
+    cassette = get_cassette()
+    
+    with CallTracker(backend, model, role, on_delta) as tracker:
+        def attempt() -> str:
+            used = tracker.prompt_tokens + tracker.completion_tokens
+            with _rate_limit_slot(backend, messages, cassette) as slot:
+                if cassette:
+                    response = cassette.call(backend, model, messages, call, tracker.on_delta)
+                else:
+                    response = call(tracker.on_delta)
+                if not response:
+                    raise EmptyResponse(backend)
+            slot.settle(tracker.prompt_tokens + tracker.completion_tokens - used)
+            return response
+        
+        return call_with_retries(backend, attempt, lambda: tracker.first_token_at is not None)
+
+
+async def _ainvoke(backend: str, model: str, messages: List[Dict[str, str]], on_delta: Optional[callable] = None, role: str = "") -> str:
+    """Async version of _invoke."""
+    call = lambda cb: _ASYNC_BACKENDS[backend](messages, model, cb)
+    cassette = get_cassette()
+    
+    with CallTracker(backend, model, role, on_delta) as tracker:
+        async def attempt() -> str:
+            used = tracker.prompt_tokens + tracker.completion_tokens
+            async with _rate_limit_slot(backend, messages, cassette) as slot:
+                if cassette:
+                    response = await cassette.acall(backend, model, messages, call, tracker.on_delta)
+                else:
+                    response = await call(tracker.on_delta)
+                if not response:
+                    raise EmptyResponse(backend)
+            slot.settle(tracker.prompt_tokens + tracker.completion_tokens - used)
+            return response
+        
+        return await acall_with_retries(backend, attempt, lambda: tracker.first_token_at is not None)
+
+
+def _resolve_provider(provider: str, model_name: Optional[str] = None) -> Optional[tuple]:
+    """Map a provider name to (backend, model), or None if it is unknown."""
+    if provider == "openai":
+        return "openai", model_name or "gpt-4o"
+    if provider == "gemini":
+        return "gemini", model_name or "gemini-2.5-flash"
+    if provider in GROQ_MODELS:
+        return "groq", model_name or GROQ_MODELS[provider]
+    return None
+
+
+def _build_messages(
     role: str,
     personality: str,
     expertise: str,
     puzzle: str,
     conversation_history: str,
     prompt: str,
-    model_name: Optional[str] = None,
-    tool_context: Optional[Any] = None,
-    **kwargs
-) -> Dict[str, Any]:
+    history_messages: Optional[List[Dict[str, str]]] = None,
+) -> List[Dict[str, str]]:
     """
-    Call an LLM (OpenAI or Gemini) with debate participant configuration.
+    Build the chat messages sent to a debate participant.
     
-    Args:
-        provider: The LLM provider to use ("openai" or "gemini")
-        role: The debate role (facilitator, critic, reasoner, stateTracker)
-        personality: The personality trait for this participant
-        expertise: The area of expertise for this participant
-        puzzle: The puzzle being debated
-        conversation_history: Previous conversation in the debate
-        prompt: The current prompt/instruction for the participant
-        model_name: Optional specific model name to use
-        
-    Returns:
-        Dict with status, response text, and metadata
+    history_messages (from _turn_messages) replaces the single "Conversation so
+    far" message with one message per prior turn.
     """
-    provider = provider.lower().strip()
-    
     # Build system prompt
     system_prompt = _build_system_prompt(role, personality, expertise)
     
@@ -191,38 +477,91 @@ def call_llm(
     ]
     
     # Add conversation history if present
-    if conversation_history and conversation_history.strip():
+    if history_messages:
+        messages.extend(history_messages)
+    elif conversation_history and conversation_history.strip():
         messages.append({"role": "user", "content": f"Conversation so far:\n{conversation_history}"})
     
     # Add current prompt
     messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+MESSAGE_LAYOUTS = ("transcript", "turns")
+
+
+def _turn_messages(
+    summary: str,
+    entries: List[TranscriptEntry],
+    speaker: int,
+    prompt: str = "It is now your turn to speak.",
+) -> List[Dict[str, str]]:
+    """
+    History as one message per prior turn, for the "turns" message layout.
     
-    # Call appropriate provider
-    if provider == "openai":
-        model = model_name or "gpt-4o"
-        response = _call_openai(messages, model)
-    elif provider == "gemini":
-        model = model_name or "gemini-2.5-flash"
-        response = _call_gemini(messages, model)
-    elif provider == "chatgpt":
-        model = model_name or GROQ_MODELS["chatgpt"]
-        response = _call_groq(messages, model)
-    elif provider == "llama":
-        model = model_name or GROQ_MODELS["llama"]
-        response = _call_groq(messages, model)
-    elif provider == "qwen":
-        model = model_name or GROQ_MODELS["qwen"]
-        response = _call_groq(messages, model)
-    elif provider == "kimi":
-        model = model_name or GROQ_MODELS["kimi"]
-        response = _call_groq(messages, model)
-    else:
-        return {
-            "status": "error",
-            "message": f"Unknown provider: {provider}. Use 'openai', 'gemini', 'llama', 'qwen', or 'kimi'.",
-            "response": None
-        }
+    The speaker's own turns become the prompt it was given (as recorded on
+    the entry; `prompt` when none was) followed by its reply as an assistant
+    message; everyone else's turns are user messages. Each request is then
+    the previous request for that speaker plus new messages, so providers
+    can serve the shared prefix from their prompt cache.
+    
+    speaker: the participant's seat (see _seats), as recorded in the transcript
+    """
+    messages = []
+    if summary:
+        messages.append({"role": "user", "content": f"{SUMMARY_HEADER}: {summary}"})
     
+    for entry in entries:
+        if entry.speaker == speaker:
+            messages.append({"role": "user", "content": entry.prompt or prompt})
+            messages.append({"role": "assistant", "content": entry.text})
+        else:
+            messages.append({"role": "user", "content": f"[{entry.role.upper()}]: {entry.text}"})
+    return messages
+
+
+def _cache_lookup(backend: str, model: str, messages: List[Dict[str, str]], on_delta: Optional[callable]) -> tuple:
+    """(cache key, cached reply) for a request; (None, None) when the response cache is off."""
+    cache = get_response_cache()
+    if cache is None:
+        return None, None
+    
+    key = cache_key(backend, model, messages)
+    response = cache.get(key)
+    if response is not None and on_delta:
+        # Streaming callers still get the text, as a single chunk
+        try:
+            on_delta(response)
+        except StopGeneration:
+            pass
+    return key, response
+
+
+def _cache_store(key: Optional[str], response: str):
+    """Remember a successful reply."""
+    if key and response:
+        get_response_cache().put(key, response)
+
+
+def _unknown_provider(provider: str) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "message": f"Unknown provider: {provider}. Use 'openai', 'gemini', 'chatgpt', 'llama', 'qwen', or 'kimi'.",
+        "response": None
+    }
+
+
+def _provider_failed(provider: str, tried: List[str], error: Exception) -> Dict[str, Any]:
+    via = f" (tried {', '.join(tried)})" if len(tried) > 1 else ""
+    return {
+        "status": "error",
+        "provider": provider,
+        "message": f"{provider} failed{via}: {type(error).__name__}: {error}",
+        "response": None
+    }
+
+
+def _success(provider: str, role: str, personality: str, expertise: str, response: str) -> Dict[str, Any]:
     return {
         "status": "success",
         "provider": provider,
@@ -233,10 +572,358 @@ def call_llm(
     }
 
 
+def _target(name: str, model_name: Optional[str] = None) -> Optional[tuple]:
+    """(provider, backend, model) for a provider name or "provider:model", or None if unknown."""
+    name, _, pinned = name.partition(":")
+    name = name.lower().strip()
+    resolved = _resolve_provider(name, pinned.strip() or model_name)
+    return (name,) + resolved if resolved else None
+
+
+def _targets(provider: str, model_name: Optional[str], fallbacks) -> List[tuple]:
+    """
+    (provider, backend, model) to try in order: the requested provider, then
+    its failover alternates (see src.resilience.failover_chain). Unknown
+    alternates are skipped.
+    """
+    targets = []
+    for i, name in enumerate(failover_chain(provider, fallbacks)):
+        target = _target(name, model_name if i == 0 else None)
+        if target:
+            targets.append(target)
+    return targets
+
+
+def _hedge_plan(hedge, target: tuple) -> Optional[tuple]:
+    """(delay, backup target) if this call should be hedged (never under a cassette)."""
+    policy = hedge_policy(hedge)
+    if policy is None or get_cassette():
+        return None
+    name, backend, model = target
+    backup = policy.backup_for(name)
+    return policy.delay(backend, model), (_target(backup) if backup else None) or target
+
+
+def _invoke_target(target: tuple, messages: List[Dict[str, str]], on_delta: Optional[callable], role: str, hedge=None) -> tuple:
+    """
+    _invoke for a (provider, backend, model) target, hedged per src.hedging
+    when a policy applies. Returns (target that answered, response).
+    """
+    plan = _hedge_plan(hedge, target)
+    if plan is None:
+        return target, _invoke(target[1], target[2], messages, on_delta, role)
+    
+    delay, backup = plan
+    leg = lambda t: (t[1], t[2], lambda cb: _invoke(t[1], t[2], messages, cb, role))
+    index, response = hedged_call(leg(target), leg(backup), delay, on_delta)
+    return (target, backup)[index], response
+
+
+async def _ainvoke_target(target: tuple, messages: List[Dict[str, str]], on_delta: Optional[callable], role: str, hedge=None) -> tuple:
+    """Async version of _invoke_target."""
+    plan = _hedge_plan(hedge, target)
+    if plan is None:
+        return target, await _ainvoke(target[1], target[2], messages, on_delta, role)
+    
+    delay, backup = plan
+    leg = lambda t: (t[1], t[2], lambda cb: _ainvoke(t[1], t[2], messages, cb, role))
+    index, response = await ahedged_call(leg(target), leg(backup), delay, on_delta)
+    return (target, backup)[index], response
+
+
+class _StreamWatch:
+    """Wraps on_delta to note whether any text reached the caller."""
+    
+    def __init__(self, on_delta: Optional[callable]):
+        self.streamed = False
+        self._on_delta = on_delta
+        self.on_delta = self._forward if on_delta else None
+    
+    def _forward(self, text: str):
+        self.streamed = True
+        self._on_delta(text)
+
+
+def call_llm(
+    provider: str,
+    role: str,
+    personality: str,
+    expertise: str,
+    puzzle: str,
+    conversation_history: str,
+    prompt: str,
+    model_name: Optional[str] = None,
+    tool_context: Optional[Any] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Call an LLM (OpenAI, Gemini or Groq) with debate participant configuration.
+    
+    Transient provider failures are retried; if the provider still fails (or
+    its circuit breaker is open) the call fails over to the next alternate,
+    unless part of the reply was already streamed. The result has status
+    "error" when every option failed.
+    
+    Args:
+        provider: The LLM provider to use ("openai", "gemini", "chatgpt", "llama", "qwen" or "kimi")
+        role: The debate role (facilitator, critic, reasoner, stateTracker)
+        personality: The personality trait for this participant
+        expertise: The area of expertise for this participant
+        puzzle: The puzzle being debated
+        conversation_history: Previous conversation in the debate
+        prompt: The current prompt/instruction for the participant
+        model_name: Optional specific model name to use
+        on_delta: (keyword only, not exposed as a tool parameter) callback(text)
+                  called with each chunk as the provider streams the reply
+        history_messages: (keyword only) per-turn history messages from
+                  _turn_messages, used instead of conversation_history
+        fallbacks: (keyword only) alternate provider name(s) for failover,
+                  optionally "provider:model"; defaults to LLM_FAILOVER
+        hedge: (keyword only) hedging policy for slow first tokens - seconds,
+                  "p95", {"after": ..., "backup": ...} or False; defaults to
+                  LLM_HEDGE_AFTER (off). See src.hedging
+        
+    Returns:
+        Dict with status, response text, and metadata (provider is the one that answered)
+    """
+    provider = provider.lower().strip()
+    if _resolve_provider(provider) is None:
+        return _unknown_provider(provider)
+    
+    messages = _build_messages(
+        role, personality, expertise, puzzle, conversation_history, prompt, kwargs.get("history_messages")
+    )
+    watch = _StreamWatch(kwargs.get("on_delta"))
+    error = None
+    tried = []
+    for target in _targets(provider, model_name, kwargs.get("fallbacks")):
+        name, backend, model = target
+        if error is not None:
+            if watch.streamed:
+                break
+            note_failover(provider, name)
+        tried.append(name)
+        
+        key, response = _cache_lookup(backend, model, messages, watch.on_delta)
+        if response is None:
+            try:
+                answered, response = _invoke_target(target, messages, watch.on_delta, role, kwargs.get("hedge"))
+            except CassetteMiss:
+                raise
+            except Exception as e:
+                error = e
+                continue
+            if answered is not target:
+                name, backend, model = answered
+                key = key and cache_key(backend, model, messages)
+            _cache_store(key, response)
+        return _success(name, role, personality, expertise, response)
+    
+    return _provider_failed(provider, tried, error)
+
+
+async def acall_llm(
+    provider: str,
+    role: str,
+    personality: str,
+    expertise: str,
+    puzzle: str,
+    conversation_history: str,
+    prompt: str,
+    model_name: Optional[str] = None,
+    on_delta: Optional[callable] = None,
+    history_messages: Optional[List[Dict[str, str]]] = None,
+    fallbacks=None,
+    hedge=None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Async version of call_llm, built on the async SDK clients.
+    
+    Takes the same arguments and returns the same dict as call_llm. If on_delta
+    is given the reply is streamed and on_delta(text) is called per chunk.
+    """
+    provider = provider.lower().strip()
+    if _resolve_provider(provider) is None:
+        return _unknown_provider(provider)
+    
+    messages = _build_messages(role, personality, expertise, puzzle, conversation_history, prompt, history_messages)
+    watch = _StreamWatch(on_delta)
+    error = None
+    tried = []
+    for target in _targets(provider, model_name, fallbacks):
+        name, backend, model = target
+        if error is not None:
+            if watch.streamed:
+                break
+            note_failover(provider, name)
+        tried.append(name)
+        
+        key, response = _cache_lookup(backend, model, messages, watch.on_delta)
+        if response is None:
+            try:
+                answered, response = await _ainvoke_target(target, messages, watch.on_delta, role, hedge)
+            except CassetteMiss:
+                raise
+            except Exception as e:
+                error = e
+                continue
+            if answered is not target:
+                name, backend, model = answered
+                key = key and cache_key(backend, model, messages)
+            _cache_store(key, response)
+        return _success(name, role, personality, expertise, response)
+    
+    return _provider_failed(provider, tried, error)
+
+
+# Cheap model that folds old turns into the running summary (see context_policy)
+SUMMARY_PROVIDER = os.environ.get("DEBATE_SUMMARY_PROVIDER", "llama")
+SUMMARY_MODEL = os.environ.get("DEBATE_SUMMARY_MODEL", "llama-3.1-8b-instant")
+
+
+def _summarize(prompt: str, provider: str = SUMMARY_PROVIDER, model_name: str = SUMMARY_MODEL) -> Optional[str]:
+    """Ask the summary model to fold turns into the running summary (None on failure)."""
+    backend, model = _resolve_provider(provider, model_name)
+    try:
+        return _invoke(backend, model, [{"role": "user", "content": prompt}], role="summary")
+    except CassetteMiss:
+        raise
+    except Exception:
+        return None
+
+
+async def _asummarize(prompt: str, provider: str = SUMMARY_PROVIDER, model_name: str = SUMMARY_MODEL) -> Optional[str]:
+    """Async version of _summarize."""
+    backend, model = _resolve_provider(provider, model_name)
+    try:
+        return await _ainvoke(backend, model, [{"role": "user", "content": prompt}], role="summary")
+    except CassetteMiss:
+        raise
+    except Exception:
+        return None
+
+
+VERDICT_CLASSIFIER_PROMPT = (
+    "A debate facilitator ended their turn with:\n\n{text}\n\n"
+    "Did the facilitator settle on a final answer, or ask the team for more discussion? "
+    "Reply with exactly one word: ANSWER or CONTINUE."
+)
+
+
+def _classify_verdict(text: str) -> Optional[str]:
+    """Ask the summary model for a verdict the phrase detector couldn't find (None on failure)."""
+    reply = _summarize(VERDICT_CLASSIFIER_PROMPT.format(text=text[-2000:]))
+    return _classifier_verdict(reply)
+
+
+async def _aclassify_verdict(text: str) -> Optional[str]:
+    """Async version of _classify_verdict."""
+    reply = await _asummarize(VERDICT_CLASSIFIER_PROMPT.format(text=text[-2000:]))
+    return _classifier_verdict(reply)
+
+
+def _classifier_verdict(reply: Optional[str]) -> Optional[str]:
+    word = (reply or "").strip().upper()
+    if word.startswith("ANSWER"):
+        return ANSWER
+    if word.startswith("CONTINUE"):
+        return CONTINUE
+    return None
+
+
+def _facilitator_verdict(detector: VerdictDetector, response: str) -> tuple:
+    """(verdict, message text) for a facilitator reply, classifying it if the mode asks to."""
+    verdict, text = detector.finish(response)
+    if verdict is None and detector.mode == "classifier":
+        verdict = detector.verdict = _classify_verdict(text)
+    record_verdict(detector, verdict)
+    return verdict, text
+
+
+async def _afacilitator_verdict(detector: VerdictDetector, response: str) -> tuple:
+    """Async version of _facilitator_verdict."""
+    verdict, text = detector.finish(response)
+    if verdict is None and detector.mode == "classifier":
+        verdict = detector.verdict = await _aclassify_verdict(text)
+    record_verdict(detector, verdict)
+    return verdict, text
+
+
+# Numeric context_policy keys and their allowed (min, max) values
+CONTEXT_POLICY_LIMITS = {"keep_last": (1, 100), "budget": (256, 200_000)}
+
+
+def context_policy_error(context_policy: Any) -> Optional[str]:
+    """
+    Check a context_policy from a request (see _context_window).
+    Returns what is wrong with it, or None if it can be used as is.
+    """
+    if context_policy is None:
+        return None
+    if not isinstance(context_policy, dict):
+        return "context_policy must be an object"
+    for key, value in context_policy.items():
+        if key in CONTEXT_POLICY_LIMITS:
+            low, high = CONTEXT_POLICY_LIMITS[key]
+            if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+                return f"context_policy.{key} must be an integer from {low} to {high}"
+        elif key == "budgets":
+            low, high = CONTEXT_POLICY_LIMITS["budget"]
+            if not isinstance(value, dict) or len(value) > 20:
+                return "context_policy.budgets must be an object of {model: budget}"
+            for budget in value.values():
+                if not isinstance(budget, int) or isinstance(budget, bool) or not low <= budget <= high:
+                    return f"context_policy.budgets values must be integers from {low} to {high}"
+        elif key == "summary_provider":
+            if not isinstance(value, str) or _resolve_provider(value) is None:
+                return f"Unknown context_policy.summary_provider: {value}"
+        elif key == "summary_model":
+            if not isinstance(value, str) or not 0 < len(value) <= 100:
+                return "context_policy.summary_model must be a model name"
+        else:
+            return f"Unknown context_policy key: {key}"
+    return None
+
+
+def _context_window(transcript: Transcript, context_policy: Optional[Dict[str, Any]]) -> Optional[ContextWindow]:
+    """
+    Build a ContextWindow from a debate's context_policy, or None to send the full transcript.
+    
+    context_policy keys (all optional):
+        keep_last: recent turns kept verbatim (default 6)
+        budget: default history token budget (default 8000)
+        budgets: {model: token budget} per-model overrides
+        summary_provider / summary_model: model that writes the running summary
+    """
+    if not context_policy:
+        return None
+    
+    provider = context_policy.get("summary_provider", SUMMARY_PROVIDER)
+    model_name = context_policy.get("summary_model", SUMMARY_MODEL)
+    return ContextWindow(
+        transcript,
+        keep_last=context_policy.get("keep_last", DEFAULT_KEEP_LAST),
+        budgets=context_policy.get("budgets"),
+        default_budget=context_policy.get("budget", DEFAULT_HISTORY_BUDGET),
+        summarize=lambda prompt: _summarize(prompt, provider, model_name),
+        asummarize=lambda prompt: _asummarize(prompt, provider, model_name),
+    )
+
+
+def _card_model(card: dict) -> str:
+    """Concrete model name a card will call (used for per-model budgets)."""
+    provider = card.get("model", "openai")
+    resolved = _resolve_provider(provider.lower().strip())
+    return resolved[1] if resolved else provider
+
+
 def run_debate(
     puzzle: str,
     cards: str,
     max_rounds: int = 4,
+    debate_id: Optional[str] = None,
+    verdict_mode: str = "phrase",
     tool_context: Optional[Any] = None,
     **kwargs
 ) -> Dict[str, Any]:
@@ -250,14 +937,17 @@ def run_debate(
                - role: "facilitator", "critic", "reasoner", or "stateTracker"
                - personality: Personality trait
                - expertise: Area of expertise
+               - fallback: Optional alternate model(s) if the card's provider fails
         max_rounds: Maximum number of debate rounds (default 4)
+        debate_id: Frontend debate session to push messages to
+        verdict_mode: How the facilitator's verdict is read: "phrase" (default),
+                      "json" or "classifier"
+        stream: (keyword only) push replies to the frontend as they stream
+                (default True); otherwise only whole messages are pushed
         
     Returns:
         Dict with debate history, final answer, and status
     """
-    import random
-    import time
-    
     # Parse cards configuration
     try:
         if isinstance(cards, str):
@@ -299,153 +989,254 @@ def run_debate(
             "final_answer": None
         }
     
+    if verdict_mode not in VERDICT_MODES:
+        return {
+            "status": "error",
+            "message": f"Unknown verdict_mode: {verdict_mode}",
+            "debate_history": [],
+            "final_answer": None
+        }
+    
+    stream = kwargs.get("stream", True)
+
+    def frontend_stream(role, model):
+        return _FrontendStream(role, model, debate_id) if stream else None
+
     # Push start message to frontend
-    _push_to_frontend("system", f"🎯 Starting debate on: {puzzle}")
+    _push_to_frontend("system", f"🎯 Starting debate on: {puzzle}", debate_id=debate_id)
     
     # Run debate
     debate_history = []
-    conversation_text = ""
+    transcript = Transcript()
     final_answer = None
+    rng = debate_rng()
+    tracker = DebateTracker("sam")
+    outcome = "error"
     
-    for round_num in range(max_rounds):
-        _push_to_frontend("system", f"📢 Round {round_num + 1} of {max_rounds}")
+    try:
+        for round_num in range(max_rounds):
+            tracker.round()
+            _push_to_frontend("system", f"📢 Round {round_num + 1} of {max_rounds}", debate_id=debate_id)
         
-        # Shuffle participants each round
-        random.shuffle(participants)
+            # Shuffle participants each round
+            rng.shuffle(participants)
         
-        # Each participant speaks
-        for card in participants:
-            provider = card.get("model", "openai")
-            # Map frontend model names to providers
-            if provider.lower() in ["chatgpt", "gpt"]:
-                provider = "chatgpt"  # Uses Groq's open-source GPT model
-            elif provider.lower() == "openai":
-                provider = "openai"  # Uses OpenAI's paid API
-            elif provider.lower() in ["gemini", "google"]:
-                provider = "gemini"
-            elif provider.lower() == "llama":
-                provider = "llama"
-            elif provider.lower() == "qwen":
-                provider = "qwen"
-            elif provider.lower() == "kimi":
-                provider = "kimi"
+            # Each participant speaks
+            for card in participants:
+                provider = card.get("model", "openai")
+                # Map frontend model names to providers
+                if provider.lower() in ["chatgpt", "gpt"]:
+                    provider = "chatgpt"  # Uses Groq's open-source GPT model
+                elif provider.lower() == "openai":
+                    provider = "openai"  # Uses OpenAI's paid API
+                elif provider.lower() in ["gemini", "google"]:
+                    provider = "gemini"
+                elif provider.lower() == "llama":
+                    provider = "llama"
+                elif provider.lower() == "qwen":
+                    provider = "qwen"
+                elif provider.lower() == "kimi":
+                    provider = "kimi"
             
-            result = call_llm(
-                provider=provider,
-                role=card.get("role", "reasoner"),
-                personality=card.get("personality", "analytical"),
-                expertise=card.get("expertise", "general"),
-                puzzle=puzzle,
-                conversation_history=conversation_text,
-                prompt="It is now your turn to speak."
-            )
+                live = frontend_stream(card.get("role", "unknown"), card.get("model", "unknown"))
+                result = call_llm(
+                    provider=provider,
+                    role=card.get("role", "reasoner"),
+                    personality=card.get("personality", "analytical"),
+                    expertise=card.get("expertise", "general"),
+                    puzzle=puzzle,
+                    conversation_history=transcript.render(),
+                    prompt="It is now your turn to speak.",
+                    fallbacks=card.get("fallback"),
+                    on_delta=live and live.on_delta
+                )
+                message_id = live and live.id
             
-            if result["status"] == "success":
-                response = result["response"]
-                role = card.get("role", "unknown")
-                model_name = card.get("model", "unknown")
+                if result["status"] == "success":
+                    response = result["response"]
+                    role = card.get("role", "unknown")
+                    model_name = card.get("model", "unknown")
                 
-                # Push to frontend in real-time
-                _push_to_frontend(role, response, model_name)
+                    # Push to frontend in real-time
+                    _push_to_frontend(role, response, model_name, debate_id=debate_id, message_id=message_id)
                 
-                # Add to history
-                debate_history.append({
-                    "role": role,
-                    "model": model_name,
-                    "personality": card.get("personality", ""),
-                    "expertise": card.get("expertise", ""),
-                    "message": response
-                })
+                    # Add to history
+                    debate_history.append({
+                        "role": role,
+                        "model": model_name,
+                        "personality": card.get("personality", ""),
+                        "expertise": card.get("expertise", ""),
+                        "message": response
+                    })
                 
-                # Update conversation text for context sharing
-                conversation_text += f"\n[{role.upper()}]: {response}\n"
-            else:
-                error_msg = result.get("message", "Unknown error")
-                _push_to_frontend("error", f"[{card.get('model', 'unknown')}] Error: {error_msg}")
-                debate_history.append({
-                    "role": card.get("role", "unknown"),
-                    "model": card.get("model", "unknown"),
-                    "error": error_msg
-                })
-            
-            # Small delay to avoid rate limiting
-            time.sleep(0.3)
+                    # Update transcript for context sharing
+                    transcript.append(role, model_name, response)
+                else:
+                    error_msg = result.get("message", "Unknown error")
+                    _push_to_frontend("error", f"[{card.get('model', 'unknown')}] Error: {error_msg}",
+                                      debate_id=debate_id, message_id=message_id)
+                    debate_history.append({
+                        "role": card.get("role", "unknown"),
+                        "model": card.get("model", "unknown"),
+                        "error": error_msg
+                    })
         
-        # Facilitator speaks
-        fac_provider = facilitator.get("model", "openai")
-        if fac_provider.lower() in ["chatgpt", "gpt"]:
-            fac_provider = "chatgpt"  # Uses Groq's open-source GPT model
-        elif fac_provider.lower() == "openai":
-            fac_provider = "openai"  # Uses OpenAI's paid API
-        elif fac_provider.lower() in ["gemini", "google"]:
-            fac_provider = "gemini"
-        elif fac_provider.lower() == "llama":
-            fac_provider = "llama"
-        elif fac_provider.lower() == "qwen":
-            fac_provider = "qwen"
-        elif fac_provider.lower() == "kimi":
-            fac_provider = "kimi"
+            # Facilitator speaks
+            fac_provider = facilitator.get("model", "openai")
+            if fac_provider.lower() in ["chatgpt", "gpt"]:
+                fac_provider = "chatgpt"  # Uses Groq's open-source GPT model
+            elif fac_provider.lower() == "openai":
+                fac_provider = "openai"  # Uses OpenAI's paid API
+            elif fac_provider.lower() in ["gemini", "google"]:
+                fac_provider = "gemini"
+            elif fac_provider.lower() == "llama":
+                fac_provider = "llama"
+            elif fac_provider.lower() == "qwen":
+                fac_provider = "qwen"
+            elif fac_provider.lower() == "kimi":
+                fac_provider = "kimi"
         
-        fac_result = call_llm(
-            provider=fac_provider,
-            role="facilitator",
-            personality=facilitator.get("personality", "decisive"),
-            expertise=facilitator.get("expertise", "leadership"),
-            puzzle=puzzle,
-            conversation_history=conversation_text,
-            prompt="It is now your turn to speak."
-        )
+            detector = VerdictDetector(verdict_mode)
+            live = frontend_stream("facilitator", facilitator.get("model", "unknown"))
+            fac_result = call_llm(
+                provider=fac_provider,
+                role="facilitator",
+                personality=facilitator.get("personality", "decisive"),
+                expertise=facilitator.get("expertise", "leadership"),
+                puzzle=puzzle,
+                conversation_history=transcript.render(),
+                prompt=_facilitator_args(facilitator, puzzle, "", verdict_mode)["prompt"],
+                fallbacks=facilitator.get("fallback"),
+                on_delta=detector.watch(live and live.on_delta)
+            )
+            message_id = live and live.id
         
-        if fac_result["status"] == "success":
-            fac_response = fac_result["response"]
-            fac_model = facilitator.get("model", "unknown")
+            if fac_result["status"] == "success":
+                fac_verdict, fac_response = _facilitator_verdict(detector, fac_result["response"])
+                fac_model = facilitator.get("model", "unknown")
             
-            # Push facilitator message to frontend
-            _push_to_frontend("facilitator", fac_response, fac_model)
+                # Push facilitator message to frontend
+                _push_to_frontend("facilitator", fac_response, fac_model, debate_id=debate_id, message_id=message_id)
             
-            debate_history.append({
-                "role": "facilitator",
-                "model": fac_model,
-                "personality": facilitator.get("personality", ""),
-                "expertise": facilitator.get("expertise", ""),
-                "message": fac_response
-            })
+                debate_history.append({
+                    "role": "facilitator",
+                    "model": fac_model,
+                    "personality": facilitator.get("personality", ""),
+                    "expertise": facilitator.get("expertise", ""),
+                    "message": fac_response
+                })
             
-            conversation_text += f"\n[FACILITATOR]: {fac_response}\n"
+                transcript.append("facilitator", fac_model, fac_response)
             
-            # Check if facilitator has reached a conclusion
-            if "that is the answer" in fac_response.lower():
-                final_answer = fac_response
-                _push_to_frontend("system", "✅ Debate concluded! Final answer reached.")
-                break
-        else:
-            error_msg = fac_result.get("message", "Unknown error")
-            _push_to_frontend("error", f"[{facilitator.get('model', 'unknown')}] Error: {error_msg}")
-            debate_history.append({
-                "role": "facilitator",
-                "model": facilitator.get("model", "unknown"),
-                "error": error_msg
-            })
-        
-        time.sleep(0.3)
+                # Check if facilitator has reached a conclusion
+                if fac_verdict == ANSWER:
+                    final_answer = fac_response
+                    _push_to_frontend("system", "✅ Debate concluded! Final answer reached.", debate_id=debate_id)
+                    break
+            else:
+                error_msg = fac_result.get("message", "Unknown error")
+                _push_to_frontend("error", f"[{facilitator.get('model', 'unknown')}] Error: {error_msg}",
+                                  debate_id=debate_id, message_id=message_id)
+                debate_history.append({
+                    "role": "facilitator",
+                    "model": facilitator.get("model", "unknown"),
+                    "error": error_msg
+                })
+    
+        outcome = "answer" if final_answer else "max_rounds"
+    finally:
+        tracker.finish(outcome, max_rounds)
     
     if not final_answer:
-        _push_to_frontend("system", f"⏱️ Debate ended after {max_rounds} rounds without conclusion.")
+        _push_to_frontend("system", f"⏱️ Debate ended after {max_rounds} rounds without conclusion.", debate_id=debate_id)
     
     return {
         "status": "completed",
         "rounds_completed": round_num + 1,
         "debate_history": debate_history,
         "final_answer": final_answer,
-        "conversation_transcript": conversation_text
+        "conversation_transcript": transcript.render()
+    }
+
+
+def _split_cards(cards_list: list) -> tuple:
+    """Separate the facilitator card from the other participants."""
+    facilitator = None
+    participants = []
+    
+    for card in cards_list:
+        if card.get("role", "").lower() == "facilitator":
+            facilitator = card
+        else:
+            participants.append(card)
+    
+    return facilitator, participants
+
+
+TURN_MODES = ("sequential", "parallel")
+
+
+def _seats(cards_list: list) -> Dict[int, int]:
+    """
+    id(card) -> the card's position in the deck, which identifies its turns in
+    the transcript (role and model don't: a deck may hold two identical cards).
+    """
+    return {id(card): seat for seat, card in enumerate(cards_list)}
+
+
+def _history_args(history) -> Dict[str, Any]:
+    """call_llm history arguments: rendered text, or per-turn messages (list)."""
+    if isinstance(history, list):
+        return {"conversation_history": "", "history_messages": history}
+    return {"conversation_history": history}
+
+
+def _participant_args(card: dict, puzzle: str, conversation_text) -> Dict[str, Any]:
+    """call_llm arguments for a non-facilitator participant's turn."""
+    return {
+        "provider": card.get("model", "openai"),
+        "role": card.get("role", "reasoner"),
+        "personality": card.get("personality", "analytical"),
+        "expertise": card.get("expertise", "general"),
+        "puzzle": puzzle,
+        **_history_args(conversation_text),
+        "prompt": "It is now your turn to speak.",
+        "fallbacks": card.get("fallback"),
+    }
+
+
+def _facilitator_args(facilitator: dict, puzzle: str, conversation_text, verdict_mode: str = "phrase") -> Dict[str, Any]:
+    """call_llm arguments for the facilitator's turn."""
+    prompt = "It is now your turn to speak."
+    if verdict_mode == "json":
+        prompt += " " + JSON_VERDICT_INSTRUCTION
+    return {
+        "provider": facilitator.get("model", "openai"),
+        "role": "facilitator",
+        "personality": facilitator.get("personality", "decisive"),
+        "expertise": facilitator.get("expertise", "leadership"),
+        "puzzle": puzzle,
+        **_history_args(conversation_text),
+        "prompt": prompt,
+        "fallbacks": facilitator.get("fallback"),
     }
 
 
+def _new_message_id() -> str:
+    import uuid
+    return uuid.uuid4().hex[:12]
+
+
 def run_debate_streaming(
     puzzle: str,
     cards: list,
     max_rounds: int = 4,
     on_message: callable = None,
+    turn_mode: str = "sequential",
+    on_delta: callable = None,
+    context_policy: Optional[Dict[str, Any]] = None,
+    message_layout: str = "transcript",
+    verdict_mode: str = "phrase",
 ) -> Dict[str, Any]:
     """
     Run a debate with real-time message streaming via callback.
@@ -455,12 +1246,33 @@ def run_debate_streaming(
         cards: List of card configurations (already parsed)
         max_rounds: Maximum number of debate rounds
         on_message: Callback function(role, message, model) called for each message
+        turn_mode: "sequential" (each participant sees every earlier reply) or
+                   "parallel" (participants answer the round-start transcript
+                   concurrently; replies are merged in completion order)
+        on_delta: Optional callback function(message_id, role, text, model). When
+                  given, provider replies are streamed and on_delta is called per
+                  chunk; on_message still follows with the full text
+        context_policy: Optional dict enabling the token-budgeted context window
+                        (recent turns verbatim, older turns summarised - see
+                        _context_window). None sends the full transcript each turn
+        message_layout: "transcript" (history as one "Conversation so far"
+                        message) or "turns" (one message per prior turn, so
+                        consecutive calls share a cacheable prompt prefix)
+        verdict_mode: how the facilitator's verdict is read - "phrase", "json"
+                      or "classifier" (see src.verdict). The facilitator's reply
+                      is streamed and cut off once its verdict is settled
         
     Returns:
-        Dict with status and final answer
+        Dict with status and final answer (plus context window stats if enabled)
     """
-    import random
-    import time
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    
+    if turn_mode not in TURN_MODES:
+        return {"status": "error", "message": f"Unknown turn_mode: {turn_mode}"}
+    if message_layout not in MESSAGE_LAYOUTS:
+        return {"status": "error", "message": f"Unknown message_layout: {message_layout}"}
+    if verdict_mode not in VERDICT_MODES:
+        return {"status": "error", "message": f"Unknown verdict_mode: {verdict_mode}"}
     
     cards_list = cards if isinstance(cards, list) else json.loads(cards)
     
@@ -468,88 +1280,287 @@ def run_debate_streaming(
     if not cards_list or len(cards_list) < 2:
         return {"status": "error", "message": "Need at least 2 cards"}
     
-    # Find and separate facilitator
-    facilitator = None
-    participants = []
-    
-    for card in cards_list:
-        if card.get("role", "").lower() == "facilitator":
-            facilitator = card
-        else:
-            participants.append(card)
-    
+    facilitator, participants = _split_cards(cards_list)
     if not facilitator:
         return {"status": "error", "message": "No facilitator found"}
     
-    conversation_text = ""
+    transcript = Transcript()
+    window = _context_window(transcript, context_policy)
+    seats = _seats(cards_list)
     final_answer = None
+    rng = debate_rng()
     
-    for round_num in range(max_rounds):
-        random.shuffle(participants)
-        
-        # Each participant speaks
-        for card in participants:
-            provider = card.get("model", "openai")
+    def history(card: dict, upto: Optional[int] = None):
+        if message_layout == "turns":
+            summary, entries = window.select(_card_model(card), upto) if window else ("", transcript.entries(0, upto))
+            return _turn_messages(summary, entries, seats[id(card)])
+        return window.history(_card_model(card), upto) if window else transcript.render(upto)
+    
+    def speak(card: dict, args: Dict[str, Any], detector: Optional[VerdictDetector] = None) -> Dict[str, Any]:
+        if on_delta:
+            message_id = _new_message_id()
+            role, model = args["role"], card.get("model", "unknown")
+            args["on_delta"] = lambda text: on_delta(message_id, role, text, model)
+        if detector:
+            args["on_delta"] = detector.watch(args.get("on_delta"))
+        result = call_llm(**args)
+        result["prompt"] = args["prompt"]
+        if detector and result["status"] == "success":
+            result["verdict"], result["response"] = _facilitator_verdict(detector, result["response"])
+        return result
+    
+    def record(card: dict, result: Dict[str, Any]):
+        if result["status"] == "success":
+            response = result["response"]
+            role = card.get("role", "unknown")
+            model = card.get("model", "unknown")
             
-            result = call_llm(
-                provider=provider,
-                role=card.get("role", "reasoner"),
-                personality=card.get("personality", "analytical"),
-                expertise=card.get("expertise", "general"),
-                puzzle=puzzle,
-                conversation_history=conversation_text,
-                prompt="It is now your turn to speak."
+            # Stream message immediately via callback
+            if on_message:
+                on_message(role, response, model)
+            
+            transcript.append(role, model, response, seats[id(card)], result["prompt"])
+        else:
+            if on_message:
+                on_message("error", result.get("message", "LLM Error"), card.get("model", "unknown"))
+    
+    # A facilitator-only deck has nobody to run in parallel (and a pool needs max_workers >= 1)
+    pool = ThreadPoolExecutor(max_workers=len(participants)) if turn_mode == "parallel" and participants else None
+    tracker = DebateTracker("streaming")
+    outcome = "error"
+    
+    try:
+        for round_num in range(max_rounds):
+            tracker.round()
+            rng.shuffle(participants)
+            
+            if pool:
+                # Everyone answers the transcript as of the round start
+                snapshot = len(transcript)
+                futures = {
+                    pool.submit(speak, card, _participant_args(card, puzzle, history(card, snapshot))): card
+                    for card in participants
+                }
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+            else:
+                # Each participant speaks
+                for card in participants:
+                    record(card, speak(card, _participant_args(card, puzzle, history(card))))
+            
+            # Facilitator speaks
+            fac_result = speak(
+                facilitator,
+                _facilitator_args(facilitator, puzzle, history(facilitator), verdict_mode),
+                VerdictDetector(verdict_mode),
             )
             
-            if result["status"] == "success":
-                response = result["response"]
-                role = card.get("role", "unknown")
-                model = card.get("model", "unknown")
+            if fac_result["status"] == "success":
+                fac_response = fac_result["response"]
                 
-                # Stream message immediately via callback
+                # Stream facilitator message immediately
                 if on_message:
-                    on_message(role, response, model)
+                    on_message("facilitator", fac_response, facilitator.get("model", "unknown"))
+                
+                transcript.append("facilitator", facilitator.get("model", "unknown"), fac_response,
+                                  seats[id(facilitator)], fac_result["prompt"])
                 
-                conversation_text += f"\n[{role.upper()}]: {response}\n"
+                if fac_result["verdict"] == ANSWER:
+                    final_answer = fac_response
+                    break
             else:
                 if on_message:
-                    on_message("error", result.get("message", "LLM Error"), card.get("model", "unknown"))
-            
-            time.sleep(0.3)
+                    on_message("error", fac_result.get("message", "Facilitator Error"), facilitator.get("model", "unknown"))
         
-        # Facilitator speaks
-        fac_result = call_llm(
-            provider=facilitator.get("model", "openai"),
-            role="facilitator",
-            personality=facilitator.get("personality", "decisive"),
-            expertise=facilitator.get("expertise", "leadership"),
-            puzzle=puzzle,
-            conversation_history=conversation_text,
-            prompt="It is now your turn to speak."
-        )
+        outcome = "answer" if final_answer else "max_rounds"
+    finally:
+        tracker.finish(outcome, max_rounds)
+        if pool:
+            pool.shutdown(wait=False)
+    
+    result = {
+        "status": "completed",
+        "final_answer": final_answer
+    }
+    if window:
+        result["context"] = window.stats()
+    return result
+
+
+async def arun_debate(
+    puzzle: str,
+    cards: list,
+    max_rounds: int = 4,
+    on_message: callable = None,
+    turn_mode: str = "sequential",
+    stream: bool = False,
+    on_delta: callable = None,
+    context_policy: Optional[Dict[str, Any]] = None,
+    message_layout: str = "transcript",
+    verdict_mode: str = "phrase",
+):
+    """
+    Native asyncio debate engine - async generator counterpart of run_debate_streaming.
+    
+    Turn order and semantics match run_debate_streaming, but provider calls go
+    through the async SDK clients so a single event loop can drive many
+    debates at once.
+    
+    Args:
+        puzzle: The puzzle/problem to solve
+        cards: List of card configurations (already parsed)
+        max_rounds: Maximum number of debate rounds
+        on_message: Optional callback function(role, message, model) called for each message
+        turn_mode: "sequential" or "parallel" (see run_debate_streaming)
+        stream: Stream provider replies and yield a "delta" event per chunk
+        on_delta: Optional callback function(message_id, role, text, model) called
+                  per chunk (implies stream)
+        context_policy: Optional token-budgeted context window settings (see run_debate_streaming)
+        message_layout: "transcript" or "turns" (see run_debate_streaming)
+        verdict_mode: "phrase", "json" or "classifier" (see run_debate_streaming)
+        
+    Yields:
+        {"type": "delta", "id", "role", "delta", "model"} per streamed chunk,
+        {"type": "message", "id", "role", "message", "model"} for each full message, then one
+        {"type": "result", ...} event carrying the same dict run_debate_streaming returns
+    """
+    
+    stream = stream or on_delta is not None
+    # Turns report chunks and results here; the generator drains it in order
+    turn_events = asyncio.Queue()
+    # Strong references to in-flight turn tasks
+    running = set()
+    
+    def emit(role: str, message: str, model: str, message_id: str) -> Dict[str, Any]:
+        if on_message:
+            on_message(role, message, model)
+        return {"type": "message", "id": message_id, "role": role, "message": message, "model": model}
+    
+    async def take_turn(card: dict, args: Dict[str, Any], detector: Optional[VerdictDetector]):
+        message_id = _new_message_id()
+        
+        def chunk(text: str):
+            turn_events.put_nowait(("delta", card, args["role"], message_id, text))
         
-        if fac_result["status"] == "success":
-            fac_response = fac_result["response"]
+        on_chunk = chunk if stream else None
+        try:
+            result = await acall_llm(**args, on_delta=detector.watch(on_chunk) if detector else on_chunk)
+            result["prompt"] = args["prompt"]
+            if detector and result["status"] == "success":
+                result["verdict"], result["response"] = await _afacilitator_verdict(detector, result["response"])
+        except Exception as e:
+            result = {"status": "error", "message": f"{card.get('model', 'unknown')} turn failed: {e}"}
+        turn_events.put_nowait(("done", card, args["role"], message_id, result))
+    
+    def start_turn(card: dict, args: Dict[str, Any], detector: Optional[VerdictDetector] = None):
+        task = asyncio.ensure_future(take_turn(card, args, detector))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    
+    async def drain(turns: int):
+        """Yield delta/message events until the given number of turns have finished."""
+        while turns:
+            kind, card, role, message_id, payload = await turn_events.get()
+            model = card.get("model", "unknown")
             
-            # Stream facilitator message immediately
-            if on_message:
-                on_message("facilitator", fac_response, facilitator.get("model", "unknown"))
+            if kind == "delta":
+                if on_delta:
+                    on_delta(message_id, role, payload, model)
+                yield {"type": "delta", "id": message_id, "role": role, "delta": payload, "model": model}
+                continue
+            
+            turns -= 1
+            if payload["status"] != "success":
+                yield emit("error", payload.get("message", "LLM Error"), model, message_id)
+                continue
+            
+            transcript.append(role, model, payload["response"], seats[id(card)], payload["prompt"])
+            yield emit(role, payload["response"], model, message_id)
+    
+    if turn_mode not in TURN_MODES:
+        yield {"type": "result", "status": "error", "message": f"Unknown turn_mode: {turn_mode}"}
+        return
+    if message_layout not in MESSAGE_LAYOUTS:
+        yield {"type": "result", "status": "error", "message": f"Unknown message_layout: {message_layout}"}
+        return
+    if verdict_mode not in VERDICT_MODES:
+        yield {"type": "result", "status": "error", "message": f"Unknown verdict_mode: {verdict_mode}"}
+        return
+    
+    cards_list = cards if isinstance(cards, list) else json.loads(cards)
+    
+    # Validate cards
+    if not cards_list or len(cards_list) < 2:
+        yield {"type": "result", "status": "error", "message": "Need at least 2 cards"}
+        return
+    
+    facilitator, participants = _split_cards(cards_list)
+    if not facilitator:
+        yield {"type": "result", "status": "error", "message": "No facilitator found"}
+        return
+    
+    transcript = Transcript()
+    window = _context_window(transcript, context_policy)
+    seats = _seats(cards_list)
+    final_answer = None
+    rng = debate_rng()
+    
+    async def history(card: dict, upto: Optional[int] = None):
+        if message_layout == "turns":
+            summary, entries = await window.aselect(_card_model(card), upto) if window else ("", transcript.entries(0, upto))
+            return _turn_messages(summary, entries, seats[id(card)])
+        return await window.ahistory(_card_model(card), upto) if window else transcript.render(upto)
+    
+    tracker = DebateTracker("async")
+    outcome = "error"
+    
+    try:
+        for round_num in range(max_rounds):
+            tracker.round()
+            rng.shuffle(participants)
+            
+            if turn_mode == "parallel":
+                # Everyone answers the transcript as of the round start
+                snapshot = len(transcript)
+                for card in participants:
+                    start_turn(card, _participant_args(card, puzzle, await history(card, snapshot)))
+                async for event in drain(len(participants)):
+                    yield event
+            else:
+                # Each participant speaks
+                for card in participants:
+                    start_turn(card, _participant_args(card, puzzle, await history(card)))
+                    async for event in drain(1):
+                        yield event
             
-            conversation_text += f"\n[FACILITATOR]: {fac_response}\n"
+            # Facilitator speaks
+            detector = VerdictDetector(verdict_mode)
+            start_turn(facilitator, _facilitator_args(facilitator, puzzle, await history(facilitator), verdict_mode), detector)
+            async for event in drain(1):
+                yield event
             
-            if "that is the answer" in fac_response.lower():
-                final_answer = fac_response
+            if event["type"] == "message" and detector.verdict == ANSWER:
+                final_answer = event["message"]
                 break
-        else:
-            if on_message:
-                on_message("error", fac_result.get("message", "Facilitator Error"), facilitator.get("model", "unknown"))
         
-        time.sleep(0.3)
+        outcome = "answer" if final_answer else "max_rounds"
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    finally:
+        tracker.finish(outcome, max_rounds)
+        # Consumer stopped early: don't leave turns running
+        for task in list(running):
+            task.cancel()
     
-    return {
+    result = {
+        "type": "result",
         "status": "completed",
         "final_answer": final_answer
     }
+    if window:
+        result["context"] = window.stats()
+    yield result
 
 
 # =============================================================================
@@ -562,6 +1573,7 @@ async def send_frontend_message(
     role: str,
     message: str,
     colour: str = "#FFFFFF",
+    debate_id: Optional[str] = None,
     tool_context: Optional[Any] = None,
     tool_config: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
@@ -573,6 +1585,7 @@ async def send_frontend_message(
         role: The role/speaker name (e.g., "facilitator", "critic", "system")
         message: The message content to display
         colour: Hex color code for the message (default: white)
+        debate_id: Frontend debate session to push the message to
     
     Returns:
         A dictionary with the status of the message send operation.
@@ -585,7 +1598,8 @@ async def send_frontend_message(
             json={
                 "role": role,
                 "message": message,
-                "colour": colour
+                "colour": colour,
+                "debate_id": debate_id
             },
             timeout=5
         )
@@ -0,0 +1,346 @@
+"""
+Hedged Requests
+Cuts the latency tail of slow turns: if a call has produced no first token
+after a delay, a duplicate request goes to the same model (or a designated
+backup) and whichever starts answering first is kept; the other is cancelled.
+
+Opt-in with environment variables (or per call_llm call, see hedge_policy):
+    LLM_HEDGE_AFTER=1.5           hedge after 1.5s without a first token, or
+    LLM_HEDGE_AFTER=p95           after the model's recent p95 time to first token
+    LLM_HEDGE_BACKUP="llama=qwen;gemini=openai:gpt-4o-mini"
+                                  duplicate to another model (default: the same one)
+    LLM_HEDGE_MIN_SAMPLES=20      calls observed before a pNN delay is trusted
+    LLM_HEDGE_MIN_DELAY=0.2       never hedge sooner than this (seconds)
+    LLM_HEDGE_LEG_TIMEOUT=20      read timeout (seconds) for requests raced on threads
+
+A threaded loser is only stopped at its next chunk: one still waiting for its
+first byte holds its thread and pooled connection until the provider answers
+or LLM_HEDGE_LEG_TIMEOUT passes (instead of the much longer client timeout).
+Async losers are cancelled outright.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.metrics import REGISTRY
+
+
+HEDGE_AFTER = os.environ.get("LLM_HEDGE_AFTER", "")
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", "0.2"))
+HEDGE_LEG_TIMEOUT = float(os.environ.get("LLM_HEDGE_LEG_TIMEOUT", "20"))
+# Recent first-token times kept per model
+HEDGE_WINDOW = 200
+
+HEDGES_FIRED = REGISTRY.counter("llm_hedges_fired_total", "Duplicate requests sent for slow calls", ("provider", "model"))
+HEDGES_WON = REGISTRY.counter("llm_hedges_won_total", "Hedged calls answered by the duplicate", ("provider", "model"))
+
+
+class HedgeCancelled(Exception):
+    """Raised inside the losing request of a hedged call to stop it."""
+    kind = "fatal"
+    cancelled = True
+
+
+# The leg a hedged_call thread is running, if any
+_current_leg: ContextVar[Optional["_Leg"]] = ContextVar("hedge_leg", default=None)
+
+
+def leg_cancelled() -> bool:
+    """True inside a hedged request that has lost its race (whatever it raises now is not the provider's fault)."""
+    leg = _current_leg.get()
+    return leg is not None and leg.cancelled
+
+
+def leg_timeout() -> Optional[float]:
+    """Read timeout to use for the request being made, when it is a threaded hedge leg (else None)."""
+    return HEDGE_LEG_TIMEOUT if _current_leg.get() is not None else None
+
+
+# ---- first-token latency per model ------------------------------------------
+
+_ttft: Dict[Tuple[str, str], Deque[float]] = {}
+_ttft_lock = threading.Lock()
+
+
+def observe_ttft(backend: str, model: str, seconds: float):
+    with _ttft_lock:
+        _ttft.setdefault((backend, model), deque(maxlen=HEDGE_WINDOW)).append(seconds)
+
+
+def ttft_percentile(backend: str, model: str, percentile: float) -> Optional[float]:
+    """Recent time to first token at `percentile` (0-100), or None until enough calls were seen."""
+    with _ttft_lock:
+        samples = sorted(_ttft.get((backend, model), ()))
+    if len(samples) < max(HEDGE_MIN_SAMPLES, 1):
+        return None
+    index = min(int(len(samples) * percentile / 100), len(samples) - 1)
+    return samples[index]
+
+
+# ---- policy ------------------------------------------------------------------
+
+def _parse_backups(spec: str) -> Dict[str, str]:
+    """"llama=qwen;gemini=openai:gpt-4o-mini" -> {"llama": "qwen", "gemini": "openai:gpt-4o-mini"}"""
+    backups = {}
+    for part in spec.split(";"):
+        name, _, backup = part.partition("=")
+        if name.strip() and backup.strip():
+            backups[name.strip().lower()] = backup.strip()
+    return backups
+
+
+HEDGE_BACKUP = _parse_backups(os.environ.get("LLM_HEDGE_BACKUP", ""))
+
+
+class HedgePolicy:
+    """
+    When to hedge and where to.
+
+    HedgePolicy(after, backup=None)
+
+    parameters:
+        after: seconds without a first token (float), or "pNN" for the
+            model's recent NNth percentile time to first token
+        backup: provider name (optionally "provider:model") for the
+            duplicate; None uses LLM_HEDGE_BACKUP, then the same model
+    """
+
+    def __init__(self, after, backup: Optional[str] = None):
+        if isinstance(after, str) and after.lower().startswith("p"):
+            self.percentile = float(after[1:])
+            self.after = None
+        else:
+            self.percentile = None
+            self.after = float(after)
+        self.backup = backup
+
+    def delay(self, backend: str, model: str) -> Optional[float]:
+        """Seconds to wait for a first token before hedging, or None to not hedge."""
+        if self.percentile is None:
+            return max(self.after, HEDGE_MIN_DELAY)
+        seconds = ttft_percentile(backend, model, self.percentile)
+        return None if seconds is None else max(seconds, HEDGE_MIN_DELAY)
+
+    def backup_for(self, provider: str) -> Optional[str]:
+        return self.backup or HEDGE_BACKUP.get(provider)
+
+
+def hedge_policy(spec=None) -> Optional[HedgePolicy]:
+    """
+    The policy for one call: spec None uses LLM_HEDGE_AFTER, False turns
+    hedging off, a number or "pNN" sets the delay, and a dict gives
+    {"after": ..., "backup": ...}.
+    """
+    if spec is None:
+        spec = HEDGE_AFTER
+    if spec is False or spec == "" or spec == "0":
+        return None
+    if isinstance(spec, HedgePolicy):
+        return spec
+    if isinstance(spec, dict):
+        return HedgePolicy(spec.get("after", HEDGE_AFTER or "p95"), spec.get("backup"))
+    return HedgePolicy(spec)
+
+
+# ---- racing ------------------------------------------------------------------
+
+class _Leg:
+    """One request in a hedged call."""
+
+    def __init__(self, race: "_Race", backend: str, model: str):
+        self.race = race
+        self.backend = backend
+        self.model = model
+        self.started = time.perf_counter()
+        self.first_token = False
+        self.cancelled = False
+        self.done = False
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.task = None
+
+    def on_delta(self, text: str):
+        if self.cancelled:
+            raise HedgeCancelled()
+        if not self.first_token:
+            self.first_token = True
+            observe_ttft(self.backend, self.model, time.perf_counter() - self.started)
+            if not self.race.claim(self):
+                self.cancelled = True
+                raise HedgeCancelled()
+        if self.race.on_delta:
+            self.race.on_delta(text)
+
+
+class _Race:
+    """Shared state of a hedged call: the first leg to produce output owns it."""
+
+    def __init__(self, on_delta: Optional[Callable[[str], Any]]):
+        self.on_delta = on_delta
+        self.legs: List[_Leg] = []
+        self.owner: Optional[_Leg] = None
+        self.cond = threading.Condition()
+        self.changed: Optional[asyncio.Event] = None
+
+    def _notify(self):
+        self.cond.notify_all()
+        if self.changed is not None:
+            self.changed.set()
+
+    def claim(self, leg: _Leg) -> bool:
+        with self.cond:
+            if self.owner is None:
+                self.owner = leg
+                for other in self.legs:
+                    if other is not leg:
+                        other.cancelled = True
+                        if other.task is not None:
+                            other.task.cancel()
+                self._notify()
+            return self.owner is leg
+
+    def finish(self, leg: _Leg, result=None, error: Optional[BaseException] = None):
+        with self.cond:
+            leg.done, leg.result, leg.error = True, result, error
+            self._notify()
+        if error is None:
+            # A reply that never streamed still counts as an answer
+            self.claim(leg)
+
+    def settled(self) -> bool:
+        if self.owner is not None:
+            return self.owner.done
+        return all(leg.done for leg in self.legs)
+
+    def outcome(self) -> Tuple[int, Any]:
+        """(index of the winning leg, its result); raises if every leg failed."""
+        if self.owner is not None:
+            if self.owner.error is not None:
+                raise self.owner.error
+            return self.legs.index(self.owner), self.owner.result
+        errors = [leg.error for leg in self.legs if not isinstance(leg.error, HedgeCancelled)]
+        raise (errors or [self.legs[0].error])[0]
+
+    def close(self):
+        """Cancel whatever is still running and note how long losers had waited."""
+        with self.cond:
+            for leg in self.legs:
+                if not leg.done and leg is not self.owner:
+                    leg.cancelled = True
+                    if leg.task is not None:
+                        leg.task.cancel()
+                if leg.cancelled and not leg.first_token:
+                    # Censored sample: it would have taken at least this long
+                    observe_ttft(leg.backend, leg.model, time.perf_counter() - leg.started)
+
+
+Attempt = Tuple[str, str, Callable[[Callable[[str], Any]], Any]]
+
+
+def hedged_call(primary: Attempt, backup: Attempt, delay: Optional[float],
+                on_delta: Optional[Callable[[str], Any]] = None) -> Tuple[int, Any]:
+    """
+    Run primary = (backend, model, fn), where fn(on_delta) makes the call and
+    must stream through on_delta. If it has produced no output after `delay`
+    seconds (None = never), also run backup. Returns (0 or 1, result) for
+    the request that produced output first; the other is cancelled at its
+    next chunk (or times out after LLM_HEDGE_LEG_TIMEOUT without one). Each
+    request runs on its own thread.
+    """
+    race = _Race(on_delta)
+    if delay is None:
+        # Nothing to race against - just watch the first token
+        backend, model, fn = primary
+        leg = _Leg(race, backend, model)
+        race.legs.append(leg)
+        return 0, fn(leg.on_delta)
+
+    def start(attempt: Attempt) -> _Leg:
+        backend, model, fn = attempt
+        leg = _Leg(race, backend, model)
+        race.legs.append(leg)
+
+        def run():
+            _current_leg.set(leg)
+            try:
+                race.finish(leg, fn(leg.on_delta))
+            except BaseException as e:
+                race.finish(leg, error=e)
+
+        threading.Thread(target=run, name=f"hedge-{backend}", daemon=True).start()
+        return leg
+
+    try:
+        with race.cond:
+            start(primary)
+            if not race.cond.wait_for(lambda: race.owner is not None or race.settled(), timeout=delay):
+                HEDGES_FIRED.inc(provider=primary[0], model=primary[1])
+                start(backup)
+            race.cond.wait_for(race.settled)
+        index, result = race.outcome()
+    finally:
+        race.close()
+    if index == 1:
+        HEDGES_WON.inc(provider=primary[0], model=primary[1])
+    return index, result
+
+
+async def ahedged_call(primary: Tuple[str, str, Callable[[Callable[[str], Any]], Awaitable[Any]]],
+                       backup: Tuple[str, str, Callable[[Callable[[str], Any]], Awaitable[Any]]],
+                       delay: Optional[float], on_delta: Optional[Callable[[str], Any]] = None) -> Tuple[int, Any]:
+    """Async version of hedged_call: requests are tasks and the loser is cancelled outright."""
+    race = _Race(on_delta)
+    if delay is None:
+        backend, model, fn = primary
+        leg = _Leg(race, backend, model)
+        race.legs.append(leg)
+        return 0, await fn(leg.on_delta)
+    race.changed = asyncio.Event()
+
+    def start(attempt) -> _Leg:
+        backend, model, fn = attempt
+        leg = _Leg(race, backend, model)
+        race.legs.append(leg)
+
+        async def run():
+            try:
+                race.finish(leg, await fn(leg.on_delta))
+            except asyncio.CancelledError:
+                race.finish(leg, error=HedgeCancelled())
+            except Exception as e:
+                race.finish(leg, error=e)
+
+        leg.task = asyncio.ensure_future(run())
+        return leg
+
+    async def wait(predicate, timeout=None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not predicate():
+            race.changed.clear()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(race.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return predicate()
+        return True
+
+    try:
+        start(primary)
+        if not await wait(lambda: race.owner is not None or race.settled(), delay):
+            HEDGES_FIRED.inc(provider=primary[0], model=primary[1])
+            start(backup)
+        await wait(race.settled)
+        index, result = race.outcome()
+    finally:
+        race.close()
+    if index == 1:
+        HEDGES_WON.inc(provider=primary[0], model=primary[1])
+    return index, result
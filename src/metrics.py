@@ -0,0 +1,322 @@
+"""
+Metrics
+Process-wide counters, gauges and histograms for provider calls and debates,
+rendered in the Prometheus text exposition format (served by app_sam.py at
+/api/metrics). Standard library only.
+"""
+
+import time
+import asyncio
+import threading
+import contextvars
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _empty(self) -> list:
+        """An unlabelled metric is reported as 0 before its first update."""
+        return [] if self.labelnames else [((), 0)]
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items()) or self._empty()
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """A settable value, or a live one when built with fn (called at render time)."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._fn = fn
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        if self._fn is not None:
+            return self._fn()
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        if self._fn is not None:
+            items = [((), self._fn())]
+        else:
+            with self._lock:
+                items = sorted(self._values.items()) or self._empty()
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [per-bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), fn=None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, fn))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CALL_LABELS = ("provider", "model", "role")
+
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "Provider calls by outcome", CALL_LABELS + ("status",))
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "Failed provider calls by error type", CALL_LABELS + ("error",))
+LLM_RETRIES = REGISTRY.counter("llm_retries_total", "Provider call retries", CALL_LABELS)
+LLM_LATENCY = REGISTRY.histogram("llm_request_duration_seconds", "Provider call latency", CALL_LABELS)
+LLM_TTFT = REGISTRY.histogram("llm_time_to_first_token_seconds", "Time to first streamed token", CALL_LABELS)
+LLM_PROMPT_TOKENS = REGISTRY.counter("llm_prompt_tokens_total", "Prompt tokens reported by providers", CALL_LABELS)
+LLM_COMPLETION_TOKENS = REGISTRY.counter("llm_completion_tokens_total", "Completion tokens reported by providers", CALL_LABELS)
+
+DEBATES_STARTED = REGISTRY.counter("debates_started_total", "Debates started", ("engine",))
+DEBATES_FINISHED = REGISTRY.counter("debates_finished_total", "Debates finished by outcome", ("engine", "outcome"))
+DEBATE_ROUNDS = REGISTRY.counter("debate_rounds_total", "Debate rounds run", ("engine",))
+DEBATE_EARLY_TERMINATIONS = REGISTRY.counter(
+    "debate_early_terminations_total", "Debates the facilitator concluded before the round limit", ("engine",)
+)
+ACTIVE_DEBATES = REGISTRY.gauge("active_debates", "Debates currently running in this process")
+DEBATE_QUEUE_DEPTH = REGISTRY.gauge("debate_queue_depth", "Debates waiting to start")
+
+
+# ---- provider calls ----------------------------------------------------------
+
+_current_call: "contextvars.ContextVar[Optional[CallTracker]]" = contextvars.ContextVar("current_call", default=None)
+
+
+class CallTracker:
+    """
+    Records one provider call. Use as a context manager around the call:
+
+        with CallTracker("groq", model, role, on_delta) as call:
+            text = backend(messages, model, call.on_delta)
+
+    Latency, time to first token (when streaming), usage (see record_usage)
+    and errors are recorded on exit.
+    """
+
+    def __init__(self, provider: str, model: str, role: str = "", on_delta: Optional[Callable] = None):
+        self.labels = {"provider": provider, "model": model, "role": role or "unknown"}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.first_token_at: Optional[float] = None
+        self._on_delta = on_delta
+        self._start = 0.0
+        self._token = None
+
+    @property
+    def on_delta(self) -> Optional[Callable]:
+        if self._on_delta is None:
+            return None
+
+        def stamped(text):
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self._on_delta(text)
+
+        return stamped
+
+    def __enter__(self) -> "CallTracker":
+        self._start = time.perf_counter()
+        self._token = _current_call.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_call.reset(self._token)
+        labels = self.labels
+        LLM_LATENCY.observe(time.perf_counter() - self._start, **labels)
+        if self.first_token_at is not None:
+            LLM_TTFT.observe(self.first_token_at - self._start, **labels)
+        if self.prompt_tokens:
+            LLM_PROMPT_TOKENS.inc(self.prompt_tokens, **labels)
+        if self.completion_tokens:
+            LLM_COMPLETION_TOKENS.inc(self.completion_tokens, **labels)
+
+        if exc is not None and (getattr(exc, "cancelled", False) or isinstance(exc, asyncio.CancelledError)):
+            # Abandoned by the caller (debate stopped, lost a hedge) - not a provider error
+            LLM_REQUESTS.inc(status="cancelled", **labels)
+            return False
+
+        if exc_type is not None:
+            LLM_ERRORS.inc(error=exc_type.__name__, **labels)
+        LLM_REQUESTS.inc(status="error" if exc_type is not None else "ok", **labels)
+        return False
+
+
+def record_usage(prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    """Attach provider-reported token usage to the call in progress (no-op outside one)."""
+    call = _current_call.get()
+    if call is not None:
+        call.prompt_tokens += prompt_tokens or 0
+        call.completion_tokens += completion_tokens or 0
+
+
+def record_retry():
+    """Count a retry of the call in progress."""
+    call = _current_call.get()
+    if call is not None:
+        LLM_RETRIES.inc(**call.labels)
+
+
+# ---- debates -----------------------------------------------------------------
+
+class DebateTracker:
+    """
+    Debate-level counters for one debate:
+
+        tracker = DebateTracker("streaming")   # counts the start
+        tracker.round()                        # once per round
+        tracker.finish("answer", max_rounds)   # or "max_rounds" / "error" / "cancelled"
+    """
+
+    def __init__(self, engine: str):
+        self.engine = engine
+        self.rounds = 0
+        self.finished = False
+        DEBATES_STARTED.inc(engine=engine)
+        ACTIVE_DEBATES.inc()
+
+    def round(self):
+        self.rounds += 1
+        DEBATE_ROUNDS.inc(engine=self.engine)
+
+    def finish(self, outcome: str, max_rounds: Optional[int] = None):
+        if self.finished:
+            return
+        self.finished = True
+        ACTIVE_DEBATES.dec()
+        DEBATES_FINISHED.inc(engine=self.engine, outcome=outcome)
+        if outcome == "answer" and max_rounds is not None and self.rounds < max_rounds:
+            DEBATE_EARLY_TERMINATIONS.inc(engine=self.engine)
+
+
+def render() -> str:
+    """All metrics in Prometheus text format."""
+    return REGISTRY.render()
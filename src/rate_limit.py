@@ -0,0 +1,276 @@
+"""
+Provider Rate Limiting
+Process-wide token buckets per (provider, API key) for requests/minute and
+tokens/minute, shared by every debate. A call only waits when going ahead
+would exceed a limit, and a provider's retry-after pauses that key for
+everyone - instead of fixed sleeps after every turn.
+
+Limits default to DEFAULT_LIMITS and are overridable per provider, e.g.
+LLM_RATE_LIMIT_GROQ_RPM=30 LLM_RATE_LIMIT_GROQ_TPM=12000 (0 = unlimited).
+LLM_RATE_LIMITS=0 turns limiting off.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import threading
+import contextvars
+import email.utils
+from typing import Dict, List, Optional, Tuple
+
+from src.metrics import REGISTRY
+
+
+# provider -> (requests per minute, tokens per minute); 0 = unlimited
+DEFAULT_LIMITS = {
+    "openai": (500, 30000),
+    "groq": (30, 12000),
+    "gemini": (10, 250000),
+    "deepseek": (0, 0),
+    "openrouter": (20, 0),
+}
+
+API_KEY_ENV = {
+    "openai": "OPENAI_API_KEY",
+    "groq": "GROQ_API_KEY",
+    "gemini": "GEMINI_API_KEY",
+    "deepseek": "DEEPSEEK_API_KEY",
+    "openrouter": "OPENROUTER_API_KEY",
+}
+
+RATE_LIMITS_ENABLED = os.environ.get("LLM_RATE_LIMITS", "1") != "0"
+
+RATE_LIMIT_WAITS = REGISTRY.counter("llm_rate_limit_waits_total", "Calls delayed by the rate limiter", ("provider",))
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.counter(
+    "llm_rate_limit_wait_seconds_total", "Time calls spent waiting on the rate limiter", ("provider",)
+)
+
+# Completion tokens reserved per call until the provider reports real usage
+EXPECTED_COMPLETION_TOKENS = 200
+
+
+def estimate_request_tokens(messages: List[Dict[str, str]]) -> int:
+    """Rough prompt size (~4 characters per token) plus the expected reply."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + 1 + EXPECTED_COMPLETION_TOKENS
+
+
+def _limits_for(provider: str) -> Tuple[float, float]:
+    rpm, tpm = DEFAULT_LIMITS.get(provider, (0, 0))
+    prefix = f"LLM_RATE_LIMIT_{provider.upper()}_"
+    return (
+        float(os.environ.get(prefix + "RPM", rpm)),
+        float(os.environ.get(prefix + "TPM", tpm)),
+    )
+
+
+class TokenBucket:
+    """
+    Holds up to `per_minute` units, refilled continuously at per_minute/60 per second.
+
+    reserve(n) takes n units right away - the balance may go negative - and
+    returns how long the caller must wait before its reservation is covered.
+    Waiting callers are therefore served in order without a background thread.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A single request larger than the bucket could never fit
+        amount = min(amount, self.capacity)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount: float, now: float):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Requests/minute and tokens/minute limits for one (provider, API key).
+
+    with limiter.acquire(tokens) as slot:          # sleeps if needed
+        ...call the provider...
+        slot.settle(actual_tokens)                  # optional: correct the estimate
+
+    async with limiter.acquire(tokens) as slot:    # same, without blocking the loop
+        ...
+    """
+
+    def __init__(self, provider: str, rpm: float = 0, tpm: float = 0):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens; returns seconds to wait first."""
+        now = time.monotonic()
+        with self._lock:
+            delay = max(self.blocked_until - now, 0.0)
+            if self.requests:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            if delay > 0:
+                self.waits += 1
+                self.waited_seconds += delay
+        if delay > 0:
+            RATE_LIMIT_WAITS.inc(provider=self.provider)
+            RATE_LIMIT_WAIT_SECONDS.inc(delay, provider=self.provider)
+        return delay
+
+    def settle(self, reserved: int, used: int):
+        """Give back (or take more of) the token estimate once real usage is known."""
+        if not self.tokens or used <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if used < reserved:
+                self.tokens.refund(reserved - used, now)
+            else:
+                self.tokens.reserve(used - reserved, now)
+
+    def block_for(self, seconds: float):
+        """Pause this key (e.g. after a 429 with retry-after)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: int) -> "Reservation":
+        return Reservation(self, tokens)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"waits": self.waits, "waited_seconds": round(self.waited_seconds, 3)}
+
+
+_current: "contextvars.ContextVar[Optional[Reservation]]" = contextvars.ContextVar("rate_limit_slot", default=None)
+
+
+class Reservation:
+    """One call's slot with a RateLimiter (sync or async context manager)."""
+
+    def __init__(self, limiter: Optional[RateLimiter], tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self._token = None
+
+    def settle(self, used: int):
+        if self.limiter:
+            self.limiter.settle(self.tokens, used)
+
+    def _exit(self, exc):
+        _current.reset(self._token)
+        if exc is not None:
+            note_rate_limit(exc, self.limiter)
+
+    def __enter__(self) -> "Reservation":
+        if self.limiter:
+            delay = self.limiter.reserve(self.tokens)
+            if delay > 0:
+                time.sleep(delay)
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._exit(exc)
+        return False
+
+    async def __aenter__(self) -> "Reservation":
+        if self.limiter:
+            delay = self.limiter.reserve(self.tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._token = _current.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._exit(exc)
+        return False
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a provider error's retry-after header, if it has one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        # HTTP-date form
+        when = email.utils.parsedate_to_datetime(value)
+        return max(when.timestamp() - time.time(), 0.0) if when else None
+
+
+def note_rate_limit(exc: BaseException, limiter: Optional[RateLimiter] = None):
+    """
+    Honour a provider's retry-after: pause the key of the call in progress
+    (or `limiter`) for everyone. Safe to call with any exception.
+    """
+    seconds = retry_after(exc)
+    if seconds is None:
+        return
+    if limiter is None:
+        slot = _current.get()
+        limiter = slot.limiter if slot else None
+    if limiter is not None:
+        limiter.block_for(seconds)
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(provider: str, api_key: Optional[str] = None) -> Optional[RateLimiter]:
+    """The shared limiter for provider + API key (from the environment if not given)."""
+    if not RATE_LIMITS_ENABLED:
+        return None
+    if api_key is None:
+        api_key = os.environ.get(API_KEY_ENV.get(provider, ""), "")
+
+    key = (provider, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16])
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limiter = _limiters[key] = RateLimiter(provider, *_limits_for(provider))
+    return limiter
+
+
+def acquire(provider: str, messages: List[Dict[str, str]], api_key: Optional[str] = None) -> Reservation:
+    """Reservation for one call to provider with these messages (no-op when limiting is off)."""
+    return Reservation(limiter_for(provider, api_key), estimate_request_tokens(messages))
+
+
+def limiter_stats() -> Dict[str, Dict[str, float]]:
+    with _limiters_lock:
+        limiters = list(_limiters.items())
+    return {f"{provider}:{digest[:6]}": limiter.stats() for (provider, digest), limiter in limiters}
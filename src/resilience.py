@@ -0,0 +1,301 @@
+"""
+Provider Resilience
+Retries, per-provider circuit breakers and model failover for LLM calls.
+
+Failures are classified first:
+    rate_limit  429s - retried after the provider's retry-after (or backoff)
+    transient   timeouts, dropped connections, 5xx - retried with exponential
+                backoff and full jitter, and counted by the circuit breaker
+    fatal       bad requests, auth errors, missing keys - never retried
+
+A provider whose breaker is open fails fast with CircuitOpen until its
+cooldown ends; then one probe call decides whether it closes again. Callers
+(call_llm) fail over to the card's alternate models when a call gives up.
+
+Tuned with LLM_RETRY_ATTEMPTS, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY,
+LLM_BREAKER_THRESHOLD and LLM_BREAKER_COOLDOWN.
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.hedging import leg_cancelled
+from src.metrics import REGISTRY, record_retry
+from src.rate_limit import retry_after
+
+
+RETRY_ATTEMPTS = int(os.environ.get("LLM_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", "8"))
+BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+
+RATE_LIMIT = "rate_limit"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+BREAKER_OPEN = REGISTRY.gauge("llm_circuit_open", "1 while a provider's circuit breaker is open", ("provider",))
+BREAKER_TRIPS = REGISTRY.counter("llm_circuit_trips_total", "Times a provider's circuit breaker opened", ("provider",))
+FAILOVERS = REGISTRY.counter("llm_failovers_total", "Calls handed to an alternate model", ("provider", "fallback"))
+
+# Exception class names (any SDK) that mean the request may succeed if repeated
+_TRANSIENT_NAMES = (
+    "Timeout", "TimeoutException", "APITimeoutError", "ReadTimeout", "ConnectTimeout", "TimeoutError",
+    "APIConnectionError", "ConnectionError", "ConnectError", "NetworkError", "RemoteProtocolError",
+    "ServerError", "InternalServerError", "ServiceUnavailableError", "EmptyResponse",
+)
+
+
+class ProviderError(Exception):
+    """A provider call that failed without an SDK exception (missing key, empty reply, ...)."""
+
+    def __init__(self, message: str, kind: str = FATAL):
+        super().__init__(message)
+        self.kind = kind
+
+
+class EmptyResponse(ProviderError):
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} returned an empty response", TRANSIENT)
+
+
+class CircuitOpen(ProviderError):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+    def __init__(self, provider: str, seconds: float):
+        super().__init__(f"{provider} is unavailable (circuit open, retrying in {seconds:.0f}s)", TRANSIENT)
+        self.provider = provider
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for value in (
+        getattr(exc, "status_code", None),
+        getattr(exc, "code", None),
+        getattr(getattr(exc, "response", None), "status_code", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def classify(exc: BaseException) -> str:
+    """rate_limit, transient or fatal for an exception raised by a provider call."""
+    kind = getattr(exc, "kind", None)
+    if kind in (RATE_LIMIT, TRANSIENT, FATAL):
+        return kind
+
+    status = _status_code(exc)
+    if status == 429:
+        return RATE_LIMIT
+    if status is not None:
+        return TRANSIENT if status in (408, 409) or status >= 500 else FATAL
+
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    names.add(getattr(exc, "type_name", ""))
+    if "RateLimitError" in names:
+        return RATE_LIMIT
+    if names.intersection(_TRANSIENT_NAMES):
+        return TRANSIENT
+    return FATAL
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one provider.
+
+    closed     calls go through; BREAKER_THRESHOLD transient failures in a row open it
+    open       calls fail fast with CircuitOpen for BREAKER_COOLDOWN seconds
+    half_open  one probe call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, provider: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.provider = provider
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go ahead now."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpen(self.provider, max(remaining, 0.0))
+
+    def record(self, kind: Optional[str]):
+        """Note a call's outcome: None for success, else its classify() kind."""
+        with self._lock:
+            self._probing = False
+            if kind != TRANSIENT:
+                # The provider answered - even a 4xx or 429 means it is up
+                self.failures = 0
+                if self.state != "closed":
+                    self.state = "closed"
+                    BREAKER_OPEN.set(0, provider=self.provider)
+                return
+
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.threshold > 0):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                BREAKER_OPEN.set(1, provider=self.provider)
+                BREAKER_TRIPS.inc(provider=self.provider)
+
+    def release(self):
+        """The call was abandoned (cancelled) before the provider answered."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(provider: str) -> CircuitBreaker:
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(provider, CircuitBreaker(provider))
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.provider: b.stats() for b in breakers}
+
+
+def _retry_delay(exc: BaseException, kind: str, attempt: int, streamed: bool) -> Optional[float]:
+    """Seconds to wait before retrying, or None to give up."""
+    if kind == FATAL or attempt >= RETRY_ATTEMPTS or streamed or isinstance(exc, CircuitOpen):
+        # Once text has been streamed to the caller a retry would repeat it
+        return None
+    delay = backoff(attempt)
+    if kind == RATE_LIMIT:
+        wait = retry_after(exc)
+        if wait is not None:
+            if wait > RETRY_MAX_DELAY:
+                # Better to fail over than to hold the turn this long
+                return None
+            delay = max(delay, wait)
+    return delay
+
+
+def call_with_retries(provider: str, attempt: Callable[[], Any], streamed: Callable[[], bool] = lambda: False) -> Any:
+    """
+    Run attempt() with retries and the provider's circuit breaker.
+    streamed() should say whether any output has reached the caller yet.
+    Raises the last error (or CircuitOpen) when it gives up.
+    """
+    breaker = breaker_for(provider)
+    tries = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = attempt()
+        except Exception as e:
+            if getattr(e, "cancelled", False) or leg_cancelled():
+                # A hedged request that lost its race says nothing about the provider
+                breaker.release()
+                raise
+            kind = classify(e)
+            breaker.record(kind)
+            tries += 1
+            delay = _retry_delay(e, kind, tries, streamed())
+            if delay is None:
+                raise
+            record_retry()
+            time.sleep(delay)
+            continue
+        breaker.record(None)
+        return result
+
+
+async def acall_with_retries(provider: str, attempt: Callable[[], Awaitable[Any]],
+                             streamed: Callable[[], bool] = lambda: False) -> Any:
+    """Async version of call_with_retries."""
+    breaker = breaker_for(provider)
+    tries = 0
+    while True:
+        breaker.before_call()
+        try:
+            result = await attempt()
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if getattr(e, "cancelled", False):
+                breaker.release()
+                raise
+            kind = classify(e)
+            breaker.record(kind)
+            tries += 1
+            delay = _retry_delay(e, kind, tries, streamed())
+            if delay is None:
+                raise
+            record_retry()
+            await asyncio.sleep(delay)
+            continue
+        breaker.record(None)
+        return result
+
+
+def _parse_failover(spec: str) -> Dict[str, List[str]]:
+    """"llama=qwen,openai;gemini=openai" -> {"llama": ["qwen", "openai"], "gemini": ["openai"]}"""
+    routes = {}
+    for part in spec.split(";"):
+        name, _, fallbacks = part.partition("=")
+        if name.strip() and fallbacks.strip():
+            routes[name.strip().lower()] = [f.strip() for f in fallbacks.split(",") if f.strip()]
+    return routes
+
+
+# Default alternates per provider name, e.g. LLM_FAILOVER="llama=qwen;gemini=openai"
+FAILOVER = _parse_failover(os.environ.get("LLM_FAILOVER", ""))
+
+
+def failover_chain(provider: str, fallbacks=None) -> List[str]:
+    """
+    Provider names to try in order: the card's own, then its fallbacks
+    (a name, a list of names, or None for the LLM_FAILOVER default).
+    A fallback may pin a model as "provider:model".
+    """
+    if fallbacks is None:
+        fallbacks = FAILOVER.get(provider, [])
+    elif isinstance(fallbacks, str):
+        fallbacks = [fallbacks]
+
+    chain = [provider]
+    for name in fallbacks:
+        name = name.strip()
+        if name and name not in chain:
+            chain.append(name)
+    return chain
+
+
+def note_failover(provider: str, fallback: str):
+    FAILOVERS.inc(provider=provider, fallback=fallback)
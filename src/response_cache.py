@@ -0,0 +1,228 @@
+"""
+LLM Response Cache
+Content-addressed memoisation for debate LLM calls. A request is keyed by a
+hash of its normalised (backend, model, messages); replies are kept in an
+in-memory LRU and, optionally, in an on-disk tier that survives restarts so
+re-running the same puzzle and deck costs nothing.
+
+Off by default - set LLM_CACHE=1 to enable.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE", "0") == "1"
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1024"))
+# Empty = memory tier only
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", "")
+LLM_CACHE_DISK_MB = float(os.environ.get("LLM_CACHE_DISK_MB", "100"))
+# Seconds; 0 = entries never expire
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", "86400"))
+
+_VERSION = 1
+
+
+def cache_key(backend: str, model: str, messages: List[Dict[str, str]]) -> str:
+    """Hash of the normalised request (surrounding whitespace does not change the key)."""
+    normalised = {
+        "v": _VERSION,
+        "backend": backend,
+        "model": model,
+        "messages": [[m["role"], m["content"].strip()] for m in messages],
+    }
+    payload = json.dumps(normalised, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier response cache.
+
+    ResponseCache(max_entries=1024, directory=None, disk_max_bytes=100MB, ttl=86400)
+
+    parameters:
+        max_entries: size of the in-memory LRU tier
+        directory: where the disk tier lives (None = memory only). One JSON
+            file per entry; the least recently used files are deleted once
+            the directory grows past disk_max_bytes
+        ttl: seconds an entry stays valid in either tier (0 = forever)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        directory: Optional[str] = None,
+        disk_max_bytes: int = int(LLM_CACHE_DISK_MB * 1024 * 1024),
+        ttl: float = LLM_CACHE_TTL,
+    ):
+        self.max_entries = max(max_entries, 1)
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                created, response = hit
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+
+        hit = self._disk_get(key)
+        with self._lock:
+            if hit is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, *hit)
+        return hit[1]
+
+    def put(self, key: str, response: str):
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, response)
+            self.stores += 1
+        self._disk_put(key, created, response)
+
+    def _remember(self, key: str, created: float, response: str):
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self._expired(entry["created"]):
+            self._unlink(path)
+            return None
+        # Touch it so size eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["created"], entry["response"]
+
+    def _disk_put(self, key: str, created: float, response: str):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "response": response}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            self._unlink(tmp)
+            return
+
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += os.path.getsize(path)
+            over = self._disk_bytes is None or self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete expired files, then least recently used ones until under disk_max_bytes."""
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if total <= self.disk_max_bytes and not self._expired(mtime):
+                continue
+            self._unlink(path)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+        with self._lock:
+            self._disk_bytes = total
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    self._unlink(os.path.join(self.directory, name))
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide cache, or None when LLM_CACHE is off."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(directory=LLM_CACHE_DIR or None)
+    return _cache
@@ -0,0 +1,100 @@
+"""
+Debate Transcript
+One append-only record of everything said in a debate, shared by all
+participants. Participants look at it through cursors instead of keeping
+their own copies, and the prompt text is rendered lazily and incrementally.
+"""
+
+from typing import Dict, Hashable, List, Optional
+
+
+class TranscriptEntry:
+    """
+    A single message in the transcript. speaker identifies the participant
+    who said it (role and model alone may not: a deck can hold two identical
+    cards) and prompt is the instruction it was answering, when known.
+    """
+    __slots__ = ("seq", "role", "model", "text", "speaker", "prompt", "_message")
+
+    def __init__(self, seq: int, role: str, model: str, text: str,
+                 speaker: Optional[Hashable] = None, prompt: Optional[str] = None):
+        self.seq = seq
+        self.role = role
+        self.model = model
+        self.text = text
+        self.speaker = speaker
+        self.prompt = prompt
+        self._message = None
+
+    def user_message(self) -> Dict[str, str]:
+        """{"role": "user", "content": text}, built once and shared by every reader (do not modify)."""
+        if self._message is None:
+            self._message = {"role": "user", "content": self.text}
+        return self._message
+
+    def render(self) -> str:
+        """Format used in the 'Conversation so far' prompt block."""
+        return f"\n[{self.role.upper()}]: {self.text}\n"
+
+
+class Transcript:
+    """
+    Append-only list of TranscriptEntry records (seq starts at 1).
+
+    render(upto) returns the conversation text of the first `upto` entries.
+    The full rendering is cached and extended with only the new entries on
+    each call, so the same text is never re-rendered turn after turn.
+    """
+
+    def __init__(self):
+        self._entries: List[TranscriptEntry] = []
+        self._rendered = ""
+        self._rendered_upto = 0
+
+    def append(self, role: str, model: str, text: str,
+               speaker: Optional[Hashable] = None, prompt: Optional[str] = None) -> TranscriptEntry:
+        entry = TranscriptEntry(len(self._entries) + 1, role, model, text, speaker, prompt)
+        self._entries.append(entry)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entries(self, after: int = 0, upto: Optional[int] = None) -> List[TranscriptEntry]:
+        """Entries with after < seq <= upto."""
+        return self._entries[after:upto]
+
+    def render(self, upto: Optional[int] = None) -> str:
+        upto = len(self._entries) if upto is None else upto
+        if upto < self._rendered_upto:
+            # Older snapshot than the cache - rare, render it directly
+            return "".join(e.render() for e in self._entries[:upto])
+
+        if upto > self._rendered_upto:
+            self._rendered += "".join(e.render() for e in self._entries[self._rendered_upto:upto])
+            self._rendered_upto = upto
+        return self._rendered
+
+    def view(self) -> "TranscriptView":
+        return TranscriptView(self)
+
+
+class TranscriptView:
+    """
+    A participant's cursor into a shared Transcript.
+
+    new_entries() returns what was added since the cursor was last advanced.
+    """
+    __slots__ = ("transcript", "cursor")
+
+    def __init__(self, transcript: Transcript):
+        self.transcript = transcript
+        self.cursor = 0
+
+    def render(self) -> str:
+        return self.transcript.render()
+
+    def new_entries(self) -> List[TranscriptEntry]:
+        entries = self.transcript.entries(self.cursor)
+        self.cursor += len(entries)
+        return entries
@@ -0,0 +1,169 @@
+"""
+Facilitator Verdicts
+Decides whether the facilitator ended a turn with "That is the answer." or
+"We need more discussion" - on the streamed text, so generation can stop as
+soon as the verdict is settled instead of after the whole completion.
+
+The verdict is the first closing phrase that ends its sentence (or the first
+verdict JSON). Whatever the facilitator would have written after it is cut
+off while streaming, so a finished reply is judged by the same rule: "That is
+the answer. Wait, we need more discussion." is an answer either way.
+
+Verdict modes:
+    phrase      the closing phrase the facilitator is told to end with,
+                tolerant of markdown, contractions and "final answer"; a phrase
+                inside a conditional ("if so, that is the answer") is ignored
+    json        the facilitator also ends with {"verdict": "answer"|"continue"};
+                the JSON is stripped from the message (falls back to phrase)
+    classifier  phrase, and when no verdict is found the engine asks a cheap
+                model to classify the reply (see debate_tools._classify_verdict)
+"""
+
+import re
+import json
+from typing import Callable, Optional, Tuple
+
+from src.metrics import REGISTRY
+
+
+ANSWER = "answer"
+CONTINUE = "continue"
+VERDICT_MODES = ("phrase", "json", "classifier")
+
+JSON_VERDICT_INSTRUCTION = (
+    'After your closing sentence, add one last line of JSON: {"verdict": "answer"} if you '
+    'have settled on the solution, or {"verdict": "continue"} if the team needs another round.'
+)
+
+VERDICTS = REGISTRY.counter(
+    "debate_verdicts_total",
+    "Facilitator verdicts by mode, verdict and whether the reply was cut off early",
+    ("mode", "verdict", "stopped_early"),
+)
+
+_ANSWER_RE = re.compile(r"\bthat(?:\s+is|'s)\s+(?:the|our|my)\s+(?:final\s+)?answer\b", re.IGNORECASE)
+_CONTINUE_RE = re.compile(r"\bwe\s+need\s+(?:more|further)\s+discussion\b", re.IGNORECASE)
+# A verdict phrase in a sentence with one of these is a conditional, not a verdict
+_CONDITIONAL_RE = re.compile(r"\b(?:if|unless|once|until|whether|would|could|might|maybe|perhaps|not)\b", re.IGNORECASE)
+# The phrase ends its sentence: optional closing quotes/brackets, then . ! or a newline
+_SETTLED_RE = re.compile(r"""["')\]]*[ \t]*(?:[.!]|\n)""")
+_JSON_RE = re.compile(r'(?:```(?:json)?\s*)?\{[^{}]*"verdict"\s*:\s*"(answer|continue)"[^{}]*\}(?:\s*```)?', re.IGNORECASE)
+
+
+class StopGeneration(Exception):
+    """
+    Raised from an on_delta callback to end a streamed reply early. The
+    backends stop reading the stream and return the text received so far.
+    """
+
+
+def _normalise(text: str) -> str:
+    """Drop markdown emphasis and curly apostrophes so phrases match as plain text."""
+    return re.sub(r"[*_`#>]", "", text).replace("’", "'")
+
+
+def _sentence_start(text: str, end: int) -> int:
+    return max(text.rfind(c, 0, end) for c in ".!?\n") + 1
+
+
+def _phrases(text: str):
+    """(match, verdict) for every unconditional verdict phrase, in order."""
+    found = []
+    for regex, verdict in ((_ANSWER_RE, ANSWER), (_CONTINUE_RE, CONTINUE)):
+        for match in regex.finditer(text):
+            if _CONDITIONAL_RE.search(text, _sentence_start(text, match.start()), match.start()):
+                continue
+            if text[match.end():match.end() + 1] == "?":
+                continue
+            found.append((match, verdict))
+    return sorted(found, key=lambda item: item[0].start())
+
+
+def _settled_phrase(text: str) -> Optional[str]:
+    """The verdict of the first phrase in (normalised) text that ends its sentence."""
+    for match, verdict in _phrases(text):
+        if _SETTLED_RE.match(text, match.end()):
+            return verdict
+    return None
+
+
+def phrase_verdict(text: str) -> Optional[str]:
+    """
+    The verdict of the first closing phrase that ends its sentence (the end of
+    the reply counts), else of the last phrase in text; None if there is none.
+    """
+    text = _normalise(text)
+    verdict = _settled_phrase(text + "\n")
+    if verdict is None:
+        found = _phrases(text)
+        verdict = found[-1][1] if found else None
+    return verdict
+
+
+def json_verdict(text: str) -> Tuple[Optional[str], str]:
+    """(verdict, text without the JSON) from the first {"verdict": ...} object."""
+    match = _JSON_RE.search(text)
+    if not match:
+        return None, text
+    try:
+        verdict = json.loads(match.group(0).strip("`").removeprefix("json").strip())["verdict"].lower()
+    except (ValueError, KeyError, AttributeError):
+        verdict = match.group(1).lower()
+    return verdict, (text[:match.start()] + text[match.end():]).strip()
+
+
+def parse_verdict(text: str, mode: str = "phrase") -> Tuple[Optional[str], str]:
+    """(ANSWER / CONTINUE / None, message text to show and keep) for a finished reply."""
+    if mode == "json":
+        verdict, stripped = json_verdict(text)
+        if verdict is not None:
+            return verdict, stripped
+    return phrase_verdict(text), text
+
+
+class VerdictDetector:
+    """
+    Watches one facilitator reply as it streams.
+
+        detector = VerdictDetector("phrase")
+        call_llm(..., on_delta=detector.watch(forward))   # forward may be None
+        verdict, text = detector.finish(response)
+
+    The watcher passes each chunk on to `forward`, then raises StopGeneration
+    once the verdict is settled: a closing phrase has ended its sentence
+    (phrase/classifier) or the verdict JSON has closed (json). finish() picks
+    that same phrase or JSON, so a cut-off reply and the full one agree.
+    """
+
+    def __init__(self, mode: str = "phrase"):
+        if mode not in VERDICT_MODES:
+            raise ValueError(f"Unknown verdict mode: {mode}")
+        self.mode = mode
+        self.text = ""
+        self.verdict: Optional[str] = None
+        self.stopped_early = False
+
+    def _settled(self) -> Optional[str]:
+        if self.mode == "json":
+            return json_verdict(self.text)[0]
+        return _settled_phrase(_normalise(self.text))
+
+    def watch(self, forward: Optional[Callable[[str], None]] = None) -> Callable[[str], None]:
+        def on_delta(text: str):
+            self.text += text
+            if forward:
+                forward(text)
+            if self._settled():
+                self.stopped_early = True
+                raise StopGeneration()
+
+        return on_delta
+
+    def finish(self, response: str) -> Tuple[Optional[str], str]:
+        """(verdict, message text) for the complete reply; also sets self.verdict."""
+        self.verdict, text = parse_verdict(response, self.mode)
+        return self.verdict, text
+
+
+def record_verdict(detector: VerdictDetector, verdict: Optional[str]):
+    VERDICTS.inc(mode=detector.mode, verdict=verdict or "none", stopped_early=str(detector.stopped_early).lower())
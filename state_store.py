@@ -0,0 +1,440 @@
+'''
+State stores for debate sessions.
+A session's fields (cards, puzzle, debating flag, ...) and its message log
+live in a store. A shared store lets any gunicorn worker serve any debate,
+including /api/message pushes from SAM.
+
+STATE_BACKEND picks the store:
+    memory                      this process only (the default; one worker)
+    sqlite:///state.db          a SQLite file shared by the workers on one host
+                                (sqlite:////abs/path.db for an absolute path)
+    redis://[:password@]host:6379/0
+                                any server speaking the Redis protocol (redis,
+                                valkey, ...), spoken directly over a socket
+'''
+
+import os
+import json
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+from message_log import MessageLog, StoredMessageLog
+
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "memory")
+
+# How often a reader waiting on a shared message log checks for entries written by other workers
+STATE_POLL_INTERVAL = float(os.environ.get("STATE_POLL_INTERVAL", "0.2"))
+
+# Prefix for every key a Redis store writes
+STATE_KEY_PREFIX = os.environ.get("STATE_KEY_PREFIX", "debate:")
+
+# Socket timeout (seconds) for Redis commands
+STATE_TIMEOUT = float(os.environ.get("STATE_TIMEOUT", "5"))
+
+
+class StateStoreError(Exception):
+    """The state server rejected a command."""
+
+
+class MemoryStore:
+    """
+    Sessions held in this process (values are kept as-is, not serialised).
+
+    Every store has the same methods:
+        create(id, fields), exists(id), ids(), delete(id)
+        get(id, name, default), set(id, name, value), fields(id)
+        compare_and_set(id, name, expected, value) -> bool: atomically set
+            the field if it currently equals expected
+        message_log(id) -> MessageLog-compatible log for the session
+    Setting a field or appending to the log of a deleted session does nothing.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._fields = {}
+        self._logs = {}
+        self._lock = Lock()
+
+    def create(self, session_id: str, fields: Dict[str, Any]):
+        with self._lock:
+            self._fields[session_id] = dict(fields)
+            self._logs[session_id] = MessageLog()
+
+    def exists(self, session_id: str) -> bool:
+        return session_id in self._fields
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._fields)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._fields.pop(session_id, None)
+            self._logs.pop(session_id, None)
+
+    def get(self, session_id: str, name: str, default=None):
+        fields = self._fields.get(session_id)
+        return default if fields is None else fields.get(name, default)
+
+    def set(self, session_id: str, name: str, value):
+        with self._lock:
+            fields = self._fields.get(session_id)
+            if fields is not None:
+                fields[name] = value
+
+    def fields(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._fields.get(session_id) or {})
+
+    def compare_and_set(self, session_id: str, name: str, expected, value) -> bool:
+        with self._lock:
+            fields = self._fields.get(session_id)
+            if fields is None or name not in fields or fields[name] != expected:
+                return False
+            fields[name] = value
+            return True
+
+    def message_log(self, session_id: str) -> MessageLog:
+        with self._lock:
+            log = self._logs.get(session_id)
+        # An empty log is falsy, so test for None
+        return log if log is not None else MessageLog()
+
+
+class _SharedStore:
+    """
+    Base for stores outside the process. Values are JSON. Subclasses add the
+    log primitives used by StoredMessageLog: log_append, log_range,
+    log_length, log_version and log_notify.
+    """
+
+    shared = True
+
+    def message_log(self, session_id: str) -> StoredMessageLog:
+        return StoredMessageLog(self, session_id, STATE_POLL_INTERVAL)
+
+
+class SQLiteStore(_SharedStore):
+    """
+    Sessions in a SQLite database file, for workers on one host.
+    Each thread opens its own connection (in WAL mode), and a forked worker
+    never reuses its parent's connections.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY, namespace TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS sessions_namespace ON sessions (namespace);
+        CREATE TABLE IF NOT EXISTS fields (
+            id TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (id, name)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS messages (
+            id TEXT NOT NULL, seq INTEGER NOT NULL, entry TEXT NOT NULL, PRIMARY KEY (id, seq)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, namespace: str = "sessions"):
+        self.path = path
+        self.namespace = namespace
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._pid = os.getpid()
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=STATE_TIMEOUT, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(self.SCHEMA)
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def create(self, session_id: str, fields: Dict[str, Any]):
+        with self._transaction() as db:
+            db.execute("INSERT INTO sessions (id, namespace) VALUES (?, ?)", (session_id, self.namespace))
+            db.executemany(
+                "INSERT INTO fields (id, name, value) VALUES (?, ?, ?)",
+                [(session_id, name, json.dumps(value)) for name, value in fields.items()],
+            )
+
+    def exists(self, session_id: str) -> bool:
+        return self._db().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def ids(self) -> List[str]:
+        rows = self._db().execute("SELECT id FROM sessions WHERE namespace = ?", (self.namespace,))
+        return [row[0] for row in rows]
+
+    def delete(self, session_id: str):
+        with self._transaction() as db:
+            for table in ("sessions", "fields", "messages"):
+                db.execute(f"DELETE FROM {table} WHERE id = ?", (session_id,))
+
+    def get(self, session_id: str, name: str, default=None):
+        row = self._db().execute("SELECT value FROM fields WHERE id = ? AND name = ?", (session_id, name)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, session_id: str, name: str, value):
+        self._db().execute(
+            "INSERT OR REPLACE INTO fields (id, name, value) "
+            "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM sessions WHERE id = ?)",
+            (session_id, name, json.dumps(value), session_id),
+        )
+
+    def fields(self, session_id: str) -> Dict[str, Any]:
+        rows = self._db().execute("SELECT name, value FROM fields WHERE id = ?", (session_id,))
+        return {name: json.loads(value) for name, value in rows}
+
+    def compare_and_set(self, session_id: str, name: str, expected, value) -> bool:
+        cursor = self._db().execute(
+            "UPDATE fields SET value = ? WHERE id = ? AND name = ? AND value = ?",
+            (json.dumps(value), session_id, name, json.dumps(expected)),
+        )
+        return cursor.rowcount == 1
+
+    def log_append(self, session_id: str, entry: dict) -> int:
+        """Add entry to the session's log; returns its seq (0 if the session is gone)."""
+        with self._transaction() as db:
+            if db.execute("UPDATE sessions SET version = version + 1 WHERE id = ?", (session_id,)).rowcount == 0:
+                return 0
+            seq = db.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM messages WHERE id = ?", (session_id,)).fetchone()[0]
+            db.execute("INSERT INTO messages (id, seq, entry) VALUES (?, ?, ?)", (session_id, seq, json.dumps(entry)))
+        return seq
+
+    def log_range(self, session_id: str, after: int = 0, limit: Optional[int] = None) -> List[dict]:
+        rows = self._db().execute(
+            "SELECT seq, entry FROM messages WHERE id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (session_id, after, -1 if limit is None else limit),
+        )
+        return [dict(json.loads(entry), seq=seq) for seq, entry in rows]
+
+    def log_length(self, session_id: str) -> int:
+        return self._db().execute("SELECT COALESCE(MAX(seq), 0) FROM messages WHERE id = ?", (session_id,)).fetchone()[0]
+
+    def log_version(self, session_id: str) -> int:
+        row = self._db().execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def log_notify(self, session_id: str):
+        self._db().execute("UPDATE sessions SET version = version + 1 WHERE id = ?", (session_id,))
+
+
+class _RespConnection:
+    """One socket to a Redis-protocol server (RESP2), with pipelining."""
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str], db: int):
+        self.sock = socket.create_connection((host, port), timeout=STATE_TIMEOUT)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", *([username] if username else []), password)
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """Send every command at once, then read their replies in order."""
+        buf = bytearray()
+        for args in commands:
+            buf += b"*%d\r\n" % len(args)
+            for arg in args:
+                arg = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+                buf += b"$%d\r\n%s\r\n" % (len(arg), arg)
+        self.sock.sendall(buf)
+
+        # Read every reply before raising so the connection stays in step
+        replies = [self._read() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, StateStoreError):
+                raise reply
+        return replies
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("State server closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return StateStoreError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            return None if size < 0 else self.reader.read(size + 2)[:-2]
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [self._read() for _ in range(size)]
+        raise StateStoreError(f"Unexpected reply from state server: {line!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisStore(_SharedStore):
+    """
+    Sessions on a Redis-protocol server, for workers on any number of hosts.
+
+    keys (under STATE_KEY_PREFIX + namespace + ":"):
+        sessions        set of session ids
+        <id>            hash of JSON field values
+        <id>:log        list of JSON log entries (seq n is index n - 1)
+        <id>:version    counter bumped by every append and notify
+    """
+
+    def __init__(self, url: str, namespace: str = "sessions"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.strip("/") or 0)
+        self.prefix = f"{STATE_KEY_PREFIX}{namespace}:"
+        self._idle: List[_RespConnection] = []
+        self._lock = Lock()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _connection(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's sockets are not ours to use
+                self._idle, self._pid = [], os.getpid()
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = _RespConnection(self.host, self.port, self.username, self.password, self.db)
+        try:
+            yield conn
+        except BaseException:
+            # The reply may be half read or a WATCH/MULTI left open - don't reuse it
+            conn.close()
+            raise
+        with self._lock:
+            self._idle.append(conn)
+
+    def _pipeline(self, *commands):
+        with self._connection() as conn:
+            return conn.pipeline(commands)
+
+    def _key(self, session_id: str, suffix: str = "") -> str:
+        return f"{self.prefix}{session_id}{suffix}"
+
+    @property
+    def _sessions_key(self) -> str:
+        return f"{self.prefix}sessions"
+
+    def create(self, session_id: str, fields: Dict[str, Any]):
+        commands = [("SADD", self._sessions_key, session_id)]
+        if fields:
+            pairs = [part for name, value in fields.items() for part in (name, json.dumps(value))]
+            commands.insert(0, ("HSET", self._key(session_id), *pairs))
+        self._pipeline(*commands)
+
+    def exists(self, session_id: str) -> bool:
+        return self._pipeline(("SISMEMBER", self._sessions_key, session_id))[0] == 1
+
+    def ids(self) -> List[str]:
+        return [member.decode("utf-8") for member in self._pipeline(("SMEMBERS", self._sessions_key))[0]]
+
+    def delete(self, session_id: str):
+        self._pipeline(
+            ("SREM", self._sessions_key, session_id),
+            ("DEL", self._key(session_id), self._key(session_id, ":log"), self._key(session_id, ":version")),
+        )
+
+    def get(self, session_id: str, name: str, default=None):
+        value = self._pipeline(("HGET", self._key(session_id), name))[0]
+        return default if value is None else json.loads(value)
+
+    def set(self, session_id: str, name: str, value):
+        if self.exists(session_id):
+            self._pipeline(("HSET", self._key(session_id), name, json.dumps(value)))
+
+    def fields(self, session_id: str) -> Dict[str, Any]:
+        flat = self._pipeline(("HGETALL", self._key(session_id)))[0] or []
+        return {flat[i].decode("utf-8"): json.loads(flat[i + 1]) for i in range(0, len(flat), 2)}
+
+    def compare_and_set(self, session_id: str, name: str, expected, value) -> bool:
+        key = self._key(session_id)
+        with self._connection() as conn:
+            # Optimistic transaction: EXEC fails if another client changed the hash since WATCH
+            conn.execute("WATCH", key)
+            current = conn.execute("HGET", key, name)
+            if current is None or json.loads(current) != expected:
+                conn.execute("UNWATCH")
+                return False
+            replies = conn.pipeline([("MULTI",), ("HSET", key, name, json.dumps(value)), ("EXEC",)])
+        return replies[-1] is not None
+
+    def log_append(self, session_id: str, entry: dict) -> int:
+        """Add entry to the session's log; returns its seq (0 if the session is gone)."""
+        if not self.exists(session_id):
+            return 0
+        seq, _ = self._pipeline(
+            ("RPUSH", self._key(session_id, ":log"), json.dumps(entry)),
+            ("INCR", self._key(session_id, ":version")),
+        )
+        return seq
+
+    def log_range(self, session_id: str, after: int = 0, limit: Optional[int] = None) -> List[dict]:
+        end = -1 if limit is None else after + limit - 1
+        if end != -1 and end < after:
+            return []
+        items = self._pipeline(("LRANGE", self._key(session_id, ":log"), after, end))[0]
+        return [dict(json.loads(item), seq=after + i + 1) for i, item in enumerate(items)]
+
+    def log_length(self, session_id: str) -> int:
+        return self._pipeline(("LLEN", self._key(session_id, ":log")))[0]
+
+    def log_version(self, session_id: str) -> int:
+        value = self._pipeline(("GET", self._key(session_id, ":version")))[0]
+        return int(value) if value else 0
+
+    def log_notify(self, session_id: str):
+        if self.exists(session_id):
+            self._pipeline(("INCR", self._key(session_id, ":version")))
+
+    def ping(self) -> bool:
+        return self._pipeline(("PING",))[0] == "PONG"
+
+
+def open_store(url: Optional[str] = None, namespace: str = "sessions"):
+    """
+    The store named by url (default STATE_BACKEND). namespace keeps the
+    sessions of different apps (app.py, app_sam.py) apart in a shared store.
+    """
+    url = url or STATE_BACKEND
+    if url == "memory":
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):], namespace)
+    if url.startswith("redis://"):
+        return RedisStore(url, namespace)
+    raise ValueError(f"Unknown STATE_BACKEND: {url!r} (expected memory, sqlite:///path or redis://host:port/db)")
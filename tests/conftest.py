@@ -0,0 +1,158 @@
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """
+    In-process server for the subset of the Redis protocol RedisStore uses,
+    including WATCH/MULTI/EXEC: EXEC returns a nil reply when a watched key
+    was written since WATCH.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.data = {}
+        # key -> number of writes, for WATCH
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.commands = []
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def _touch(self, *keys):
+        for key in keys:
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def run(self, command, args):
+        data = self.data
+        if command == b"PING":
+            return "PONG"
+        if command in (b"AUTH", b"SELECT"):
+            return "OK"
+        if command == b"SADD":
+            members = data.setdefault(args[0], set())
+            added = args[1] not in members
+            members.add(args[1])
+            self._touch(args[0])
+            return int(added)
+        if command == b"SISMEMBER":
+            return int(args[1] in data.get(args[0], set()))
+        if command == b"SMEMBERS":
+            return sorted(data.get(args[0], set()))
+        if command == b"SREM":
+            members = data.get(args[0], set())
+            removed = args[1] in members
+            members.discard(args[1])
+            self._touch(args[0])
+            return int(removed)
+        if command == b"DEL":
+            self._touch(*args)
+            return sum(data.pop(key, None) is not None for key in args)
+        if command == b"HSET":
+            fields = data.setdefault(args[0], {})
+            for i in range(1, len(args), 2):
+                fields[args[i]] = args[i + 1]
+            self._touch(args[0])
+            return (len(args) - 1) // 2
+        if command == b"HGET":
+            return data.get(args[0], {}).get(args[1])
+        if command == b"HGETALL":
+            return [part for item in data.get(args[0], {}).items() for part in item]
+        if command == b"RPUSH":
+            items = data.setdefault(args[0], [])
+            items.extend(args[1:])
+            self._touch(args[0])
+            return len(items)
+        if command == b"LRANGE":
+            items = data.get(args[0], [])
+            start, end = int(args[1]), int(args[2])
+            return items[start:] if end == -1 else items[start:end + 1]
+        if command == b"LLEN":
+            return len(data.get(args[0], []))
+        if command == b"INCR":
+            value = int(data.get(args[0], b"0")) + 1
+            data[args[0]] = str(value).encode()
+            self._touch(args[0])
+            return value
+        if command == b"GET":
+            return data.get(args[0])
+        return ValueError(f"unknown command {command!r}")
+
+
+def _encode(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, Exception):
+        return b"-ERR %s\r\n" % str(value).encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        server = self.server
+        queued = None
+        watched = {}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                size = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(size + 2)[:-2])
+            command, args = args[0].upper(), args[1:]
+            server.commands.append(command.decode())
+
+            with server.lock:
+                if command == b"WATCH":
+                    watched.update((key, server.versions.get(key, 0)) for key in args)
+                    reply = "OK"
+                elif command == b"UNWATCH":
+                    watched.clear()
+                    reply = "OK"
+                elif command == b"MULTI":
+                    queued = []
+                    reply = "OK"
+                elif command == b"EXEC":
+                    changed = any(server.versions.get(key, 0) != version for key, version in watched.items())
+                    reply = None if changed else [server.run(c, a) for c, a in queued]
+                    queued = None
+                    watched.clear()
+                elif queued is not None:
+                    queued.append((command, args))
+                    reply = "QUEUED"
+                else:
+                    reply = server.run(command, args)
+            self.wfile.write(_encode(reply))
+
+
+@pytest.fixture
+def resp_server():
+    server = RespServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
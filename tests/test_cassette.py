@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from src.cassette import Cassette, CassetteMiss, ReplayedError
+from src.resilience import RATE_LIMIT, classify
+from src.verdict import StopGeneration
+
+MESSAGES = [{"role": "user", "content": "Your turn."}]
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def streaming_reply(*chunks):
+    def fn(on_delta):
+        for chunk in chunks:
+            if on_delta:
+                on_delta(chunk)
+        return "".join(chunks)
+
+    return fn
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+    recorder = Cassette(path, "record")
+    recorded = []
+    assert recorder.call("tools", "llama", MESSAGES, streaming_reply("I am ", "the critic."), recorded.append) == "I am the critic."
+    recorder.call("tools", "llama", MESSAGES, streaming_reply("Second reply."))
+    recorder.close()
+
+    player = Cassette(path, "replay", latency="none")
+    replayed = []
+    assert player.call("tools", "llama", MESSAGES, None, replayed.append) == "I am the critic."
+    assert replayed == recorded == ["I am ", "the critic."]
+    # repeated requests get the recorded replies in order, then the last one again
+    assert player.call("tools", "llama", MESSAGES, None) == "Second reply."
+    assert player.call("tools", "llama", MESSAGES, None) == "Second reply."
+
+
+def test_replay_never_calls_the_provider(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+    recorder = Cassette(path, "record")
+    recorder.call("tools", "llama", MESSAGES, streaming_reply("reply"))
+    recorder.close()
+
+    def provider(on_delta):
+        raise AssertionError("called the provider")
+
+    assert Cassette(path, "replay", latency="none").call("tools", "llama", MESSAGES, provider) == "reply"
+
+
+def test_unrecorded_request_is_a_miss(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+    Cassette(path, "record").close()
+
+    player = Cassette(path, "replay", latency="none")
+    with pytest.raises(CassetteMiss):
+        player.call("tools", "llama", MESSAGES, None)
+    with pytest.raises(CassetteMiss):
+        player.call("tools", "llama", [{"role": "user", "content": "Something else."}], None)
+
+
+def test_errors_are_replayed_and_keep_their_kind(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+    recorder = Cassette(path, "record")
+
+    def rate_limited(on_delta):
+        raise RateLimited("slow down")
+
+    with pytest.raises(RateLimited):
+        recorder.call("tools", "llama", MESSAGES, rate_limited)
+    recorder.close()
+
+    with pytest.raises(ReplayedError) as excinfo:
+        Cassette(path, "replay", latency="none").call("tools", "llama", MESSAGES, None)
+    assert excinfo.value.status_code == 429
+    assert classify(excinfo.value) == RATE_LIMIT
+
+
+def test_stop_generation_ends_the_replayed_stream(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+    recorder = Cassette(path, "record")
+    recorder.call("tools", "llama", MESSAGES, streaming_reply("That is the answer.", " More text."), lambda text: None)
+    recorder.close()
+
+    received = []
+
+    def on_delta(text):
+        received.append(text)
+        raise StopGeneration()
+
+    Cassette(path, "replay", latency="none").call("tools", "llama", MESSAGES, None, on_delta)
+    assert received == ["That is the answer."]
+
+
+def test_async_round_trip(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+
+    async def reply(on_delta):
+        on_delta("async ")
+        on_delta("reply")
+        return "async reply"
+
+    async def run():
+        recorder = Cassette(path, "record")
+        await recorder.acall("tools", "qwen", MESSAGES, reply, lambda text: None)
+        recorder.close()
+
+        replayed = []
+        text = await Cassette(path, "replay", latency="none").acall("tools", "qwen", MESSAGES, None, replayed.append)
+        return text, replayed
+
+    assert asyncio.run(run()) == ("async reply", ["async ", "reply"])
+
+
+def test_replayed_debates_get_the_recorded_turn_order(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+    recorder = Cassette(path, "record")
+    recorded = [recorder.rng().random() for _ in range(2)]
+    recorder.close()
+
+    player = Cassette(path, "replay")
+    assert [player.rng().random() for _ in range(2)] == recorded
+    assert recorded[0] != recorded[1]
+
+
+def test_recorded_latency_is_replayed(tmp_path):
+    path = str(tmp_path / "debate.jsonl")
+
+    def slow(on_delta):
+        time.sleep(0.05)
+        return "slow reply"
+
+    recorder = Cassette(path, "record")
+    recorder.call("tools", "llama", MESSAGES, slow)
+    recorder.close()
+
+    start = time.perf_counter()
+    assert Cassette(path, "replay").call("tools", "llama", MESSAGES, None) == "slow reply"
+    assert time.perf_counter() - start >= 0.04
+
+    start = time.perf_counter()
+    Cassette(path, "replay", latency="none").call("tools", "llama", MESSAGES, None)
+    assert time.perf_counter() - start < 0.04
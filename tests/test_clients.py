@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from src import clients
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    clients._clients.clear()
+    yield
+    clients.close_clients()
+
+
+def test_clients_are_shared_per_provider_base_url_and_key():
+    client = clients.get_openai_client("key-1", "http://127.0.0.1:9/v1")
+
+    assert clients.get_openai_client("key-1", "http://127.0.0.1:9/v1") is client
+    assert clients.get_openai_client("key-2", "http://127.0.0.1:9/v1") is not client
+    assert clients.get_openai_client("key-1", "http://127.0.0.1:8/v1") is not client
+    assert clients.get_gemini_client("key-1") is clients.get_gemini_client("key-1")
+
+
+def test_registry_never_holds_the_api_key():
+    clients.get_openai_client("sk-secret")
+    assert "sk-secret" not in repr(list(clients._clients))
+
+
+def test_clients_use_a_bounded_keep_alive_pool():
+    http = clients._http_client()
+    try:
+        pool = http._transport._pool
+        assert pool._max_connections == clients.POOL_MAX_CONNECTIONS
+        assert pool._max_keepalive_connections == clients.POOL_MAX_KEEPALIVE
+        assert http.timeout.read == clients.REQUEST_TIMEOUT
+    finally:
+        http.close()
+
+
+def test_registry_is_rebuilt_after_a_fork_without_the_hook(monkeypatch):
+    client = clients.get_openai_client("key-1")
+    monkeypatch.setattr(clients, "_pid", -1)
+
+    assert clients.get_openai_client("key-1") is not client
+    assert clients._pid == os.getpid()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_starts_with_an_empty_registry():
+    clients.get_openai_client("key-1")
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, str(len(clients._clients)).encode())
+        os._exit(0)
+    os.close(write)
+    os.waitpid(pid, 0)
+    assert os.read(read, 16) == b"0"
+    os.close(read)
+    assert len(clients._clients) == 1
+
+
+def test_close_clients_empties_the_registry():
+    client = clients.get_openai_client("key-1")
+    clients.close_clients()
+
+    assert clients._clients == {}
+    assert client._client.is_closed
+
+
+def test_close_clients_closes_async_clients_on_their_own_loop():
+    import asyncio
+    import threading
+
+    async def make():
+        return clients.get_async_openai_client("key-1")
+
+    idle = asyncio.new_event_loop()
+    idle_client = idle.run_until_complete(make())
+
+    running = asyncio.new_event_loop()
+    threading.Thread(target=running.run_forever, daemon=True).start()
+    running_client = asyncio.run_coroutine_threadsafe(make(), running).result(5)
+
+    clients.close_clients()
+
+    assert idle_client._client.is_closed
+    assert running_client._client.is_closed
+    assert not clients._async_clients
+    running.call_soon_threadsafe(running.stop)
+    idle.close()
@@ -0,0 +1,80 @@
+import asyncio
+
+from src.context_window import SUMMARY_HEADER, ContextWindow, estimate_tokens
+from src.transcript import Transcript
+
+
+def _transcript(turns, text="x" * 40):
+    transcript = Transcript()
+    for n in range(turns):
+        transcript.append("critic", "llama", f"{n}:{text}")
+    return transcript
+
+
+def test_short_history_is_sent_verbatim():
+    transcript = _transcript(3)
+    window = ContextWindow(transcript, keep_last=2, summarize=lambda prompt: "unused")
+
+    assert window.history("any") == transcript.render()
+    assert window.stats()["summaries"] == 0
+
+
+def test_old_turns_are_folded_into_a_summary():
+    prompts = []
+    transcript = _transcript(4)
+    window = ContextWindow(transcript, keep_last=2, summarize=lambda p: prompts.append(p) or "S1")
+
+    text = window.history("any")
+
+    assert text.startswith(f"{SUMMARY_HEADER}: S1\n")
+    assert text.endswith("".join(e.render() for e in transcript.entries(2)))
+    assert "[CRITIC]: 0:" in prompts[0] and "[CRITIC]: 2:" not in prompts[0]
+    assert window.stats()["summaries"] == 1
+    assert window.stats()["summarized_turns"] == 2
+
+
+def test_small_budget_shrinks_the_verbatim_tail():
+    transcript = _transcript(3, text="x" * 400)
+    window = ContextWindow(transcript, keep_last=3, budgets={"tiny": 150}, summarize=lambda p: "S")
+
+    text = window.history("tiny")
+
+    assert window.summarized_upto == 2
+    assert estimate_tokens(text) <= 150
+    assert window.stats()["tokens_saved"] > 0
+
+
+def test_failed_summary_drops_the_oldest_turns():
+    transcript = _transcript(4)
+    window = ContextWindow(transcript, keep_last=2, summarize=lambda p: None)
+
+    text = window.history("any")
+
+    assert SUMMARY_HEADER not in text
+    assert text == "".join(e.render() for e in transcript.entries(2))
+    assert window.stats()["summaries"] == 0
+
+
+def test_async_history_uses_asummarize():
+    async def asummarize(prompt):
+        return "async summary"
+
+    window = ContextWindow(_transcript(4), keep_last=2, asummarize=asummarize)
+
+    assert asyncio.run(window.ahistory("any")).startswith(f"{SUMMARY_HEADER}: async summary")
+
+
+def test_savings_are_counted_without_re_rendering_the_transcript(monkeypatch):
+    transcript = _transcript(6)
+    window = ContextWindow(transcript, keep_last=2, summarize=lambda p: "S")
+    full = estimate_tokens(transcript.render())
+
+    def no_render(upto=None):
+        raise AssertionError("full transcript rendered")
+
+    monkeypatch.setattr(transcript, "render", no_render)
+    window.select("any")
+    window.select("any", upto=6)
+
+    assert window._full_tokens[6] >= full
+    assert window.stats()["history_tokens_sent"] + window.stats()["tokens_saved"] == 2 * window._full_tokens[6]
@@ -0,0 +1,236 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import hedging
+from src.hedging import HedgeCancelled, HedgePolicy, ahedged_call, hedge_policy, hedged_call
+
+
+@pytest.fixture(autouse=True)
+def fresh_ttft(monkeypatch):
+    monkeypatch.setattr(hedging, "_ttft", {})
+    monkeypatch.setattr(hedging, "HEDGE_MIN_SAMPLES", 3)
+
+
+def streaming(reply, first_token_after=0.0, chunks=3, gap=0.01, log=None):
+    """fn(on_delta) that waits, then streams `reply` in chunks; records whether it was cancelled."""
+    def fn(on_delta):
+        time.sleep(first_token_after)
+        try:
+            for _ in range(chunks):
+                on_delta(reply)
+                time.sleep(gap)
+        except HedgeCancelled:
+            if log is not None:
+                log.append(reply)
+            raise
+        return reply
+    return fn
+
+
+def test_fast_primary_is_not_hedged():
+    fired = hedging.HEDGES_FIRED.value(provider="groq", model="fast")
+    backup_called = threading.Event()
+
+    def backup(on_delta):
+        backup_called.set()
+        return "backup"
+
+    deltas = []
+    result = hedged_call(("groq", "fast", streaming("primary")), ("groq", "fast", backup), 0.5, deltas.append)
+
+    assert result == (0, "primary")
+    assert deltas == ["primary"] * 3
+    assert not backup_called.is_set()
+    assert hedging.HEDGES_FIRED.value(provider="groq", model="fast") == fired
+
+
+def test_slow_primary_loses_to_the_backup():
+    cancelled = []
+    deltas = []
+
+    result = hedged_call(
+        ("groq", "slow", streaming("primary", first_token_after=0.3, log=cancelled)),
+        ("groq", "slow", streaming("backup", log=cancelled)),
+        0.05,
+        deltas.append,
+    )
+    time.sleep(0.35)
+
+    assert result == (1, "backup")
+    assert deltas == ["backup"] * 3
+    assert cancelled == ["primary"]
+    assert hedging.HEDGES_WON.value(provider="groq", model="slow") >= 1
+
+
+def test_failed_primary_falls_back_to_the_backup():
+    def broken(on_delta):
+        time.sleep(0.1)
+        raise ConnectionError("reset")
+
+    assert hedged_call(("groq", "m", broken), ("groq", "m", streaming("backup")), 0.02) == (1, "backup")
+
+
+def test_error_is_raised_when_every_leg_fails():
+    def broken(on_delta):
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        hedged_call(("groq", "m", broken), ("groq", "m", broken), 0.01)
+
+
+def test_async_loser_is_cancelled_outright():
+    cancelled = []
+
+    def streaming_async(reply, first_token_after=0.0):
+        async def fn(on_delta):
+            try:
+                await asyncio.sleep(first_token_after)
+                on_delta(reply)
+                return reply
+            except asyncio.CancelledError:
+                cancelled.append(reply)
+                raise
+        return fn
+
+    async def run():
+        return await ahedged_call(
+            ("groq", "aslow", streaming_async("primary", first_token_after=5)),
+            ("groq", "aslow", streaming_async("backup")),
+            0.05,
+        )
+
+    started = time.monotonic()
+    assert asyncio.run(run()) == (1, "backup")
+    assert time.monotonic() - started < 1
+    assert cancelled == ["primary"]
+
+
+def test_percentile_delay_waits_for_enough_samples():
+    policy = HedgePolicy("p50")
+    assert policy.delay("groq", "m") is None
+
+    for seconds in (0.3, 0.5, 0.9):
+        hedging.observe_ttft("groq", "m", seconds)
+    assert policy.delay("groq", "m") == 0.5
+
+
+def test_hedge_policy_specs(monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGE_AFTER", "")
+    monkeypatch.setattr(hedging, "HEDGE_BACKUP", hedging._parse_backups("llama=qwen;gemini=openai:gpt-4o-mini"))
+
+    assert hedge_policy() is None
+    assert hedge_policy(False) is None
+    assert hedge_policy(0.01).delay("groq", "m") == hedging.HEDGE_MIN_DELAY
+    assert hedge_policy(2).delay("groq", "m") == 2
+    assert hedge_policy({"after": 1, "backup": "kimi"}).backup_for("llama") == "kimi"
+    assert hedge_policy(1).backup_for("gemini") == "openai:gpt-4o-mini"
+    assert hedge_policy(1).backup_for("qwen") is None
+
+
+def test_threaded_legs_see_their_timeout_and_cancellation():
+    seen = {}
+
+    def primary(on_delta):
+        time.sleep(0.2)
+        seen["primary"] = (hedging.leg_timeout(), hedging.leg_cancelled())
+        return "primary"
+
+    def backup(on_delta):
+        seen["backup"] = (hedging.leg_timeout(), hedging.leg_cancelled())
+        on_delta("backup")
+        return "backup"
+
+    assert hedged_call(("groq", "m", primary), ("groq", "m", backup), 0.05) == (1, "backup")
+    time.sleep(0.3)
+
+    assert seen == {
+        "backup": (hedging.HEDGE_LEG_TIMEOUT, False),
+        "primary": (hedging.HEDGE_LEG_TIMEOUT, True),
+    }
+    # outside a hedged request there is nothing to bound
+    assert hedging.leg_timeout() is None
+    assert not hedging.leg_cancelled()
+
+
+class FakeAsyncStream:
+    """Stands in for the openai SDK's AsyncStream: yields chunks, then hangs until closed."""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.closed = False
+
+    async def __aiter__(self):
+        for text in self.texts:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+        await asyncio.sleep(60)
+
+    async def close(self):
+        self.closed = True
+
+
+def fake_async_openai(stream, calls):
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return stream
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def fake_async_gemini(texts, finalized):
+    async def chunks():
+        try:
+            for text in texts:
+                yield SimpleNamespace(text=text, usage_metadata=None)
+            await asyncio.sleep(60)
+        finally:
+            finalized.append(True)
+
+    async def generate_content_stream(**kwargs):
+        return chunks()
+    return SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate_content_stream))
+
+
+def test_async_streams_are_closed_when_the_leg_is_cancelled(monkeypatch):
+    from src import debate_tools
+
+    stream, calls, finalized = FakeAsyncStream(["a", "b"]), [], []
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(debate_tools, "get_async_gemini_client", lambda api_key: fake_async_gemini(["a"], finalized))
+
+    async def cancel_after_first_delta(call):
+        seen = asyncio.Event()
+        task = asyncio.ensure_future(call(lambda delta: seen.set()))
+        await seen.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    client = fake_async_openai(stream, calls)
+    messages = [{"role": "user", "content": "hi"}]
+    asyncio.run(cancel_after_first_delta(lambda on_delta: debate_tools._achat_completion(client, messages, "m", on_delta)))
+    asyncio.run(cancel_after_first_delta(lambda on_delta: debate_tools._acall_gemini(messages, "g", on_delta)))
+
+    assert stream.closed
+    assert "timeout" not in calls[0]
+    assert finalized == [True]
+
+
+def test_async_streams_are_closed_when_generation_stops(monkeypatch):
+    from src import debate_tools
+    from src.verdict import StopGeneration
+
+    def stop(delta):
+        raise StopGeneration()
+
+    stream, finalized = FakeAsyncStream(["done"]), []
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr(debate_tools, "get_async_gemini_client", lambda api_key: fake_async_gemini(["done"], finalized))
+    messages = [{"role": "user", "content": "hi"}]
+
+    assert asyncio.run(debate_tools._achat_completion(fake_async_openai(stream, []), messages, "m", stop)) == "done"
+    assert asyncio.run(debate_tools._acall_gemini(messages, "g", stop)) == "done"
+    assert stream.closed
+    assert finalized == [True]
@@ -0,0 +1,336 @@
+import threading
+import time
+
+import pytest
+
+import jobs
+import state_store
+from jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobExecutor, QueueFull
+
+
+@pytest.fixture(autouse=True)
+def memory_store(monkeypatch):
+    monkeypatch.setattr(state_store, "STATE_BACKEND", "memory")
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class Blocker:
+    """A job function that runs until released."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.started.set()
+        assert self.release.wait(5)
+
+
+def test_job_runs_to_done():
+    executor = JobExecutor(workers=2)
+    ran = []
+    job_id = executor.submit("debate-1", ran.append, "args")
+
+    wait_for(lambda: executor.status(job_id)["status"] == DONE)
+    status = executor.status(job_id)
+    assert ran == ["args"]
+    assert status["debate_id"] == "debate-1"
+    assert status["position"] == 0
+    assert status["submitted_at"] <= status["started_at"] <= status["finished_at"]
+    assert status["error"] is None
+    assert executor.stats() == {"workers": 2, "running": 0, "queued": 0, "queue_limit": jobs.DEBATE_QUEUE_LIMIT}
+
+
+def test_failed_job_records_the_error():
+    def fail():
+        raise RuntimeError("provider down")
+
+    executor = JobExecutor(workers=1)
+    job_id = executor.submit("debate-1", fail)
+
+    wait_for(lambda: executor.status(job_id)["status"] == FAILED)
+    assert executor.status(job_id)["error"] == "RuntimeError: provider down"
+    # the worker survives
+    second = executor.submit("debate-2", lambda: None)
+    wait_for(lambda: executor.status(second)["status"] == DONE)
+
+
+def test_queue_positions_follow_the_queue():
+    executor = JobExecutor(workers=1, max_pending=None)
+    blocker = Blocker()
+    running = executor.submit("debate-1", blocker)
+    assert blocker.started.wait(5)
+
+    waiting = [executor.submit(f"debate-{i}", lambda: None) for i in range(2, 5)]
+    assert executor.status(running)["status"] == RUNNING
+    assert [executor.status(job_id)["position"] for job_id in waiting] == [1, 2, 3]
+    assert {executor.status(job_id)["status"] for job_id in waiting} == {QUEUED}
+    assert executor.stats()["running"] == 1
+    assert executor.stats()["queued"] == 3
+
+    # cancelling a waiting job moves the ones behind it up
+    assert executor.cancel(waiting[0])
+    assert executor.status(waiting[0])["status"] == CANCELLED
+    assert [executor.status(job_id)["position"] for job_id in waiting[1:]] == [1, 2]
+
+    blocker.release.set()
+    wait_for(lambda: all(executor.status(job_id)["status"] == DONE for job_id in waiting[1:]))
+    assert executor.status(waiting[0])["status"] == CANCELLED
+    assert executor.status(waiting[0])["started_at"] is None
+
+
+def test_cancel_only_drops_jobs_that_have_not_started():
+    executor = JobExecutor(workers=1)
+    blocker = Blocker()
+    running = executor.submit("debate-1", blocker)
+    assert blocker.started.wait(5)
+
+    assert not executor.cancel(running)
+    assert not executor.cancel("unknown")
+    blocker.release.set()
+    wait_for(lambda: executor.status(running)["status"] == DONE)
+
+
+def test_a_job_can_be_cancelled_from_another_worker_process():
+    # Two executors sharing a store stand in for two gunicorn workers
+    owner, other = JobExecutor(workers=1), JobExecutor(workers=1)
+    other._store = owner._store
+    blocker = Blocker()
+    ran = []
+    running = owner.submit("debate-1", blocker)
+    assert blocker.started.wait(5)
+    queued = owner.submit("debate-2", lambda: ran.append(True))
+
+    assert other.cancel(queued)
+    assert not other.cancel(running)
+    assert owner.status(queued)["status"] == CANCELLED
+
+    blocker.release.set()
+    wait_for(lambda: owner.stats()["queued"] == 0 and owner.stats()["running"] == 0)
+    assert owner.status(queued)["status"] == CANCELLED
+    assert ran == []
+
+
+def test_submit_raises_queue_full_past_max_pending():
+    executor = JobExecutor(workers=1, max_pending=1)
+    blocker = Blocker()
+    executor.submit("debate-1", blocker)
+    queued = executor.submit("debate-2", lambda: None)
+
+    with pytest.raises(QueueFull) as excinfo:
+        executor.submit("debate-3", lambda: None)
+    assert excinfo.value.retry_after >= 1
+    assert executor.stats()["queued"] + executor.stats()["running"] == 2
+
+    blocker.release.set()
+    wait_for(lambda: executor.status(queued)["status"] == DONE)
+    # room again
+    executor.submit("debate-3", lambda: None)
+
+
+def test_retry_after_counts_down_from_the_oldest_running_job():
+    executor = JobExecutor(workers=1, max_pending=0)
+    executor._avg_seconds = 30
+    blocker = Blocker()
+    executor.submit("debate-1", blocker)
+    assert blocker.started.wait(5)
+    executor._started = {key: started - 20 for key, started in executor._started.items()}
+
+    with pytest.raises(QueueFull) as excinfo:
+        executor.submit("debate-2", lambda: None)
+    assert 1 <= excinfo.value.retry_after <= 10
+    blocker.release.set()
+
+
+def test_finished_jobs_are_evicted_after_retention(monkeypatch):
+    executor = JobExecutor(workers=1)
+    old = executor.submit("debate-1", lambda: None)
+    wait_for(lambda: executor.status(old)["status"] == DONE)
+
+    monkeypatch.setattr(jobs, "JOB_RETENTION", -1)
+    executor.submit("debate-2", lambda: None)
+    assert executor.status(old) is None
+    assert executor.status(None) is None
+
+
+def test_expired_jobs_are_swept_at_most_once_per_tenth_of_retention(monkeypatch):
+    executor = JobExecutor(workers=1)
+    sweeps = []
+    ids = executor._store.ids
+    monkeypatch.setattr(executor._store, "ids", lambda: sweeps.append(1) or ids())
+
+    for _ in range(5):
+        executor.submit("debate", lambda: None)
+    assert len(sweeps) == 1
+
+    monkeypatch.setattr(executor, "_last_eviction", time.monotonic() - jobs.JOB_RETENTION / 10)
+    executor.submit("debate", lambda: None)
+    assert len(sweeps) == 2
+
+
+@pytest.fixture
+def game_client(monkeypatch):
+    import app
+    from reasoning import GameState
+    from sessions import SessionRegistry
+
+    blocker = Blocker()
+    monkeypatch.setattr(GameState, "_run_debate", lambda self: blocker())
+    monkeypatch.setattr(app, "games", SessionRegistry(GameState, store=state_store.MemoryStore()))
+    monkeypatch.setattr(app, "debates", JobExecutor(workers=1))
+    yield app.app.test_client(), blocker
+    blocker.release.set()
+
+
+def _start(client):
+    agents = [{"model": "Llama", "expertise": "logic", "personality": "calm", "role": "facilitator"}]
+    debate_id = client.post("/api/deck", json={"agents": agents}).get_json()["debate_id"]
+    return debate_id, client.post("/api/puzzle", json={"debate_id": debate_id, "puzzle": "2+2?"})
+
+
+def test_puzzle_returns_202_with_a_job_to_poll(game_client):
+    client, blocker = game_client
+    debate_id, response = _start(client)
+
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert response.get_json()["debate_id"] == debate_id
+    assert blocker.started.wait(5)
+    assert client.get(f"/api/jobs/{job_id}").get_json()["status"] == RUNNING
+    # the debate is already marked, so it can't be queued twice
+    assert client.post("/api/puzzle", json={"debate_id": debate_id, "puzzle": "again"}).status_code == 301
+
+    blocker.release.set()
+    wait_for(lambda: client.get(f"/api/jobs/{job_id}").get_json()["status"] == DONE)
+    assert client.get(f"/api/sync?debate_id={debate_id}&after=0").get_json()["debating"] is False
+
+
+def test_unknown_job_is_404(game_client):
+    client, _ = game_client
+    assert client.get("/api/jobs/nope").status_code == 404
+
+
+def test_legacy_app_answers_429_when_the_queue_is_full(game_client, monkeypatch):
+    import app
+
+    client, blocker = game_client
+    monkeypatch.setattr(app, "debates", JobExecutor(workers=1, max_pending=0))
+    _, first = _start(client)
+    assert first.status_code == 202
+    assert blocker.started.wait(5)
+
+    debate_id, second = _start(client)
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+    # the claim is released, so the debate can be retried
+    assert app.games.get(debate_id).debating is False
+
+
+@pytest.fixture
+def sam_client(monkeypatch):
+    import app_sam
+    from sessions import SessionRegistry
+
+    blocker = Blocker()
+    monkeypatch.setattr(app_sam, "_run_sam_debate", lambda session, puzzle, cards: blocker())
+    monkeypatch.setattr(app_sam, "sessions", SessionRegistry(app_sam.DebateState, store=state_store.MemoryStore()))
+    monkeypatch.setattr(app_sam, "debates", JobExecutor(workers=1, max_pending=1))
+    yield app_sam.app.test_client(), blocker
+    blocker.release.set()
+
+
+def _start_sam(client):
+    agents = [{"model": "llama", "expertise": "logic", "personality": "calm", "role": "facilitator"}]
+    debate_id = client.post("/api/deck", json={"agents": agents}).get_json()["debate_id"]
+    return debate_id, client.post("/api/puzzle", json={"debate_id": debate_id, "puzzle": "2+2?"})
+
+
+def test_app_sam_queues_then_turns_debates_away(sam_client):
+    client, blocker = sam_client
+
+    running_id, running = _start_sam(client)
+    assert running.status_code == 200
+    assert blocker.started.wait(5)
+    queued_id, queued = _start_sam(client)
+    assert queued.get_json()["queue_position"] == 1
+    status = client.get(f"/api/status?debate_id={queued_id}").get_json()
+    assert status["queue_position"] == 1
+    assert status["job"]["status"] == QUEUED
+
+    _, rejected = _start_sam(client)
+    assert rejected.status_code == 429
+    assert rejected.get_json()["retry_after"] == int(rejected.headers["Retry-After"])
+    assert client.get("/api/status").get_json()["debate_queue"]["queued"] == 1
+
+
+def test_app_sam_starts_a_debate_only_once(sam_client):
+    client, blocker = sam_client
+    debate_id, first = _start_sam(client)
+    again = client.post("/api/puzzle", json={"debate_id": debate_id, "puzzle": "again"})
+
+    assert first.status_code == 200
+    assert again.status_code == 409
+
+
+def test_resetting_a_queued_debate_cancels_its_job(sam_client):
+    import app_sam
+
+    client, blocker = sam_client
+    _start_sam(client)
+    assert blocker.started.wait(5)
+    debate_id, queued = _start_sam(client)
+    job_id = queued.get_json()["job_id"]
+
+    assert client.post("/api/reset", json={"debate_id": debate_id}).status_code == 200
+    assert app_sam.debates.status(job_id)["status"] == CANCELLED
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"message_layout": "columns"},
+        {"verdict_mode": "vibes"},
+        {"context_policy": {"keep_last": 10**9}},
+        {"context_policy": {"budget": "lots"}},
+        {"context_policy": {"budgets": {"gpt-4o": -1}}},
+        {"context_policy": {"summary_provider": "nobody"}},
+        {"context_policy": {"api_key": "x"}},
+        {"context_policy": ["keep_last"]},
+    ],
+)
+def test_app_sam_rejects_bad_debate_options(sam_client, options):
+    client, _ = sam_client
+    agents = [{"model": "llama", "expertise": "logic", "personality": "calm", "role": "facilitator"}]
+    debate_id = client.post("/api/deck", json={"agents": agents}).get_json()["debate_id"]
+
+    response = client.post("/api/puzzle", json=dict(options, debate_id=debate_id, puzzle="2+2?"))
+    assert response.status_code == 400
+    assert client.get(f"/api/status?debate_id={debate_id}").get_json()["debating"] is False
+
+
+def test_app_sam_debate_options_apply_to_one_puzzle(sam_client):
+    import app_sam
+
+    client, blocker = sam_client
+    blocker.release.set()
+    agents = [{"model": "llama", "expertise": "logic", "personality": "calm", "role": "facilitator"}]
+    debate_id = client.post("/api/deck", json={"agents": agents}).get_json()["debate_id"]
+    options = {"message_layout": "turns", "verdict_mode": "json", "context_policy": {"keep_last": 4, "budget": 2000}}
+
+    assert client.post("/api/puzzle", json=dict(options, debate_id=debate_id, puzzle="1")).status_code == 200
+    session = app_sam.sessions.get(debate_id)
+    assert (session.message_layout, session.verdict_mode) == ("turns", "json")
+    assert session.context_policy == {"keep_last": 4, "budget": 2000}
+
+    wait_for(lambda: app_sam.debates.status(session.job_id)["status"] == DONE)
+    session.debating = False
+    assert client.post("/api/puzzle", json={"debate_id": debate_id, "puzzle": "2"}).status_code == 200
+    assert session.message_layout == app_sam.DEBATE_MESSAGE_LAYOUT
+    assert session.verdict_mode == app_sam.DEBATE_VERDICT_MODE
+    assert session.context_policy == app_sam.DEBATE_CONTEXT_POLICY
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src import clients
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SDKS = ("openai", "groq", "google.genai")
+
+
+def _loaded_after(code):
+    """SDK modules in sys.modules after running code in a fresh interpreter."""
+    script = f"import sys\n{code}\nprint(' '.join(m for m in {SDKS!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=60, check=True
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize("module", ["app", "app_sam", "card", "llms", "src.debate_tools"])
+def test_importing_the_app_loads_no_provider_sdk(module):
+    assert _loaded_after(f"import {module}") == []
+
+
+def test_a_provider_sdk_is_imported_when_its_client_is_first_built():
+    code = "from src.clients import get_groq_client\nget_groq_client('key')"
+    assert _loaded_after(code) == ["groq"]
+
+
+def test_import_sdk():
+    import openai
+
+    assert clients.import_sdk("openai") is openai
+    with pytest.raises(KeyError):
+        clients.import_sdk("deepseek")
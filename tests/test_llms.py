@@ -0,0 +1,96 @@
+import os
+import threading
+
+import pytest
+
+import llms
+from mock_llm_server import MockConfig, make_server, parse_distribution
+from src import clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(clients, "_clients", {})
+    yield
+    clients.close_clients()
+
+
+@pytest.fixture
+def groq_stand_in(monkeypatch):
+    config = MockConfig(ttft=parse_distribution("fixed:0"), tokens_per_second=0, reply_tokens=8)
+    server = make_server(port=0, config=config)
+    threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("GROQ_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}")
+    yield config
+    server.shutdown()
+    server.server_close()
+
+
+def test_building_a_deck_creates_no_clients(monkeypatch):
+    for name in ("OPENAI_API_KEY", "GROQ_API_KEY", "GEMINI_API_KEY", "DEEPSEEK_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+
+    models = [llms.Gpt41(), llms.Llama33(), llms.Qwen3(), llms.Gemini3Flash(), llms.DeepSeek()]
+
+    assert all(model.client is None for model in models)
+    assert clients._clients == {}
+
+
+def test_missing_key_surfaces_on_the_first_turn(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    model = llms.Llama33()
+
+    with pytest.raises(KeyError):
+        model.get_response("Your turn.")
+
+
+def test_cards_on_one_provider_share_a_client(groq_stand_in):
+    llama = llms.Llama33("Your role is critic.")
+    qwen = llms.Qwen3("Your role is reasoner.")
+
+    assert llama.get_response("Your turn.").startswith("I am the critic.")
+    assert qwen.get_response("Your turn.").startswith("I am the reasoner.")
+    assert llama.client is qwen.client
+    assert len(clients._clients) == 1
+    assert groq_stand_in.stats["requests"] == 2
+
+
+def test_calls_are_labelled_with_the_cards_role(groq_stand_in):
+    from card import Card
+    from src import metrics
+
+    labels = {"provider": "groq", "model": "qwen/qwen3-32b", "role": "stateTracker", "status": "ok"}
+    before = metrics.LLM_REQUESTS.value(**labels)
+
+    Card("Qwen", "logic", "calm", "stateTracker").client.get_response("Your turn.")
+
+    assert metrics.LLM_REQUESTS.value(**labels) == before + 1
+
+
+def test_deepseek_requests_fallback_is_tracked_like_the_sdk_path(groq_stand_in, monkeypatch):
+    from types import SimpleNamespace
+
+    from src import metrics, resilience
+
+    def broken(**params):
+        raise ValueError("SDK cannot talk to this endpoint")
+
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    monkeypatch.setattr(llms, "DEEPSEEK_BASE_URL", os.environ["GROQ_BASE_URL"])
+    model = llms.DeepSeek("Your role is critic.")
+    model.role = "critic"
+    model._ready()
+    model.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=broken)))
+    labels = {"provider": "deepseek", "model": "deepseek-chat", "role": "critic"}
+    ok = metrics.LLM_REQUESTS.value(status="ok", **labels)
+    deltas = []
+
+    reply = model.get_response("Your turn.", on_delta=deltas.append)
+
+    assert reply.startswith("I am the critic.")
+    assert deltas == [reply]
+    assert model._construct_context()[-1] == {"role": "assistant", "content": reply}
+    assert metrics.LLM_REQUESTS.value(status="ok", **labels) == ok + 1
+    assert metrics.LLM_ERRORS.value(error="ValueError", **labels) >= 1
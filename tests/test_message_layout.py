@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from src import debate_tools
+
+
+CARDS = [
+    {"role": "facilitator", "model": "openai"},
+    {"role": "critic", "model": "llama"},
+    {"role": "reasoner", "model": "qwen"},
+]
+
+
+@pytest.fixture
+def requests_by_model(monkeypatch):
+    """Record the messages each model is sent; every call gets a numbered reply."""
+    sent = {}
+
+    def fake_backend(messages, model, on_delta=None):
+        sent.setdefault(model, []).append([dict(m) for m in messages])
+        return f"{model} reply {len(sent[model])}"
+
+    for backend in ("openai", "groq"):
+        monkeypatch.setitem(debate_tools._BACKENDS, backend, fake_backend)
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    return sent
+
+
+def test_turns_layout_extends_each_speakers_previous_request(requests_by_model):
+    result = debate_tools.run_debate_streaming("puzzle", CARDS, max_rounds=3, message_layout="turns")
+    assert result["status"] == "completed"
+
+    for model, requests in requests_by_model.items():
+        for n, (before, after) in enumerate(zip(requests, requests[1:]), start=1):
+            # Previous request, minus its trailing turn prompt, is a prefix of the next one
+            assert after[:len(before) - 1] == before[:-1]
+            assert {"role": "assistant", "content": f"{model} reply {n}"} in after
+
+
+def test_turns_layout_sends_other_speakers_as_user_messages(requests_by_model):
+    debate_tools.run_debate_streaming("puzzle", CARDS, max_rounds=1, message_layout="turns")
+
+    facilitator = requests_by_model["gpt-4o"][0]
+    assert facilitator[0]["role"] == "system"
+    assert facilitator[1] == {"role": "user", "content": "The puzzle is: puzzle"}
+    history = [m["content"] for m in facilitator[2:-1]]
+    assert sorted(history) == ["[CRITIC]: llama-3.3-70b-versatile reply 1", "[REASONER]: qwen/qwen3-32b reply 1"]
+    assert not any(m["content"].startswith("Conversation so far") for m in facilitator)
+
+
+def test_transcript_layout_sends_one_history_message(requests_by_model):
+    debate_tools.run_debate_streaming("puzzle", CARDS, max_rounds=1)
+
+    facilitator = requests_by_model["gpt-4o"][0]
+    assert len(facilitator) == 4
+    assert facilitator[2]["content"].startswith("Conversation so far:\n")
+
+
+def test_unknown_layout_is_rejected():
+    result = debate_tools.run_debate_streaming("puzzle", CARDS, message_layout="bogus")
+    assert result["status"] == "error"
+
+
+def test_identical_cards_only_replay_their_own_turns(requests_by_model):
+    twins = [CARDS[0], {"role": "critic", "model": "llama"}, {"role": "critic", "model": "llama"}]
+    debate_tools.run_debate_streaming("puzzle", twins, max_rounds=2, message_layout="turns")
+
+    # each critic call is one seat's request; seats alternate in some order per round
+    for request in requests_by_model["llama-3.3-70b-versatile"]:
+        own = [m for m in request if m["role"] == "assistant"]
+        others = [m for m in request if m["content"].startswith("[CRITIC]")]
+        # in round two a critic has said one thing and heard its twin at least once
+        assert len(own) <= 1
+        if own:
+            assert others
+
+
+def test_turns_replay_the_prompt_the_facilitator_was_given(requests_by_model):
+    debate_tools.run_debate_streaming(
+        "puzzle", CARDS, max_rounds=2, message_layout="turns", verdict_mode="json"
+    )
+
+    first, second = requests_by_model["gpt-4o"][:2]
+    prompt = first[-1]
+    assert "verdict" in prompt["content"]
+    assert second[len(first) - 1] == prompt
+    assert second[len(first)]["role"] == "assistant"
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from message_log import MessageLog
+
+
+def test_entries_get_increasing_sequence_numbers():
+    log = MessageLog()
+
+    assert log.append({"message": "a"}) == 1
+    assert log.append({"message": "b"}) == 2
+    assert log.last_seq == len(log) == 2
+    assert [e["message"] for e in log.since(0)] == ["a", "b"]
+    assert log.since(1) == [{"message": "b", "seq": 2}]
+    assert log.since(0, limit=1) == [{"message": "a", "seq": 1}]
+    assert log.since(2) == []
+
+
+def test_wait_returns_as_soon_as_an_entry_is_appended():
+    log = MessageLog()
+    threading.Timer(0.05, log.append, ({"message": "late"},)).start()
+
+    started = time.monotonic()
+    entries = log.wait(0, timeout=5)
+
+    assert [e["message"] for e in entries] == ["late"]
+    assert time.monotonic() - started < 1
+
+
+def test_wait_times_out_or_wakes_on_notify():
+    log = MessageLog()
+    assert log.wait(0, timeout=0.05) == []
+
+    threading.Timer(0.05, log.notify).start()
+    started = time.monotonic()
+    assert log.wait(0, timeout=5) == []
+    assert time.monotonic() - started < 1
+
+
+def test_wait_does_not_block_when_entries_are_pending():
+    log = MessageLog()
+    log.append({"message": "a"})
+
+    assert log.wait(0, timeout=5) == [{"message": "a", "seq": 1}]
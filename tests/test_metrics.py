@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+from src import debate_tools, metrics
+from src.metrics import CallTracker, DebateTracker, Registry, record_usage
+
+
+def test_exposition_format():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("path",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("queue_depth", "Queue depth")
+    registry.gauge("live", "Live value", fn=lambda: 3)
+
+    requests.inc(path='/a"b')
+    requests.inc(2, path="/c")
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a\\"b"} 1',
+        'requests_total{path="/c"} 2',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        "latency_seconds_sum 0.55",
+        "latency_seconds_count 2",
+        "# HELP queue_depth Queue depth",
+        "# TYPE queue_depth gauge",
+        "queue_depth 0",
+        "# HELP live Live value",
+        "# TYPE live gauge",
+        "live 3",
+    ]
+
+
+def test_registering_a_name_twice_returns_the_first_metric():
+    registry = Registry()
+    first = registry.counter("hits_total", "Hits")
+
+    assert registry.counter("hits_total", "Hits") is first
+
+
+def test_call_tracker_records_latency_ttft_and_usage():
+    labels = {"provider": "test", "model": "ttft-model", "role": "critic"}
+    deltas = []
+
+    with CallTracker("test", "ttft-model", "critic", deltas.append) as call:
+        call.on_delta("hello")
+        record_usage(10, 4)
+
+    assert deltas == ["hello"]
+    assert metrics.LLM_LATENCY.count(**labels) == 1
+    assert metrics.LLM_TTFT.count(**labels) == 1
+    assert metrics.LLM_PROMPT_TOKENS.value(**labels) == 10
+    assert metrics.LLM_COMPLETION_TOKENS.value(**labels) == 4
+    assert metrics.LLM_REQUESTS.value(status="ok", **labels) == 1
+
+
+def test_call_tracker_counts_exceptions_as_errors():
+    labels = {"provider": "test", "model": "failing-model", "role": "unknown"}
+
+    with pytest.raises(TimeoutError):
+        with CallTracker("test", "failing-model"):
+            raise TimeoutError()
+
+    assert metrics.LLM_ERRORS.value(error="TimeoutError", **labels) == 1
+    assert metrics.LLM_REQUESTS.value(status="error", **labels) == 1
+
+
+def test_record_usage_outside_a_call_is_a_no_op():
+    record_usage(5, 5)
+
+
+def test_debate_tracker_counts_rounds_and_early_answers():
+    engine = "tracker-test"
+    active = metrics.ACTIVE_DEBATES.value()
+
+    tracker = DebateTracker(engine)
+    assert metrics.ACTIVE_DEBATES.value() == active + 1
+    tracker.round()
+    tracker.finish("answer", max_rounds=4)
+    tracker.finish("answer", max_rounds=4)
+
+    assert metrics.ACTIVE_DEBATES.value() == active
+    assert metrics.DEBATES_STARTED.value(engine=engine) == 1
+    assert metrics.DEBATE_ROUNDS.value(engine=engine) == 1
+    assert metrics.DEBATES_FINISHED.value(engine=engine, outcome="answer") == 1
+    assert metrics.DEBATE_EARLY_TERMINATIONS.value(engine=engine) == 1
+
+
+def test_debates_and_calls_show_up_in_api_metrics(monkeypatch):
+    import app_sam
+
+    def fake_backend(messages, model, on_delta=None):
+        return "That is the answer." if "facilitator" in messages[0]["content"].lower() else "hmm"
+
+    monkeypatch.setitem(debate_tools._BACKENDS, "groq", fake_backend)
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    finished = metrics.DEBATES_FINISHED.value(engine="streaming", outcome="answer")
+    cards = [{"role": "facilitator", "model": "kimi"}, {"role": "critic", "model": "kimi"}]
+
+    debate_tools.run_debate_streaming("puzzle", cards, max_rounds=2)
+
+    assert metrics.DEBATES_FINISHED.value(engine="streaming", outcome="answer") == finished + 1
+    body = app_sam.app.test_client().get("/api/metrics").get_data(as_text=True)
+    assert 'llm_requests_total{provider="groq",model="moonshotai/kimi-k2-instruct",role="critic",status="ok"}' in body
+    assert "debate_sessions " in body
+
+
+def test_a_debate_that_raises_is_finished_as_an_error(monkeypatch):
+    def broken(**kwargs):
+        raise RuntimeError("provider exploded")
+
+    monkeypatch.setattr(debate_tools, "_push_to_frontend", lambda *args, **kwargs: None)
+    monkeypatch.setattr(debate_tools, "call_llm", broken)
+    cards = [{"model": "llama", "role": "facilitator"}, {"model": "llama", "role": "critic"}]
+    active = metrics.ACTIVE_DEBATES.value()
+    errors = metrics.DEBATES_FINISHED.value(engine="sam", outcome="error")
+
+    with pytest.raises(RuntimeError):
+        debate_tools.run_debate("2+2?", cards, stream=False)
+
+    assert metrics.ACTIVE_DEBATES.value() == active
+    assert metrics.DEBATES_FINISHED.value(engine="sam", outcome="error") == errors + 1
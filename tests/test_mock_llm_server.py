@@ -0,0 +1,127 @@
+import random
+import threading
+
+import openai
+import pytest
+
+from mock_llm_server import (
+    ANSWER,
+    MORE_DISCUSSION,
+    TURN_PROMPT,
+    MockConfig,
+    make_server,
+    parse_distribution,
+    scripted_reply,
+)
+
+
+@pytest.fixture
+def mock_server():
+    config = MockConfig(ttft=parse_distribution("fixed:0"), tokens_per_second=0, reply_tokens=12, seed=1)
+    server = make_server(port=0, config=config)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server, config
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, **kwargs):
+    return openai.OpenAI(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", **kwargs
+    )
+
+
+def _system(role):
+    return {"role": "system", "content": f"You are a debater. Your role is {role}."}
+
+
+def test_completion_follows_the_openai_protocol(mock_server):
+    server, config = mock_server
+
+    response = _client(server).chat.completions.create(
+        model="llama", messages=[_system("critic"), {"role": "user", "content": "Your turn."}]
+    )
+
+    assert response.choices[0].message.content.startswith("I am the critic.")
+    assert response.usage.completion_tokens > 0
+    assert config.stats["requests"] == 1
+
+
+def test_streamed_chunks_add_up_to_the_reply(mock_server):
+    server, config = mock_server
+    messages = [_system("reasoner"), {"role": "user", "content": "Your turn."}]
+
+    stream = _client(server).chat.completions.create(model="qwen", messages=messages, stream=True)
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+
+    assert text == scripted_reply(messages, config)
+    assert config.stats["streamed"] == 1
+
+
+def test_rate_limited_requests_get_429_with_retry_after(mock_server):
+    server, config = mock_server
+    config.rate_limit_rate = 1.0
+    config.retry_after = 7
+
+    with pytest.raises(openai.RateLimitError) as excinfo:
+        _client(server, max_retries=0).chat.completions.create(
+            model="llama", messages=[{"role": "user", "content": "hi"}]
+        )
+
+    assert excinfo.value.response.headers["Retry-After"] == "7"
+    assert config.stats["rate_limited"] == 1
+
+
+def test_server_errors_are_injected(mock_server):
+    server, config = mock_server
+    config.error_rate = 1.0
+
+    with pytest.raises(openai.InternalServerError):
+        _client(server, max_retries=0).chat.completions.create(
+            model="llama", messages=[{"role": "user", "content": "hi"}]
+        )
+    assert config.stats["errors"] == 1
+
+
+def test_facilitator_answers_on_its_nth_turn():
+    config = MockConfig(answer_after=2)
+    first = scripted_reply([_system("facilitator")], config)
+    second = scripted_reply([_system("facilitator"), {"role": "user", "content": first}], config)
+
+    assert first.endswith(MORE_DISCUSSION)
+    assert second.endswith(ANSWER)
+
+
+def test_parse_distribution():
+    rng = random.Random(0)
+
+    assert parse_distribution("fixed:0.5")(rng) == 0.5
+    assert 1 <= parse_distribution("uniform:1,2")(rng) <= 2
+    assert parse_distribution("normal:0,1")(rng) >= 0
+    assert parse_distribution("lognormal:0.5,0.4")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_distribution("bogus:1")
+
+
+def test_debate_tools_can_be_pointed_at_the_stand_in(mock_server, monkeypatch):
+    from src import debate_tools
+
+    server, config = mock_server
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(debate_tools, "GROQ_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+
+    result = debate_tools.call_llm("llama", "critic", "sharp", "logic", "puzzle", "", "Your turn.")
+
+    assert result["status"] == "success"
+    assert result["response"].startswith("I am the critic.")
+    assert config.stats["requests"] == 1
+
+
+def test_facilitator_turns_are_counted_from_turn_prompts():
+    # llms clients keep the turn prompts they were sent but not their own replies
+    config = MockConfig(answer_after=2)
+    prompt = {"role": "user", "content": TURN_PROMPT}
+
+    assert scripted_reply([_system("facilitator"), prompt], config).endswith(MORE_DISCUSSION)
+    assert scripted_reply([_system("facilitator"), prompt, prompt], config).endswith(ANSWER)
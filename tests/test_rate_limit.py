@@ -0,0 +1,146 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import rate_limit
+from src.rate_limit import RateLimiter, Reservation, TokenBucket
+
+
+def test_bucket_starts_full_and_refills_continuously():
+    bucket = TokenBucket(60)  # one unit per second
+
+    assert bucket.reserve(60, now=bucket.updated) == 0
+    # Empty: the next unit is a second away
+    assert bucket.reserve(1, now=bucket.updated) == pytest.approx(1.0)
+    # Half a second later the debt is half paid, and the next caller queues behind it
+    assert bucket.reserve(1, now=bucket.updated + 0.5) == pytest.approx(1.5)
+
+
+def test_bucket_caps_oversized_requests_and_refunds():
+    bucket = TokenBucket(60)
+    start = bucket.updated
+
+    assert bucket.reserve(1000, now=start) == 0
+    bucket.refund(30, now=start)
+    assert bucket.level == 30
+    bucket.refund(1000, now=start)
+    assert bucket.level == 60
+
+
+def test_limiter_waits_on_the_tighter_bucket():
+    limiter = RateLimiter("test", rpm=600, tpm=60)
+
+    assert limiter.reserve(60) == 0
+    delay = limiter.reserve(30)
+
+    assert delay == pytest.approx(30, abs=0.1)
+    assert limiter.stats()["waits"] == 1
+
+
+def test_settle_returns_unused_tokens():
+    limiter = RateLimiter("test", tpm=60)
+    limiter.reserve(60)
+    limiter.settle(reserved=60, used=10)
+
+    assert limiter.reserve(40) == 0
+
+
+def test_reservation_sleeps_only_when_over_the_limit(monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limit.time, "sleep", slept.append)
+    limiter = RateLimiter("test", rpm=60)
+    limiter.requests.level = 1
+
+    with Reservation(limiter, 0):
+        pass
+    with Reservation(limiter, 0):
+        pass
+
+    assert len(slept) == 1
+    assert slept[0] == pytest.approx(1.0, abs=0.05)
+
+
+def test_async_reservation_does_not_block_the_loop():
+    limiter = RateLimiter("test", rpm=600)  # 0.1s between calls once empty
+    limiter.requests.level = 0
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(ticker())
+        async with Reservation(limiter, 0):
+            pass
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 3
+
+
+class RateLimited(Exception):
+    def __init__(self, headers):
+        super().__init__("429")
+        self.response = SimpleNamespace(headers=headers)
+
+
+def _rate_limited(**headers):
+    return RateLimited(headers)
+
+
+def test_retry_after_header_forms():
+    assert rate_limit.retry_after(_rate_limited(**{"retry-after": "2"})) == 2
+    assert rate_limit.retry_after(_rate_limited(**{"retry-after-ms": "1500"})) == 1.5
+    assert rate_limit.retry_after(ValueError()) is None
+
+    later = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 < rate_limit.retry_after(_rate_limited(**{"retry-after": later})) <= 30
+
+
+def test_retry_after_pauses_the_key_for_everyone():
+    limiter = RateLimiter("test", rpm=600)
+
+    with pytest.raises(RateLimited):
+        with Reservation(limiter, 0):
+            raise _rate_limited(**{"retry-after": "5"})
+
+    assert limiter.reserve(0) == pytest.approx(5, abs=0.1)
+
+
+def test_limiters_are_shared_per_provider_and_key(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+
+    assert rate_limit.limiter_for("groq", "a") is rate_limit.limiter_for("groq", "a")
+    assert rate_limit.limiter_for("groq", "a") is not rate_limit.limiter_for("groq", "b")
+    assert rate_limit.limiter_for("groq", "a").requests.capacity == rate_limit.DEFAULT_LIMITS["groq"][0]
+
+
+def test_limits_can_be_overridden_or_disabled(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setenv("LLM_RATE_LIMIT_GROQ_RPM", "0")
+
+    limiter = rate_limit.limiter_for("groq", "a")
+    assert limiter.requests is None
+
+    monkeypatch.setattr(rate_limit, "RATE_LIMITS_ENABLED", False)
+    assert rate_limit.limiter_for("groq", "a") is None
+
+
+def test_waits_per_key_show_up_in_api_status(monkeypatch):
+    import app_sam
+
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    limiter = rate_limit.limiter_for("groq", "a")
+    with limiter._lock:
+        limiter.waits, limiter.waited_seconds = 2, 1.5
+
+    limits = app_sam.app.test_client().get("/api/status").get_json()["rate_limits"]
+
+    assert list(limits.values()) == [{"waits": 2, "waited_seconds": 1.5}]
+    assert next(iter(limits)).startswith("groq:")
@@ -0,0 +1,89 @@
+import pytest
+
+import card
+import llms
+from reasoning import GameState
+from src.verdict import StopGeneration
+
+
+class ScriptedLlm(llms.Llm):
+    """Replies "<role> turn N" (the facilitator answers on its second turn) and records its context."""
+
+    def __init__(self, instructions=""):
+        super().__init__(instructions)
+        self.role = instructions.split("Your role is ")[1].split(".")[0]
+        self.context = []
+        self.turns = 0
+
+    def init(self):
+        pass
+
+    def clear_context(self):
+        self.context.clear()
+
+    def add_context(self, msg):
+        self.context.append(msg)
+
+    def get_response(self, prompt, on_delta=None):
+        self._ready()
+        self.turns += 1
+        reply = f"{self.role} turn {self.turns}."
+        if self.role == "facilitator":
+            reply += " That is the answer." if self.turns == 2 else " We need more discussion"
+        if on_delta:
+            try:
+                on_delta(reply)
+            except StopGeneration:
+                pass
+        return reply
+
+
+@pytest.fixture
+def game(monkeypatch):
+    monkeypatch.setattr(card, "MODELS", dict(card.MODELS, Llama=ScriptedLlm))
+    game = GameState()
+    game.cards = [
+        {"model": "Llama", "expertise": "x", "personality": "y", "role": role}
+        for role in ("facilitator", "critic", "reasoner")
+    ]
+    game.puzzle = "2+2?"
+    return game
+
+
+def test_each_card_hears_every_other_turn_once(game):
+    game.start_debate()
+
+    said = [entry.text for entry in game.transcript.entries()]
+    assert len(said) == 6
+    assert said[-1] == "facilitator turn 2. That is the answer."
+
+    for player in game._views:
+        client = player.client
+        last_turn = max(i for i, text in enumerate(said) if text.startswith(client.role))
+        heard = [msg for msg in client.context if not msg.startswith("The puzzle is")]
+        # everything said before its last turn, except its own replies
+        assert heard == [text for text in said[:last_turn] if not text.startswith(client.role)]
+
+
+def test_debate_is_logged_for_sync(game):
+    game.start_debate()
+
+    assert [e["message"] for e in game.debate_history.since()] == [e.text for e in game.transcript.entries()]
+    assert game.debating is False
+
+
+def test_a_debate_that_raises_is_still_finished(game, monkeypatch):
+    from src import metrics
+
+    def broken(self, msg, card):
+        raise RuntimeError("transcript exploded")
+
+    monkeypatch.setattr(GameState, "_share_context", broken)
+    active = metrics.ACTIVE_DEBATES.value()
+    errors = metrics.DEBATES_FINISHED.value(engine="reasoning", outcome="error")
+
+    with pytest.raises(RuntimeError):
+        game._run_debate()
+
+    assert metrics.ACTIVE_DEBATES.value() == active
+    assert metrics.DEBATES_FINISHED.value(engine="reasoning", outcome="error") == errors + 1
@@ -0,0 +1,213 @@
+import asyncio
+
+import pytest
+
+from src import resilience
+from src.hedging import HedgeCancelled
+from src.resilience import (
+    FATAL,
+    RATE_LIMIT,
+    TRANSIENT,
+    CircuitBreaker,
+    CircuitOpen,
+    EmptyResponse,
+    ProviderError,
+    acall_with_retries,
+    breaker_for,
+    call_with_retries,
+    classify,
+    failover_chain,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 3)
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0)
+
+
+def failing(*errors, result="ok"):
+    """An attempt() that raises errors in turn, then returns result; .calls counts calls."""
+    errors = list(errors)
+
+    def attempt():
+        attempt.calls += 1
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    attempt.calls = 0
+    return attempt
+
+
+@pytest.mark.parametrize("error, kind", [
+    (StatusError(429), RATE_LIMIT),
+    (StatusError(500), TRANSIENT),
+    (StatusError(503), TRANSIENT),
+    (StatusError(408), TRANSIENT),
+    (StatusError(400), FATAL),
+    (StatusError(401), FATAL),
+    (RateLimitError("slow down"), RATE_LIMIT),
+    (APIConnectionError("reset"), TRANSIENT),
+    (TimeoutError(), TRANSIENT),
+    (EmptyResponse("groq"), TRANSIENT),
+    (ProviderError("GROQ_API_KEY is not set"), FATAL),
+    (ValueError("bad"), FATAL),
+])
+def test_classify(error, kind):
+    assert classify(error) == kind
+
+
+def test_breaker_opens_after_consecutive_transient_failures():
+    breaker = CircuitBreaker("groq", threshold=2, cooldown=60)
+    breaker.record(TRANSIENT)
+    breaker.record(None)
+    breaker.record(TRANSIENT)
+    assert breaker.state == "closed"
+
+    breaker.record(TRANSIENT)
+    assert breaker.stats() == {"state": "open", "failures": 2}
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_answers_that_are_not_transient_mean_the_provider_is_up():
+    breaker = CircuitBreaker("groq", threshold=2, cooldown=60)
+    breaker.record(TRANSIENT)
+    breaker.record(RATE_LIMIT)
+    breaker.record(TRANSIENT)
+    assert breaker.state == "closed"
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    breaker = CircuitBreaker("groq", threshold=1, cooldown=0)
+    breaker.record(TRANSIENT)
+    assert breaker.state == "open"
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    # a failed probe re-opens it, a successful one closes it
+    breaker.record(TRANSIENT)
+    assert breaker.state == "open"
+    breaker.before_call()
+    breaker.record(None)
+    assert breaker.stats() == {"state": "closed", "failures": 0}
+
+
+def test_released_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker("groq", threshold=1, cooldown=0)
+    breaker.record(TRANSIENT)
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == "half_open"
+
+
+def test_retries_transient_failures():
+    attempt = failing(StatusError(503), APIConnectionError("reset"))
+    assert call_with_retries("groq", attempt) == "ok"
+    assert attempt.calls == 3
+    assert breaker_for("groq").stats() == {"state": "closed", "failures": 0}
+
+
+def test_gives_up_after_the_last_attempt():
+    attempt = failing(*[StatusError(503)] * 5)
+    with pytest.raises(StatusError):
+        call_with_retries("groq", attempt)
+    assert attempt.calls == resilience.RETRY_ATTEMPTS
+
+
+def test_fatal_errors_are_not_retried():
+    attempt = failing(StatusError(401))
+    with pytest.raises(StatusError):
+        call_with_retries("groq", attempt)
+    assert attempt.calls == 1
+
+
+def test_no_retry_once_output_was_streamed():
+    attempt = failing(StatusError(503))
+    with pytest.raises(StatusError):
+        call_with_retries("groq", attempt, streamed=lambda: True)
+    assert attempt.calls == 1
+
+
+def test_open_breaker_fails_fast(monkeypatch):
+    monkeypatch.setitem(resilience._breakers, "groq", CircuitBreaker("groq", threshold=2, cooldown=60))
+    # the breaker opens after the second failure, so the third attempt is never made
+    attempt = failing(*[StatusError(503)] * 3)
+    with pytest.raises(CircuitOpen):
+        call_with_retries("groq", attempt)
+    assert attempt.calls == 2
+
+    attempt = failing()
+    with pytest.raises(CircuitOpen):
+        call_with_retries("groq", attempt)
+    assert attempt.calls == 0
+
+
+def test_cancelled_hedge_leg_leaves_the_breaker_alone():
+    breaker = breaker_for("groq")
+    breaker.record(TRANSIENT)
+
+    attempt = failing(HedgeCancelled())
+    with pytest.raises(HedgeCancelled):
+        call_with_retries("groq", attempt)
+    assert attempt.calls == 1
+    assert breaker.stats() == {"state": "closed", "failures": 1}
+
+
+def test_async_retries_and_cancellation():
+    async def run():
+        errors = [StatusError(500)]
+
+        async def attempt():
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        assert await acall_with_retries("groq", attempt) == "ok"
+
+        breaker = CircuitBreaker("gemini", threshold=1, cooldown=0)
+        resilience._breakers["gemini"] = breaker
+        breaker.record(TRANSIENT)
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        task = asyncio.ensure_future(acall_with_retries("gemini", hang))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # the abandoned probe does not block the next one
+        breaker.before_call()
+
+    asyncio.run(run())
+
+
+def test_failover_chain(monkeypatch):
+    monkeypatch.setattr(resilience, "FAILOVER", resilience._parse_failover("llama=qwen, openai;gemini=openai"))
+
+    assert failover_chain("llama") == ["llama", "qwen", "openai"]
+    assert failover_chain("llama", "kimi") == ["llama", "kimi"]
+    assert failover_chain("llama", ["llama", "groq:llama-3.1-8b-instant"]) == ["llama", "groq:llama-3.1-8b-instant"]
+    assert failover_chain("llama", []) == ["llama"]
+    assert failover_chain("kimi") == ["kimi"]
@@ -0,0 +1,84 @@
+import os
+import time
+
+from src.response_cache import ResponseCache, cache_key
+
+MESSAGES = [{"role": "system", "content": "You are the critic."}, {"role": "user", "content": "Your turn."}]
+
+
+def test_cache_key_ignores_surrounding_whitespace_only():
+    padded = [{"role": m["role"], "content": f"  {m['content']}\n"} for m in MESSAGES]
+    assert cache_key("groq", "llama", padded) == cache_key("groq", "llama", MESSAGES)
+
+    assert cache_key("groq", "qwen", MESSAGES) != cache_key("groq", "llama", MESSAGES)
+    assert cache_key("openai", "llama", MESSAGES) != cache_key("groq", "llama", MESSAGES)
+    swapped = [{"role": "user", "content": m["content"]} for m in MESSAGES]
+    assert cache_key("groq", "llama", swapped) != cache_key("groq", "llama", MESSAGES)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "reply a")
+    cache.put("b", "reply b")
+    assert cache.get("a") == "reply a"
+    cache.put("c", "reply c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "reply a"
+    assert cache.get("c") == "reply c"
+    assert cache.stats() == {
+        "memory_hits": 3, "disk_hits": 0, "misses": 1, "stores": 3, "evictions": 1, "memory_entries": 2,
+    }
+
+
+def test_expired_entries_are_misses():
+    cache = ResponseCache(ttl=60)
+    cache.put("a", "reply")
+    cache._memory["a"] = (time.time() - 61, "reply")
+
+    assert cache.get("a") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    ResponseCache(directory=str(tmp_path)).put("a", "reply a")
+
+    cache = ResponseCache(directory=str(tmp_path))
+    assert cache.get("a") == "reply a"
+    assert cache.get("a") == "reply a"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_expired_disk_entries_are_deleted(tmp_path):
+    ResponseCache(directory=str(tmp_path)).put("a", "reply a")
+    path = tmp_path / "a.json"
+    path.write_text('{"created": 0, "response": "reply a"}', encoding="utf-8")
+
+    assert ResponseCache(directory=str(tmp_path), ttl=60).get("a") is None
+    assert not path.exists()
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    writer = ResponseCache(directory=str(tmp_path), ttl=0)
+    for i, key in enumerate("abc"):
+        writer.put(key, "x" * 100)
+        os.utime(tmp_path / f"{key}.json", (1000 * (i + 1), 1000 * (i + 1)))
+    size = os.path.getsize(tmp_path / "a.json")
+
+    cache = ResponseCache(directory=str(tmp_path), disk_max_bytes=int(size * 3.5), ttl=0)
+    # reading "a" makes "b" the least recently used file
+    assert cache.get("a") == "x" * 100
+    cache.put("d", "x" * 100)
+
+    assert sorted(name for name in os.listdir(tmp_path)) == ["a.json", "c.json", "d.json"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path))
+    cache.put("a", "reply a")
+    cache.clear()
+
+    assert cache.get("a") is None
+    assert os.listdir(tmp_path) == []
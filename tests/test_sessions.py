@@ -0,0 +1,140 @@
+import time
+
+import pytest
+
+import sessions
+from sessions import SessionRegistry, Stored
+from state_store import MemoryStore
+
+
+class Dummy:
+    debating = Stored(False)
+
+    def __init__(self):
+        self.debating = False
+
+
+def test_sessions_are_isolated_by_debate_id():
+    registry = SessionRegistry(Dummy)
+    first, second = registry.create(), registry.create()
+
+    assert first.debate_id != second.debate_id
+    assert registry.get(first.debate_id) is first
+    assert registry.get(second.debate_id) is second
+    assert registry.get("nope") is None
+    assert len(registry) == 2
+
+
+def test_active_lists_only_debating_sessions():
+    registry = SessionRegistry(Dummy)
+    idle, busy = registry.create(), registry.create()
+    busy.debating = True
+
+    assert registry.active() == [busy]
+    assert registry.remove(idle.debate_id) is idle
+    assert len(registry) == 1
+
+
+def test_idle_sessions_are_evicted_but_debating_ones_kept():
+    registry = SessionRegistry(Dummy, idle_timeout=0.05)
+    idle, busy = registry.create(), registry.create()
+    busy.debating = True
+    time.sleep(0.1)
+
+    assert registry.evict_idle() == 1
+    assert registry.get(idle.debate_id) is None
+    assert registry.get(busy.debate_id) is busy
+
+
+def test_create_sweeps_at_most_once_per_tenth_of_the_idle_timeout(monkeypatch):
+    store = MemoryStore()
+    registry = SessionRegistry(Dummy, idle_timeout=60, store=store)
+    sweeps = []
+    ids = store.ids
+    monkeypatch.setattr(store, "ids", lambda: sweeps.append(1) or ids())
+
+    for _ in range(3):
+        registry.create()
+    assert len(sweeps) == 1
+
+    registry._last_eviction -= 6
+    registry.create()
+    assert len(sweeps) == 2
+
+
+def test_get_refreshes_last_active():
+    registry = SessionRegistry(Dummy, idle_timeout=0.1)
+    session = registry.create()
+    time.sleep(0.06)
+    registry.get(session.debate_id)
+    time.sleep(0.06)
+
+    assert registry.evict_idle() == 0
+
+
+def test_peek_does_not_refresh_last_active():
+    registry = SessionRegistry(Dummy, idle_timeout=0.05)
+    session = registry.create()
+    time.sleep(0.1)
+
+    assert registry.peek(session.debate_id) is session
+    assert registry.peek("nope") is None
+    assert registry.evict_idle() == 1
+
+
+def test_claim_lets_one_request_start_a_debate():
+    registry = SessionRegistry(Dummy, store=MemoryStore())
+    session = registry.create()
+
+    assert registry.claim(session.debate_id)
+    assert not registry.claim(session.debate_id)
+    assert session.debating is True
+
+    session.debating = False
+    assert registry.claim(session.debate_id)
+
+
+def test_workers_sharing_a_store_see_the_same_sessions():
+    store = MemoryStore()
+    first, second = SessionRegistry(Dummy, store=store), SessionRegistry(Dummy, store=store)
+    session = first.create()
+    session.debating = True
+    session.debate_history.append({"message": "hi"})
+
+    other = second.get(session.debate_id)
+    assert other is not session
+    assert other.debating is True
+    assert other.debate_history.since() == [{"message": "hi", "seq": 1}]
+
+    second.remove(session.debate_id)
+    assert first.get(session.debate_id) is None
+
+
+@pytest.fixture
+def client():
+    import app_sam
+
+    app_sam.sessions = SessionRegistry(app_sam.DebateState)
+    return app_sam.app.test_client()
+
+
+AGENTS = [
+    {"model": "openai", "expertise": "logic", "personality": "calm", "role": "facilitator"},
+    {"model": "llama", "expertise": "maths", "personality": "sharp", "role": "critic"},
+]
+
+
+def test_each_deck_starts_its_own_debate(client):
+    first = client.post("/api/deck", json={"agents": AGENTS}).get_json()["debate_id"]
+    second = client.post("/api/deck", json={"agents": AGENTS[:1]}).get_json()["debate_id"]
+
+    assert first != second
+    assert client.get("/api/status").get_json()["sessions"] == 2
+    assert client.get(f"/api/status?debate_id={first}").get_json()["cards_configured"] == 2
+    assert client.get(f"/api/status?debate_id={second}").get_json()["cards_configured"] == 1
+
+
+def test_requests_need_a_known_debate_id(client):
+    assert client.post("/api/puzzle", json={"puzzle": "2+2?"}).status_code == 400
+    assert client.post("/api/puzzle", json={"puzzle": "2+2?", "debate_id": "nope"}).status_code == 404
+    assert client.get("/api/sync?debate_id=nope").status_code == 404
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import app_sam
+from sessions import SessionRegistry
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_sam, "sessions", SessionRegistry(app_sam.DebateState))
+    monkeypatch.setattr(app_sam, "SSE_HEARTBEAT_SECONDS", 0.05)
+    return app_sam.app.test_client()
+
+
+def _new_session(client):
+    agents = [{"model": "openai", "expertise": "x", "personality": "y", "role": "facilitator"}]
+    debate_id = client.post("/api/deck", json={"agents": agents}).get_json()["debate_id"]
+    return app_sam.sessions.get(debate_id)
+
+
+def _frames(response, count):
+    chunks = iter(response.response)
+    frames = [next(chunks) for _ in range(count)]
+    response.close()
+    return [f.decode() if isinstance(f, bytes) else f for f in frames]
+
+
+def test_stream_sends_logged_messages_with_sequence_ids(client):
+    session = _new_session(client)
+    session.debate_history.append({"role": "critic", "message": "hi", "colour": "#123456"})
+
+    response = client.get(f"/api/stream?debate_id={session.debate_id}", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    retry, message, status = _frames(response, 3)
+
+    assert retry == "retry: 3000\n\n"
+    assert message.startswith("id: 1\ndata: ")
+    assert json.loads(message.split("data: ", 1)[1]) == {
+        "text": "hi", "colour": "#123456", "role": "critic", "debating": False,
+    }
+    assert status == 'event: status\ndata: {"debating": false}\n\n'
+
+
+def test_stream_resumes_after_last_event_id(client):
+    session = _new_session(client)
+    for text in ("one", "two", "three"):
+        session.debate_history.append({"role": "critic", "message": text})
+
+    response = client.get(
+        f"/api/stream?debate_id={session.debate_id}", headers={"Last-Event-ID": "2"}, buffered=False
+    )
+    _, message, _ = _frames(response, 3)
+
+    assert message.startswith("id: 3\n")
+    assert '"text": "three"' in message
+
+
+def test_idle_stream_sends_heartbeats(client):
+    session = _new_session(client)
+
+    response = client.get(f"/api/stream?debate_id={session.debate_id}", buffered=False)
+    frames = _frames(response, 4)
+
+    assert frames[2:] == [": heartbeat\n\n", ": heartbeat\n\n"]
+
+
+def test_sync_hands_out_one_message_per_poll(client):
+    session = _new_session(client)
+    session.debate_history.append({"role": "critic", "message": "one"})
+    session.debate_history.append({"role": "reasoner", "message": "two"})
+
+    url = f"/api/sync?debate_id={session.debate_id}"
+    assert client.get(url).get_json()["text"] == "one"
+    assert client.get(url).get_json()["text"] == "two"
+    assert client.get(url).get_json()["text"] == ""
+
+
+def test_heartbeats_do_not_keep_the_session_alive(client):
+    session = _new_session(client)
+    response = client.get(f"/api/stream?debate_id={session.debate_id}", buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    # opening the stream counts as activity, the heartbeats after it don't
+    last_active = app_sam.sessions._store.get(session.debate_id, "last_active")
+    for _ in range(4):
+        next(chunks)
+    response.close()
+
+    assert app_sam.sessions._store.get(session.debate_id, "last_active") == last_active
@@ -0,0 +1,72 @@
+import pytest
+
+import app
+import app_sam
+from reasoning import GameState
+from sessions import SessionRegistry
+
+
+@pytest.fixture
+def sam_session(monkeypatch):
+    monkeypatch.setattr(app_sam, "sessions", SessionRegistry(app_sam.DebateState))
+    monkeypatch.setattr(app_sam, "SYNC_MAX_BATCH", 3)
+    session = app_sam.sessions.create()
+    for n in range(1, 6):
+        session.debate_history.append({"role": "critic", "message": f"m{n}", "colour": "#00ff00"})
+    return app_sam.app.test_client(), session
+
+
+def test_sync_after_returns_every_newer_message_and_next_cursor(sam_session):
+    client, session = sam_session
+
+    body = client.get(f"/api/sync?debate_id={session.debate_id}&after=1&max=2").get_json()
+
+    assert [m["text"] for m in body["messages"]] == ["m2", "m3"]
+    assert [m["seq"] for m in body["messages"]] == [2, 3]
+    assert body["cursor"] == 3
+    assert body["debating"] is False
+
+
+def test_sync_after_is_capped_and_does_not_consume(sam_session):
+    client, session = sam_session
+    url = f"/api/sync?debate_id={session.debate_id}&after=0&max=100"
+
+    first = client.get(url).get_json()
+    second = client.get(url).get_json()
+
+    assert len(first["messages"]) == 3
+    assert first == second
+
+
+def test_sync_after_at_the_end_keeps_the_cursor(sam_session):
+    client, session = sam_session
+
+    body = client.get(f"/api/sync?debate_id={session.debate_id}&after=5").get_json()
+
+    assert body["messages"] == []
+    assert body["cursor"] == 5
+
+
+def test_sync_rejects_non_integer_cursor(sam_session):
+    client, session = sam_session
+
+    assert client.get(f"/api/sync?debate_id={session.debate_id}&after=x").status_code == 400
+
+
+def test_legacy_app_sync_after(monkeypatch):
+    monkeypatch.setattr(app, "games", SessionRegistry(GameState))
+    game = app.games.create()
+    game.debate_history.append({"role": "facilitator", "model": "openai", "message": "hello"})
+    game.debate_history.append({"role": "critic", "model": "llama", "message": "there"})
+    client = app.app.test_client()
+
+    body = client.get(f"/api/sync?debate_id={game.debate_id}&after=0").get_json()
+    assert body["messages"] == [
+        {"seq": 1, "text": "hello", "colour": "#DC143C"},
+        {"seq": 2, "text": "there", "colour": "#00ff00"},
+    ]
+    assert body["cursor"] == 2
+
+    # Without a cursor the endpoint still hands out one message per call
+    assert client.get(f"/api/sync?debate_id={game.debate_id}").get_json()["text"] == "hello"
+    assert client.get(f"/api/sync?debate_id={game.debate_id}").get_json()["text"] == "there"
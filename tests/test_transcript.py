@@ -0,0 +1,59 @@
+from src.transcript import Transcript, TranscriptEntry
+
+
+def _transcript(*texts):
+    transcript = Transcript()
+    for text in texts:
+        transcript.append("critic", "llama", text)
+    return transcript
+
+
+def test_entries_are_numbered_and_sliced_by_seq():
+    transcript = _transcript("a", "b", "c")
+
+    assert len(transcript) == 3
+    assert [e.seq for e in transcript.entries()] == [1, 2, 3]
+    assert [e.text for e in transcript.entries(after=1, upto=2)] == ["b"]
+
+
+def test_render_matches_the_old_conversation_text():
+    transcript = _transcript("a", "b")
+
+    assert transcript.render() == "\n[CRITIC]: a\n\n[CRITIC]: b\n"
+    assert transcript.render(1) == "\n[CRITIC]: a\n"
+    assert transcript.render(0) == ""
+
+
+def test_render_only_formats_new_entries(monkeypatch):
+    calls = []
+    original = TranscriptEntry.render
+    monkeypatch.setattr(TranscriptEntry, "render", lambda self: calls.append(self.seq) or original(self))
+    transcript = _transcript("a", "b")
+
+    transcript.render()
+    transcript.render()
+    transcript.append("reasoner", "qwen", "c")
+    text = transcript.render()
+
+    assert calls == [1, 2, 3]
+    assert text.endswith("\n[REASONER]: c\n")
+
+
+def test_views_are_independent_cursors():
+    transcript = _transcript("a", "b")
+    first, second = transcript.view(), transcript.view()
+
+    assert [e.text for e in first.new_entries()] == ["a", "b"]
+    assert first.new_entries() == []
+    transcript.append("critic", "llama", "c")
+
+    assert [e.text for e in first.new_entries()] == ["c"]
+    assert [e.text for e in second.new_entries()] == ["a", "b", "c"]
+    assert first.render() == transcript.render()
+
+
+def test_user_message_is_built_once_and_shared():
+    entry = _transcript("a").entries()[0]
+
+    assert entry.user_message() == {"role": "user", "content": "a"}
+    assert entry.user_message() is entry.user_message()
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+from src import debate_tools
+
+
+CARDS = [
+    {"role": "facilitator", "model": "openai"},
+    {"role": "critic", "model": "llama"},
+    {"role": "reasoner", "model": "qwen"},
+]
+
+
+def _reply(kw):
+    if kw["role"] == "facilitator":
+        return "That is the answer: 42"
+    return f"{kw['role']} speaking"
+
+
+def test_parallel_participants_answer_round_start_transcript(monkeypatch):
+    barrier = threading.Barrier(2, timeout=5)
+    seen = []
+
+    def fake_call_llm(**kw):
+        seen.append((kw["role"], kw["conversation_history"]))
+        if kw["role"] != "facilitator":
+            # Both participants must be in flight at once to get past here
+            barrier.wait()
+        return {"status": "success", "response": _reply(kw)}
+
+    monkeypatch.setattr(debate_tools, "call_llm", fake_call_llm)
+    messages = []
+    result = debate_tools.run_debate_streaming(
+        "puzzle", CARDS, max_rounds=1,
+        on_message=lambda role, msg, model: messages.append(role),
+        turn_mode="parallel",
+    )
+
+    assert result["final_answer"] == "That is the answer: 42"
+    assert sorted(messages[:2]) == ["critic", "reasoner"]
+    assert messages[2] == "facilitator"
+    histories = dict(seen)
+    assert histories["critic"] == histories["reasoner"] == ""
+    assert "[CRITIC]: critic speaking" in histories["facilitator"]
+    assert "[REASONER]: reasoner speaking" in histories["facilitator"]
+
+
+def test_sequential_participants_see_earlier_replies(monkeypatch):
+    seen = []
+
+    def fake_call_llm(**kw):
+        seen.append(kw["conversation_history"])
+        return {"status": "success", "response": _reply(kw)}
+
+    monkeypatch.setattr(debate_tools, "call_llm", fake_call_llm)
+    debate_tools.run_debate_streaming("puzzle", CARDS, max_rounds=1)
+
+    assert seen[0] == ""
+    assert "speaking" in seen[1]
+
+
+def test_async_parallel_turns_run_concurrently(monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def fake_acall_llm(**kw):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return {"status": "success", "response": _reply(kw)}
+
+    monkeypatch.setattr(debate_tools, "acall_llm", fake_acall_llm)
+
+    async def collect():
+        return [event async for event in debate_tools.arun_debate(
+            "puzzle", CARDS, max_rounds=1, turn_mode="parallel")]
+
+    events = asyncio.run(collect())
+
+    assert peak == 2
+    assert [e["role"] for e in events if e["type"] == "message"][-1] == "facilitator"
+    assert events[-1] == {"type": "result", "status": "completed", "final_answer": "That is the answer: 42"}
+
+
+def test_unknown_turn_mode_is_rejected():
+    result = debate_tools.run_debate_streaming("puzzle", CARDS, turn_mode="bogus")
+    assert result["status"] == "error"
+
+
+def test_parallel_mode_with_only_facilitators(monkeypatch):
+    def fake_call_llm(**kw):
+        return {"status": "success", "response": _reply(kw)}
+
+    monkeypatch.setattr(debate_tools, "call_llm", fake_call_llm)
+    facilitators = [CARDS[0], dict(CARDS[0], model="llama")]
+
+    result = debate_tools.run_debate_streaming("puzzle", facilitators, max_rounds=1, turn_mode="parallel")
+
+    assert result["status"] == "completed"
+    assert result["final_answer"] == "That is the answer: 42"
@@ -0,0 +1,108 @@
+import pytest
+
+from src.verdict import (
+    ANSWER,
+    CONTINUE,
+    StopGeneration,
+    VerdictDetector,
+    json_verdict,
+    parse_verdict,
+    phrase_verdict,
+)
+
+
+def stream(detector, text, chunk=4):
+    """Feed text through detector.watch in chunks; returns what was received before it stopped."""
+    on_delta = detector.watch()
+    received = ""
+    for i in range(0, len(text), chunk):
+        received += text[i:i + chunk]
+        try:
+            on_delta(text[i:i + chunk])
+        except StopGeneration:
+            break
+    return received
+
+
+@pytest.mark.parametrize("text, verdict", [
+    ("I am the facilitator. Box two. That is the answer.", ANSWER),
+    ("I am the facilitator. We need more discussion", CONTINUE),
+    ("**That's our final answer!**", ANSWER),
+    ("That’s the answer.", ANSWER),
+    ("We need further discussion.", CONTINUE),
+    # conditionals and questions are not verdicts
+    ("If the clue holds, that is the answer. We need more discussion.", CONTINUE),
+    ("Is that the answer? We need more discussion.", CONTINUE),
+    ("That is not the answer yet.", None),
+    ("The red box.", None),
+])
+def test_phrase_verdict(text, verdict):
+    assert phrase_verdict(text) == verdict
+
+
+def test_first_settled_phrase_wins():
+    assert phrase_verdict("That is the answer. Wait, actually we need more discussion.") == ANSWER
+    # a phrase that runs on into its sentence is not settled; the later one is
+    assert phrase_verdict("That is the answer because of x, so we need more discussion.") == CONTINUE
+
+
+def test_json_verdict_strips_the_object():
+    text = 'Box two. That is the answer.\n```json\n{"verdict": "answer"}\n```'
+    assert json_verdict(text) == (ANSWER, "Box two. That is the answer.")
+    assert json_verdict("no json here") == (None, "no json here")
+
+
+def test_parse_verdict_falls_back_to_the_phrase_in_json_mode():
+    assert parse_verdict("We need more discussion.", "json") == (CONTINUE, "We need more discussion.")
+    assert parse_verdict('Hm. {"verdict": "continue"}', "json") == (CONTINUE, "Hm.")
+    assert parse_verdict('Hm. {"verdict": "continue"}', "phrase") == (None, 'Hm. {"verdict": "continue"}')
+
+
+@pytest.mark.parametrize("text", [
+    "I am the facilitator. That is the answer. Wait, actually we need more discussion.",
+    "I am the facilitator. We need more discussion! Let us check box one again.",
+    "If so, that is the answer. We need more discussion.",
+    "That is the answer because of x, so we need more discussion",
+    "Nothing settled here",
+])
+def test_streamed_and_finished_verdicts_agree(text):
+    detector = VerdictDetector("phrase")
+    received = stream(detector, text)
+
+    assert detector.finish(received)[0] == VerdictDetector("phrase").finish(text)[0]
+
+
+def test_watch_stops_once_the_phrase_ends_its_sentence():
+    detector = VerdictDetector("phrase")
+    text = "I am the facilitator. That is the answer. Now let me explain at length why."
+    received = stream(detector, text, chunk=1)
+
+    assert received == "I am the facilitator. That is the answer."
+    assert detector.stopped_early
+    assert detector.finish(received) == (ANSWER, received)
+    assert detector.verdict == ANSWER
+
+
+def test_watch_forwards_chunks_and_runs_to_the_end_without_a_verdict():
+    forwarded = []
+    detector = VerdictDetector("phrase")
+    on_delta = detector.watch(forwarded.append)
+    for chunk in ("That is the ", "answer", " to what?"):
+        on_delta(chunk)
+
+    assert "".join(forwarded) == "That is the answer to what?"
+    assert not detector.stopped_early
+
+
+def test_watch_in_json_mode_waits_for_the_object():
+    detector = VerdictDetector("json")
+    text = 'That is the answer.\n{"verdict": "answer"} trailing'
+    received = stream(detector, text, chunk=1)
+
+    assert received == 'That is the answer.\n{"verdict": "answer"}'
+    assert detector.finish(received) == (ANSWER, "That is the answer.")
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        VerdictDetector("vibes")